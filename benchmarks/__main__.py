@@ -0,0 +1,73 @@
+"""
+Run the benchmark suite and optionally compare it with a stored baseline:
+
+    python -m benchmarks --sizes 100 1000 --output results.json
+    python -m benchmarks --baseline results.json
+
+The exit status is 1 if any benchmark regressed against the baseline.
+"""
+import argparse
+import sys
+
+from benchmarks.suite import (
+    DEFAULT_REPEAT, DEFAULT_SEED, DEFAULT_SIZES, DEFAULT_TOLERANCE, FAMILIES,
+    compare_results, load_results, run_benchmarks, save_results
+)
+
+
+def print_result(result):
+    memory = result['peak_memory_bytes']
+    print('{:<55} {:<22} {:>7} {:>12.6f}s {:>12}'.format(
+        result['benchmark'], result['family'], result['size'],
+        result['best_seconds'], '-' if memory is None else '{:,}B'.format(memory)
+    ))
+
+
+def print_comparisons(comparisons):
+    for comparison in comparisons:
+        print('{:<55} {:<22} {:>7} {:>8.2f}x{}'.format(
+            comparison['benchmark'], comparison['family'], comparison['size'],
+            comparison['ratio'], '  REGRESSED' if comparison['regressed'] else ''
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+        help='graph sizes (vertex counts) to sweep')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+        help='timed runs per benchmark; the best is reported')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+        help='random seed for the generated graphs')
+    parser.add_argument('--benchmark', action='append', dest='names',
+        help='only run benchmarks whose name contains this (repeatable)')
+    parser.add_argument('--family', action='append', dest='families',
+        choices=sorted(FAMILIES), help='only use this graph family (repeatable)')
+    parser.add_argument('--no-memory', action='store_true',
+        help='skip the tracemalloc peak memory measurement')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare with this results JSON file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='slowdown fraction that counts as a regression')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        sizes=args.sizes, repeat=args.repeat, seed=args.seed,
+        names=args.names, families=args.families,
+        measure_memory=not args.no_memory, progress_callback=print_result
+    )
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        comparisons = compare_results(results, load_results(args.baseline), args.tolerance)
+        print()
+        print_comparisons(comparisons)
+        if any(comparison['regressed'] for comparison in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import math
+import random
+
+from graphs.graph import Graph
+from graphs.weighted_graph import WeightedGraph
+
+# Weights of generated weighted graphs are drawn uniformly from this range
+DEFAULT_WEIGHT_RANGE = (1, 100)
+
+
+def erdos_renyi(num_vertices, edge_probability, is_directed=False,
+    weighted=False, seed=None, weight_range=DEFAULT_WEIGHT_RANGE):
+    """
+    Generate a G(n, p) random graph, in which every possible edge is present
+    independently with probability `edge_probability`.
+
+    Rather than flipping a coin for each of the n^2 vertex pairs, the gap to
+    the next present edge is drawn from a geometric distribution, so the cost
+    is proportional to the number of edges generated.
+
+    Parameters:
+    num_vertices (integer): The number of vertices, with ids '0'..'n-1'.
+    edge_probability (float): The probability of each edge being present.
+    is_directed (boolean): Whether to generate a directed graph.
+    weighted (boolean): Whether to generate a WeightedGraph.
+    seed (integer): The random seed; the same seed gives the same graph.
+    weight_range ((integer, integer)): The inclusive range of edge weights.
+
+    Returns:
+    Graph: The generated graph (a WeightedGraph if `weighted`).
+    """
+    rng = random.Random(seed)
+    graph, vertex_ids = _create_graph(num_vertices, is_directed, weighted)
+    if edge_probability <= 0 or num_vertices < 2:
+        return graph
+
+    # the candidate pairs, numbered 0..num_pairs-1, are (u, v) with u != v for
+    # a directed graph, and u > v for an undirected one
+    if is_directed:
+        num_pairs = num_vertices * (num_vertices - 1)
+    else:
+        num_pairs = num_vertices * (num_vertices - 1) // 2
+
+    add_edge = _edge_adder(graph, weighted, rng, weight_range)
+    # log(1 - p) scales a uniform draw into the geometric gap; with p = 1
+    # every pair is an edge and the gap is always 1
+    log_miss = math.log(1.0 - edge_probability) if edge_probability < 1 else None
+
+    pair = -1
+    while True:
+        pair += 1
+        if log_miss is not None:
+            pair += int(math.log(1.0 - rng.random()) / log_miss)
+        if pair >= num_pairs:
+            break
+
+        if is_directed:
+            source, target = divmod(pair, num_vertices - 1)
+            if target >= source:
+                target += 1 # skip the self loop
+        else:
+            # row u holds the pairs (u, 0)..(u, u-1)
+            source = int((1 + math.sqrt(1 + 8 * pair)) / 2)
+            while source * (source - 1) // 2 > pair:
+                source -= 1
+            while (source + 1) * source // 2 <= pair:
+                source += 1
+            target = pair - source * (source - 1) // 2
+        add_edge(vertex_ids[source], vertex_ids[target])
+    return graph
+
+
+def barabasi_albert(num_vertices, edges_per_vertex, is_directed=False,
+    weighted=False, seed=None, weight_range=DEFAULT_WEIGHT_RANGE):
+    """
+    Generate a scale-free graph by preferential attachment: vertices are added
+    one at a time, each linking to `edges_per_vertex` distinct earlier
+    vertices chosen with probability proportional to their degree.
+
+    In a directed graph each new vertex points at the vertices it chose.
+
+    Parameters:
+    num_vertices (integer): The number of vertices, with ids '0'..'n-1'.
+    edges_per_vertex (integer): How many edges each new vertex adds.
+    is_directed (boolean): Whether to generate a directed graph.
+    weighted (boolean): Whether to generate a WeightedGraph.
+    seed (integer): The random seed; the same seed gives the same graph.
+    weight_range ((integer, integer)): The inclusive range of edge weights.
+
+    Returns:
+    Graph: The generated graph (a WeightedGraph if `weighted`).
+    """
+    if edges_per_vertex < 1:
+        raise ValueError("edges_per_vertex must be at least 1")
+    rng = random.Random(seed)
+    graph, vertex_ids = _create_graph(num_vertices, is_directed, weighted)
+    add_edge = _edge_adder(graph, weighted, rng, weight_range)
+
+    # every vertex appears here once per edge end it has, so a uniform pick
+    # from this list is a pick proportional to degree
+    edge_ends = []
+    # the first new vertex links to the whole seed group
+    targets = list(range(min(edges_per_vertex, num_vertices)))
+    for source in range(len(targets), num_vertices):
+        for target in targets:
+            add_edge(vertex_ids[source], vertex_ids[target])
+            edge_ends.append(source)
+            edge_ends.append(target)
+
+        chosen = set()
+        while len(chosen) < min(edges_per_vertex, source + 1):
+            chosen.add(rng.choice(edge_ends))
+        targets = sorted(chosen)
+    return graph
+
+
+def grid(num_rows, num_columns, is_directed=False, weighted=False, seed=None,
+    weight_range=DEFAULT_WEIGHT_RANGE, spacing=1):
+    """
+    Generate a 2D grid graph, in which every cell is linked to the cells to
+    its right and below it. Vertex ids are 'row_column' strings, and each
+    vertex's 'coordinates' attribute is (row * spacing, column * spacing).
+
+    Parameters:
+    num_rows (integer): The number of rows.
+    num_columns (integer): The number of columns.
+    is_directed (boolean): Whether to generate a directed graph, with edges
+    pointing right and down.
+    weighted (boolean): Whether to generate a WeightedGraph.
+    seed (integer): The random seed for the weights.
+    weight_range ((integer, integer)): The inclusive range of edge weights.
+    spacing (number): The distance between neighboring cells' coordinates;
+    with weights no smaller than it, the Manhattan distance between
+    coordinates is an admissible A* heuristic.
+
+    Returns:
+    Graph: The generated graph (a WeightedGraph if `weighted`).
+    """
+    rng = random.Random(seed)
+    graph = (WeightedGraph if weighted else Graph)(is_directed=is_directed)
+    cell_ids = [
+        ['{}_{}'.format(row, column) for column in range(num_columns)]
+        for row in range(num_rows)
+    ]
+    for row, row_ids in enumerate(cell_ids):
+        for column, cell_id in enumerate(row_ids):
+            graph.add_vertex(cell_id)
+            graph.set_vertex_attributes(cell_id, coordinates=(row * spacing, column * spacing))
+
+    add_edge = _edge_adder(graph, weighted, rng, weight_range)
+    for row in range(num_rows):
+        for column in range(num_columns):
+            if column + 1 < num_columns:
+                add_edge(cell_ids[row][column], cell_ids[row][column + 1])
+            if row + 1 < num_rows:
+                add_edge(cell_ids[row][column], cell_ids[row + 1][column])
+    return graph
+
+
+def dag_layers(num_layers, layer_width, edge_probability, weighted=False,
+    seed=None, weight_range=DEFAULT_WEIGHT_RANGE):
+    """
+    Generate a layered directed acyclic graph: `num_layers` layers of
+    `layer_width` vertices, where each vertex points at each vertex of the
+    next layer with probability `edge_probability`. Every vertex after the
+    first layer gets at least one incoming edge, so the first layer holds the
+    only sources.
+
+    Parameters:
+    num_layers (integer): The number of layers.
+    layer_width (integer): The number of vertices per layer.
+    edge_probability (float): The probability of each edge between two
+    consecutive layers.
+    weighted (boolean): Whether to generate a WeightedGraph.
+    seed (integer): The random seed; the same seed gives the same graph.
+    weight_range ((integer, integer)): The inclusive range of edge weights.
+
+    Returns:
+    Graph: The generated directed graph (a WeightedGraph if `weighted`).
+    """
+    rng = random.Random(seed)
+    graph, vertex_ids = _create_graph(num_layers * layer_width, True, weighted)
+    add_edge = _edge_adder(graph, weighted, rng, weight_range)
+
+    for layer in range(1, num_layers):
+        previous = vertex_ids[(layer - 1) * layer_width:layer * layer_width]
+        current = vertex_ids[layer * layer_width:(layer + 1) * layer_width]
+        for target_id in current:
+            linked = False
+            for source_id in previous:
+                if rng.random() < edge_probability:
+                    add_edge(source_id, target_id)
+                    linked = True
+            if not linked:
+                add_edge(rng.choice(previous), target_id)
+    return graph
+
+
+def random_tree(num_vertices, is_directed=True, weighted=False, seed=None,
+    weight_range=DEFAULT_WEIGHT_RANGE):
+    """
+    Generate a random recursive tree: every vertex after the root is linked
+    from a uniformly chosen earlier vertex. Vertex '0' is the root.
+
+    Parameters:
+    num_vertices (integer): The number of vertices, with ids '0'..'n-1'.
+    is_directed (boolean): Whether edges point from parent to child only.
+    weighted (boolean): Whether to generate a WeightedGraph.
+    seed (integer): The random seed; the same seed gives the same graph.
+    weight_range ((integer, integer)): The inclusive range of edge weights.
+
+    Returns:
+    Graph: The generated tree (a WeightedGraph if `weighted`).
+    """
+    rng = random.Random(seed)
+    graph, vertex_ids = _create_graph(num_vertices, is_directed, weighted)
+    add_edge = _edge_adder(graph, weighted, rng, weight_range)
+    for child in range(1, num_vertices):
+        add_edge(vertex_ids[rng.randrange(child)], vertex_ids[child])
+    return graph
+
+
+def write_graph_file(graph, filename):
+    """
+    Write a graph in the format read by `read_graph_from_file`. Every edge of
+    an undirected graph is written once.
+
+    Parameters:
+    graph (Graph): The graph to write. Vertex ids must not contain commas or
+    parentheses.
+    filename (string): The path of the file to write.
+    """
+    is_directed = graph.is_directed()
+    weighted = isinstance(graph, WeightedGraph)
+    vertex_ids = graph.get_vertex_ids()
+    position = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+
+    with open(filename, 'w') as graph_file:
+        graph_file.write('D\n' if is_directed else 'G\n')
+        graph_file.write(','.join(str(vertex_id) for vertex_id in vertex_ids) + '\n')
+        for vertex_id in vertex_ids:
+            if weighted:
+                edges = graph.iter_neighbor_ids_with_weights(vertex_id)
+            else:
+                edges = ((neighbor_id, None) for neighbor_id in graph.iter_neighbor_ids(vertex_id))
+            for neighbor_id, weight in edges:
+                if not is_directed and position[neighbor_id] < position[vertex_id]:
+                    continue # written from the other end
+                if weighted:
+                    graph_file.write('({},{},{})\n'.format(vertex_id, neighbor_id, weight))
+                else:
+                    graph_file.write('({},{})\n'.format(vertex_id, neighbor_id))
+
+
+def _create_graph(num_vertices, is_directed, weighted):
+    """Create a graph of the right type with vertex ids '0'..'n-1'."""
+    graph = (WeightedGraph if weighted else Graph)(is_directed=is_directed)
+    vertex_ids = [str(i) for i in range(num_vertices)]
+    for vertex_id in vertex_ids:
+        graph.add_vertex(vertex_id)
+    return graph, vertex_ids
+
+
+def _edge_adder(graph, weighted, rng, weight_range):
+    """
+    Return a function adding an edge to `graph`, with a random weight drawn
+    from `rng` if the graph is weighted.
+    """
+    if not weighted:
+        return graph.add_edge
+    low, high = weight_range
+
+    def add_weighted_edge(vertex_id1, vertex_id2):
+        graph.add_edge(vertex_id1, vertex_id2, rng.randint(low, high))
+
+    return add_weighted_edge
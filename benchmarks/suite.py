@@ -0,0 +1,564 @@
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import generators
+from graphs.weighted_graph import WeightedGraph
+from util.file_reader import read_graph_from_file
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, it is only reported in the results
+    np = None
+
+# Bump when the layout of the results file changes
+RESULTS_FORMAT = 1
+
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 2024
+# A benchmark is reported as a regression when it is this much slower
+# (as a fraction) than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+# Average out-degree of the random graph families
+AVERAGE_DEGREE = 8
+# Coordinate distance between neighboring cells of the 'grid_road' family
+ROAD_SPACING = 10
+# How many queries the batch benchmarks answer
+NUM_BATCH_QUERIES = 32
+# How many edges are added before re-ranking in the warm PageRank benchmark
+NUM_PERTURBED_EDGES = 4
+# Attenuation factor of the Katz centrality benchmark, below 1 / (largest
+# eigenvalue) for every family at every default size
+KATZ_ALPHA = 0.01
+# How many paths the simple path benchmark generates
+NUM_SIMPLE_PATHS = 100
+
+
+# Graph families: name -> function(size, seed) building a graph with about
+# `size` vertices
+FAMILIES = {
+    'erdos_renyi': lambda size, seed: generators.erdos_renyi(
+        size, min(1.0, AVERAGE_DEGREE / max(1, size - 1)), is_directed=True, seed=seed
+    ),
+    'barabasi_albert': lambda size, seed: generators.barabasi_albert(
+        size, AVERAGE_DEGREE // 2, seed=seed
+    ),
+    'grid': lambda size, seed: generators.grid(
+        max(1, math.isqrt(size)), max(1, math.isqrt(size)), seed=seed
+    ),
+    'dag_layers': lambda size, seed: generators.dag_layers(
+        10, max(1, size // 10), min(1.0, AVERAGE_DEGREE / max(1, size // 10)), seed=seed
+    ),
+    'random_tree': lambda size, seed: generators.random_tree(size, seed=seed),
+    'erdos_renyi_weighted': lambda size, seed: generators.erdos_renyi(
+        size, min(1.0, AVERAGE_DEGREE / max(1, size - 1)), weighted=True, seed=seed
+    ),
+    'grid_weighted': lambda size, seed: generators.grid(
+        max(1, math.isqrt(size)), max(1, math.isqrt(size)), weighted=True, seed=seed
+    ),
+    # a road-like grid: weights are the cell spacing plus up to 20% detour,
+    # so the Manhattan distance between coordinates is a tight heuristic
+    'grid_road': lambda size, seed: generators.grid(
+        max(1, math.isqrt(size)), max(1, math.isqrt(size)), weighted=True, seed=seed,
+        weight_range=(ROAD_SPACING, ROAD_SPACING * 6 // 5), spacing=ROAD_SPACING
+    ),
+}
+
+GENERAL = ('erdos_renyi', 'barabasi_albert', 'grid')
+WEIGHTED = ('erdos_renyi_weighted', 'grid_weighted')
+
+
+class BenchmarkCase(object):
+    """
+    One generated graph that benchmarks run against, along with the inputs
+    they share: a start and target vertex, the edge list, and sample queries.
+    """
+
+    def __init__(self, family, size, seed, work_dir):
+        """
+        Generate the graph of `family` at `size`.
+
+        Parameters:
+        family (string): The name of the graph family, a key of FAMILIES.
+        size (integer): The requested number of vertices.
+        seed (integer): The random seed for the graph and the sample queries.
+        work_dir (string): A directory for any files the benchmarks need.
+        """
+        self.family = family
+        self.size = size
+        self.graph = FAMILIES[family](size, seed)
+        self.vertex_ids = self.graph.get_vertex_ids()
+        self.start_id = self.vertex_ids[0]
+        self.target_id = self.vertex_ids[-1]
+        self.edges = self.__collect_edges__()
+
+        rng = random.Random(seed)
+        self.query_pairs = [
+            (rng.choice(self.vertex_ids), rng.choice(self.vertex_ids))
+            for _ in range(NUM_BATCH_QUERIES)
+        ]
+        self.__work_dir = work_dir
+        self.__graph_file = None
+
+    def __collect_edges__(self):
+        """Return the edges as add_edge argument tuples, each edge once."""
+        graph = self.graph
+        weighted = isinstance(graph, WeightedGraph)
+        seen = set()
+        edges = []
+        for vertex_id in self.vertex_ids:
+            if weighted:
+                neighbors = graph.iter_neighbor_ids_with_weights(vertex_id)
+            else:
+                neighbors = ((neighbor_id,) for neighbor_id in graph.iter_neighbor_ids(vertex_id))
+            for neighbor in neighbors:
+                if not graph.is_directed():
+                    if neighbor[0] in seen:
+                        continue # added from the other end
+                edges.append((vertex_id,) + tuple(neighbor))
+            seen.add(vertex_id)
+        return edges
+
+    def get_num_edges(self):
+        """Return the number of edges, counting undirected edges once."""
+        return len(self.edges)
+
+    def get_graph_file(self):
+        """Write the graph to a file in the graph file format once, and return its path."""
+        if self.__graph_file is None:
+            self.__graph_file = os.path.join(
+                self.__work_dir, '{}_{}.txt'.format(self.family, self.size)
+            )
+            generators.write_graph_file(self.graph, self.__graph_file)
+        return self.__graph_file
+
+    def rebuild(self, bulk=False):
+        """
+        Build a fresh copy of the graph, one vertex and one edge at a time,
+        or with `bulk` through add_vertices and add_edges.
+        """
+        graph = type(self.graph)(is_directed=self.graph.is_directed())
+        if bulk:
+            graph.add_vertices(self.vertex_ids)
+            graph.add_edges(self.edges)
+            return graph
+        for vertex_id in self.vertex_ids:
+            graph.add_vertex(vertex_id)
+        for edge in self.edges:
+            graph.add_edge(*edge)
+        return graph
+
+
+class Benchmark(object):
+    """A timed operation, and the graph families it runs on."""
+
+    def __init__(self, name, families, function, setup=None, max_size=None):
+        """
+        Parameters:
+        name (string): The name results are reported under.
+        families (tuple<string>): The graph families to run on.
+        function (function): The operation, called with the argument `setup`
+        returns (by default the BenchmarkCase itself).
+        setup (function): Called once with the BenchmarkCase before timing.
+        max_size (integer): Skip sizes above this, for superlinear operations.
+        """
+        self.name = name
+        self.families = families
+        self.function = function
+        self.setup = setup
+        self.max_size = max_size
+
+
+def _consume(iterator):
+    """Run a generator to the end and return how many items it produced."""
+    return sum(1 for _ in iterator)
+
+
+def _cached_shortest_paths(case):
+    """Set up a copy of the graph with its query cache enabled and warm."""
+    graph = case.rebuild()
+    graph.enable_query_cache()
+    graph.find_shortest_path(case.start_id, case.target_id)
+    return (graph, case)
+
+
+def _perturbed_with_ranks(case):
+    """
+    Set up a copy of the graph with its PageRank computed, then a few edges
+    added, to time re-ranking from the previous ranks.
+    """
+    graph = case.rebuild(bulk=True)
+    ranks = graph.pagerank()
+    for start_id, target_id in case.query_pairs[:NUM_PERTURBED_EDGES]:
+        if start_id != target_id:
+            graph.add_edge(start_id, target_id)
+    return (graph, ranks)
+
+
+def _remove_and_restore_edges(graph_and_edges):
+    graph, edges = graph_and_edges
+    graph.remove_edges(edges)
+    graph.add_edges(edges)
+
+
+def _vertices_to_remove(case):
+    """
+    Set up a copy of the graph, every tenth vertex, and the edges touching
+    those vertices, which have to be put back after they are removed.
+    """
+    vertex_ids = case.vertex_ids[::10]
+    removed = set(vertex_ids)
+    edges = [edge for edge in case.edges if edge[0] in removed or edge[1] in removed]
+    return (case.rebuild(bulk=True), vertex_ids, edges)
+
+
+def _remove_and_restore_vertices(graph_vertices_and_edges):
+    graph, vertex_ids, edges = graph_vertices_and_edges
+    graph.remove_vertices(vertex_ids)
+    graph.add_vertices(vertex_ids)
+    graph.add_edges(edges)
+
+
+BENCHMARKS = [
+    # Graph
+    Benchmark('Graph.add_edge', GENERAL, lambda case: case.rebuild()),
+    Benchmark('Graph.add_edges', GENERAL, lambda case: case.rebuild(bulk=True)),
+    # removes half the edges and puts them back, so every timed run does the same work
+    Benchmark('Graph.remove_edges', GENERAL, _remove_and_restore_edges,
+        setup=lambda case: (case.rebuild(bulk=True), case.edges[::2])),
+    # removes every tenth vertex and puts it back, along with its edges
+    Benchmark('Graph.remove_vertices', GENERAL, _remove_and_restore_vertices,
+        setup=_vertices_to_remove),
+    Benchmark('Graph.get_vertices', GENERAL, lambda case: case.graph.get_vertices()),
+    Benchmark('Graph.get_vertex_ids', GENERAL, lambda case: case.graph.get_vertex_ids()),
+    Benchmark('Graph.get_neighbor_ids', GENERAL, lambda case: [
+        case.graph.get_neighbor_ids(vertex_id) for vertex_id in case.vertex_ids
+    ]),
+    Benchmark('Graph.contains_id', GENERAL, lambda case: [
+        case.graph.contains_id(vertex_id) for vertex_id in case.vertex_ids
+    ]),
+    Benchmark('Graph.get_predecessor_ids', GENERAL + ('dag_layers',), lambda case: [
+        case.graph.get_predecessor_ids(vertex_id) for vertex_id in case.vertex_ids
+    ]),
+    Benchmark('Graph.get_out_degree', GENERAL, lambda case: [
+        case.graph.get_out_degree(vertex_id) for vertex_id in case.vertex_ids
+    ]),
+    Benchmark('Graph.get_in_degree', GENERAL + ('dag_layers',), lambda case: [
+        case.graph.get_in_degree(vertex_id) for vertex_id in case.vertex_ids
+    ]),
+    Benchmark('Graph.get_sources', GENERAL + ('dag_layers',),
+        lambda case: case.graph.get_sources()),
+    Benchmark('Graph.get_sinks', GENERAL + ('dag_layers',),
+        lambda case: case.graph.get_sinks()),
+    Benchmark('Graph.freeze', GENERAL, lambda case: case.graph.freeze()),
+    Benchmark('Graph.bfs_traversal', GENERAL,
+        lambda case: case.graph.bfs_traversal(case.start_id)),
+    Benchmark('Graph.iter_bfs', GENERAL,
+        lambda case: _consume(case.graph.iter_bfs(case.start_id))),
+    Benchmark('Graph.iter_dfs', GENERAL,
+        lambda case: _consume(case.graph.iter_dfs(case.start_id))),
+    Benchmark('Graph.find_shortest_path', GENERAL,
+        lambda case: case.graph.find_shortest_path(case.start_id, case.target_id)),
+    Benchmark('Graph.find_shortest_path[bidirectional]', GENERAL,
+        lambda case: case.graph.find_shortest_path(
+            case.start_id, case.target_id, bidirectional=True
+        )),
+    Benchmark('Graph.find_shortest_path[cached]', GENERAL,
+        lambda graph_and_case: graph_and_case[0].find_shortest_path(
+            graph_and_case[1].start_id, graph_and_case[1].target_id
+        ), setup=_cached_shortest_paths),
+    Benchmark('Graph.batch_shortest_paths', GENERAL,
+        lambda case: dict(case.graph.batch_shortest_paths(case.query_pairs, workers=1))),
+    Benchmark('Graph.find_vertices_n_away', GENERAL,
+        lambda case: case.graph.find_vertices_n_away(case.start_id, 3)),
+    Benchmark('Graph.find_vertex_rings', GENERAL,
+        lambda case: case.graph.find_vertex_rings(case.start_id, 3)),
+    Benchmark('Graph.find_vertices_n_away_from_many', GENERAL,
+        lambda case: case.graph.find_vertices_n_away_from_many(
+            [start_id for start_id, _ in case.query_pairs], 2
+        )),
+    Benchmark('Graph.is_bipartite', GENERAL, lambda case: case.graph.is_bipartite()),
+    Benchmark('Graph.bipartition', GENERAL, lambda case: case.graph.bipartition()),
+    Benchmark('Graph.get_connected_components', GENERAL,
+        lambda case: case.graph.get_connected_components()),
+    Benchmark('Graph.get_connected_components[strongly]', ('erdos_renyi', 'dag_layers'),
+        lambda case: case.graph.get_connected_components(strongly=True)),
+    Benchmark('Graph.count_connected_components', GENERAL,
+        lambda case: case.graph.count_connected_components()),
+    Benchmark('Graph.are_connected', GENERAL, lambda case: [
+        case.graph.are_connected(start_id, target_id)
+        for start_id, target_id in case.query_pairs
+    ]),
+    Benchmark('Graph.find_path_dfs_iter', GENERAL + ('dag_layers', 'random_tree'),
+        lambda case: case.graph.find_path_dfs_iter(case.start_id, case.target_id)),
+    # iterative deepening revisits every shallower vertex once per depth, and
+    # only a tree keeps each depth-limited search linear
+    Benchmark('Graph.find_path_iddfs', ('random_tree',),
+        lambda case: case.graph.find_path_iddfs(case.start_id, case.target_id)),
+    Benchmark('Graph.iter_simple_paths[first {}]'.format(NUM_SIMPLE_PATHS),
+        GENERAL + ('dag_layers',), lambda case: _consume(itertools.islice(
+            case.graph.iter_simple_paths(case.start_id, case.target_id), NUM_SIMPLE_PATHS
+        ))),
+    Benchmark('Graph.contains_cycle', GENERAL + ('dag_layers',),
+        lambda case: case.graph.contains_cycle()),
+    Benchmark('Graph.find_cycle', GENERAL + ('dag_layers',),
+        lambda case: case.graph.find_cycle()),
+    Benchmark('Graph.topological_sort', ('dag_layers', 'random_tree'),
+        lambda case: case.graph.topological_sort()),
+    Benchmark('Graph.topological_levels', ('dag_layers', 'random_tree'),
+        lambda case: case.graph.topological_levels()),
+
+    Benchmark('Graph.pagerank', GENERAL, lambda case: case.graph.pagerank()),
+    Benchmark('Graph.pagerank[warm]', GENERAL,
+        lambda graph_and_ranks: graph_and_ranks[0].pagerank(start=graph_and_ranks[1]),
+        setup=_perturbed_with_ranks),
+    # the grid's spectral gap is too small for the power iteration to
+    # converge within the default iteration limit
+    Benchmark('Graph.eigenvector_centrality', ('erdos_renyi', 'barabasi_albert'),
+        lambda case: case.graph.eigenvector_centrality()),
+    Benchmark('Graph.katz_centrality', GENERAL,
+        lambda case: case.graph.katz_centrality(alpha=KATZ_ALPHA)),
+    Benchmark('Graph.betweenness_centrality', GENERAL,
+        lambda case: case.graph.betweenness_centrality(workers=1), max_size=1000),
+    Benchmark('Graph.betweenness_centrality[sampled]', GENERAL,
+        lambda case: case.graph.betweenness_centrality(
+            sample_size=NUM_BATCH_QUERIES, seed=DEFAULT_SEED, workers=1
+        )),
+
+    # WeightedGraph
+    Benchmark('WeightedGraph.add_edge', WEIGHTED, lambda case: case.rebuild()),
+    Benchmark('WeightedGraph.add_edges', WEIGHTED, lambda case: case.rebuild(bulk=True)),
+    Benchmark('WeightedGraph.get_neighbor_ids_with_weights', WEIGHTED, lambda case: [
+        case.graph.get_neighbor_ids_with_weights(vertex_id)
+        for vertex_id in case.vertex_ids
+    ]),
+    Benchmark('WeightedGraph.freeze', WEIGHTED, lambda case: case.graph.freeze()),
+    Benchmark('WeightedGraph.minimum_spanning_tree_kruskal', WEIGHTED,
+        lambda case: case.graph.minimum_spanning_tree_kruskal()),
+    Benchmark('WeightedGraph.minimum_spanning_tree_prim[lazy]', WEIGHTED,
+        lambda case: case.graph.minimum_spanning_tree_prim(lazy=True)),
+    Benchmark('WeightedGraph.minimum_spanning_tree_prim[indexed]', WEIGHTED,
+        lambda case: case.graph.minimum_spanning_tree_prim(lazy=False)),
+    Benchmark('WeightedGraph.dijkstra[pairs]', ('grid_road',), lambda case: [
+        case.graph.dijkstra(start_id, target_id) for start_id, target_id in case.query_pairs
+    ]),
+    Benchmark('WeightedGraph.astar[manhattan]', ('grid_road',), lambda case: [
+        case.graph.astar(start_id, target_id, 'manhattan')
+        for start_id, target_id in case.query_pairs
+    ]),
+    Benchmark('WeightedGraph.dijkstra', WEIGHTED,
+        lambda case: case.graph.dijkstra(case.start_id)),
+    Benchmark('WeightedGraph.find_shortest_path', WEIGHTED,
+        lambda case: case.graph.find_shortest_path(case.start_id, case.target_id)),
+    Benchmark('WeightedGraph.find_shortest_path_with_distance', WEIGHTED,
+        lambda case: case.graph.find_shortest_path_with_distance(
+            case.start_id, case.target_id
+        )),
+    Benchmark('WeightedGraph.find_all_distances', WEIGHTED,
+        lambda case: case.graph.find_all_distances(case.start_id)),
+    Benchmark('WeightedGraph.batch_shortest_paths', WEIGHTED,
+        lambda case: dict(case.graph.batch_shortest_paths(case.query_pairs, workers=1))),
+    Benchmark('WeightedGraph.betweenness_centrality[sampled]', WEIGHTED,
+        lambda case: case.graph.betweenness_centrality(
+            sample_size=NUM_BATCH_QUERIES, seed=DEFAULT_SEED, workers=1
+        )),
+    Benchmark('WeightedGraph.floyd_warshall', WEIGHTED,
+        lambda case: case.graph.floyd_warshall(), max_size=300),
+
+    # file loading
+    Benchmark('read_graph_from_file', ('erdos_renyi', 'erdos_renyi_weighted'),
+        read_graph_from_file, setup=lambda case: case.get_graph_file()),
+    Benchmark('read_graph_from_file[frozen]', ('erdos_renyi', 'erdos_renyi_weighted'),
+        lambda filename: read_graph_from_file(filename, frozen=True),
+        setup=lambda case: case.get_graph_file()),
+]
+
+
+def time_function(function, argument, repeat):
+    """
+    Call `function(argument)` `repeat` times.
+
+    Returns:
+    list<float>: The wall time of every call, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def measure_peak_memory(function, argument):
+    """
+    Call `function(argument)` once with tracemalloc running. This is kept
+    apart from the timed calls, since tracing slows allocation down.
+
+    Returns:
+    integer: The peak number of bytes allocated during the call.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    else:
+        # Python < 3.9 has no reset_peak, but restarting tracing clears the peak
+        tracemalloc.stop()
+        tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        function(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return max(0, peak - baseline)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED,
+    names=None, families=None, measure_memory=True, progress_callback=None):
+    """
+    Run the benchmark suite over a sweep of graph sizes.
+
+    Parameters:
+    sizes (iterable<integer>): The graph sizes (roughly, vertex counts).
+    repeat (integer): How many times each benchmark is timed.
+    seed (integer): The random seed for the generated graphs.
+    names (iterable<string>): If given, only run benchmarks whose name
+    contains one of these strings.
+    families (iterable<string>): If given, only use these graph families.
+    measure_memory (boolean): Whether to measure peak memory with tracemalloc.
+    progress_callback (function): If given, called with every result.
+
+    Returns:
+    dict: The results document, as written by `save_results`.
+    """
+    sizes = list(sizes)
+    benchmarks = [
+        benchmark for benchmark in BENCHMARKS
+        if names is None or any(name in benchmark.name for name in names)
+    ]
+    used_families = [
+        family for family in FAMILIES
+        if (families is None or family in families)
+        and any(family in benchmark.families for benchmark in benchmarks)
+    ]
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix='graph_benchmarks_')
+    try:
+        for size in sizes:
+            for family in used_families:
+                case = BenchmarkCase(family, size, seed, work_dir)
+                for benchmark in benchmarks:
+                    if family not in benchmark.families:
+                        continue
+                    if benchmark.max_size is not None and size > benchmark.max_size:
+                        continue
+
+                    argument = case if benchmark.setup is None else benchmark.setup(case)
+                    timings = time_function(benchmark.function, argument, repeat)
+                    result = {
+                        'benchmark': benchmark.name,
+                        'family': family,
+                        'size': size,
+                        'num_vertices': len(case.vertex_ids),
+                        'num_edges': case.get_num_edges(),
+                        'best_seconds': min(timings),
+                        'median_seconds': statistics.median(timings),
+                        'peak_memory_bytes': (
+                            measure_peak_memory(benchmark.function, argument)
+                            if measure_memory else None
+                        ),
+                    }
+                    results.append(result)
+                    if progress_callback is not None:
+                        progress_callback(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'format': RESULTS_FORMAT,
+        'environment': get_environment(),
+        'config': {'sizes': sizes, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+def get_environment():
+    """Return a description of the machine and interpreter the suite ran on."""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__ if np is not None else None,
+    }
+
+
+def result_key(result):
+    """Return the (benchmark, family, size) triple identifying a result."""
+    return (result['benchmark'], result['family'], result['size'])
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare a results document with a baseline one. Only benchmarks present
+    in both are compared, by their best time.
+
+    Parameters:
+    results (dict): The new results document.
+    baseline (dict): The baseline results document.
+    tolerance (float): How much slower (as a fraction) a benchmark may get
+    before it counts as a regression.
+
+    Returns:
+    list<dict>: For every common benchmark, its key fields, the baseline and
+    new best times, their ratio, and whether it regressed.
+    """
+    if baseline.get('format') != RESULTS_FORMAT:
+        raise ValueError("Unsupported baseline results format {!r}".format(baseline.get('format')))
+
+    key_to_baseline = {result_key(result): result for result in baseline['results']}
+    comparisons = []
+    for result in results['results']:
+        old = key_to_baseline.get(result_key(result))
+        if old is None:
+            continue
+        old_seconds = old['best_seconds']
+        new_seconds = result['best_seconds']
+        ratio = new_seconds / old_seconds if old_seconds > 0 else math.inf
+        comparisons.append({
+            'benchmark': result['benchmark'],
+            'family': result['family'],
+            'size': result['size'],
+            'baseline_seconds': old_seconds,
+            'best_seconds': new_seconds,
+            'ratio': ratio,
+            'regressed': ratio > 1 + tolerance,
+        })
+    return comparisons
+
+
+def save_results(results, filename):
+    """Write a results document to `filename` as JSON."""
+    with open(filename, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+        results_file.write('\n')
+
+
+def load_results(filename):
+    """Read a results document written by `save_results`."""
+    with open(filename) as results_file:
+        return json.load(results_file)
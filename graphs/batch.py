@@ -0,0 +1,162 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from graphs.instrumentation import AlgorithmStats, get_active_stats, measure, unmeasured
+
+# The graph searched by a worker process. It is only ever set inside the
+# workers, by the pool initializer, so pools running at the same time (e.g.
+# from different threads) each keep their own graph.
+_worker_graph = None
+
+
+def _init_worker(graph):
+    """Store the graph sent to this worker process by its pool."""
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _run_task(task, chunk, args, measured):
+    """
+    Run `task` on a chunk against the worker's graph.
+
+    Returns:
+    (object, dict): The result, and if `measured`, the counters of the work
+    it did (see AlgorithmStats.to_dict), else None.
+    """
+    if not measured:
+        return task(_worker_graph, chunk, *args), None
+    stats = AlgorithmStats(task.__name__)
+    result = measure(_worker_graph, stats, task, _worker_graph, chunk, *args)
+    return result, stats.to_dict()
+
+
+def _search_sources_in(graph, sources):
+    """
+    Run the single-source shortest path searches for a chunk of
+    (start id, target ids) pairs.
+
+    Returns:
+    list<((string, string), object)>: The result for every pair.
+    """
+    results = []
+    for start_id, target_ids in sources:
+        target_to_result = graph.__shortest_paths_from__(start_id, target_ids)
+        for target_id in target_ids:
+            results.append(((start_id, target_id), target_to_result[target_id]))
+    return results
+
+
+def _dependencies_in(graph, source_ids, weighted):
+    """
+    Sum the Brandes dependencies of every vertex on the shortest paths from
+    a chunk of source vertices.
+
+    Returns:
+    dict: A map of vertex id -> summed dependency, for the vertices that
+    have any.
+    """
+    return graph.__dependencies_from__(source_ids, weighted)
+
+
+def run_batch_searches(graph, sources, workers=None, chunk_size=16):
+    """
+    Run one single-source shortest path search per start vertex, spread over
+    a process pool, and stream the results back as each chunk finishes.
+
+    Arguments:
+    graph (Graph): The graph to search.
+    sources (list<(string, list<string>)>): Each start id with its target ids.
+    workers (integer): The number of worker processes, by default one per
+    CPU. With 1 worker the searches run in this process.
+    chunk_size (integer): How many start vertices each task handles.
+
+    Returns:
+    generator: ((start_id, target_id), result) pairs.
+    """
+    chunks = _split(sources, chunk_size)
+    for results in _run_chunks(graph, _search_sources_in, chunks, workers):
+        yield from results
+
+
+def run_betweenness(graph, source_ids, weighted=True, workers=None, chunk_size=None):
+    """
+    Sum the Brandes dependencies over shortest paths from each source vertex,
+    spread over a process pool. Every task returns one partial dependency
+    map for its chunk of sources, and the maps are added up as they arrive.
+
+    Arguments:
+    graph (Graph): The graph to search.
+    source_ids (list<string>): The source vertex ids.
+    weighted (boolean): Whether to use edge weights, if the graph has any.
+    workers (integer): The number of worker processes, by default one per
+    CPU. With 1 worker the searches run in this process.
+    chunk_size (integer): How many sources each task handles, by default
+    enough for about four tasks per worker; each task sends back a map the
+    size of the graph, so small chunks cost more to merge.
+
+    Returns:
+    dict: A map of vertex id -> summed dependency, for every vertex.
+    """
+    workers = _count_workers(workers)
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(source_ids) // (workers * 4)))
+    betweenness = dict.fromkeys(graph.get_vertex_ids(), 0.0)
+    chunks = _split(source_ids, chunk_size)
+    for dependencies in _run_chunks(graph, _dependencies_in, chunks, workers, weighted):
+        for vertex_id, dependency in dependencies.items():
+            betweenness[vertex_id] += dependency
+    return betweenness
+
+
+def _count_workers(workers):
+    """Return the number of workers to use, by default one per CPU."""
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _split(items, chunk_size):
+    """Split a list into chunks of at most `chunk_size` items."""
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def _run_chunks(graph, task, chunks, workers, *args):
+    """
+    Run `task(graph, chunk, *args)` for every chunk, in this process or over
+    a process pool, and generate the results as they finish.
+    """
+    workers = _count_workers(workers)
+    if workers <= 1 or len(chunks) <= 1:
+        return _run_serial(graph, task, chunks, args)
+    return _run_parallel(graph, task, chunks, args, min(workers, len(chunks)))
+
+
+def _run_serial(graph, task, chunks, args):
+    for chunk in chunks:
+        yield task(graph, chunk, *args)
+
+
+def _run_parallel(graph, task, chunks, args, workers):
+    # an instrumented call on `graph` gets the counts of the workers' lookups,
+    # but not those of making the copy they search
+    stats = get_active_stats(graph)
+    frozen = unmeasured(graph.freeze)
+    # the pool uses the platform's default start method, and every worker
+    # gets the frozen copy once; it is a few flat arrays, so it pickles cheaply
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(frozen,)
+    ) as executor:
+        futures = [
+            executor.submit(_run_task, task, chunk, args, stats is not None)
+            for chunk in chunks
+        ]
+        try:
+            for future in as_completed(futures):
+                result, counts = future.result()
+                if counts is not None:
+                    stats.merge(counts)
+                yield result
+        finally:
+            # if the caller stops early, don't run the remaining chunks
+            for future in futures:
+                future.cancel()
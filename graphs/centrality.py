@@ -0,0 +1,310 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, plain lists are used without it
+    np = None
+
+DEFAULT_TOLERANCE = 1e-6
+DEFAULT_MAX_ITERATIONS = 100
+
+
+class ConvergenceError(ValueError):
+    """
+    Raised when a power iteration doesn't converge within its iteration limit.
+    """
+
+    def __init__(self, algorithm, max_iterations):
+        """
+        Parameters:
+        algorithm (string): The name of the algorithm that was run.
+        max_iterations (integer): The iteration limit that was reached.
+        """
+        super().__init__(
+            "{} did not converge in {} iterations".format(algorithm, max_iterations)
+        )
+        self.max_iterations = max_iterations
+
+
+class _EdgeMatrix(object):
+    """
+    The adjacency matrix of a frozen graph, stored as its CSR arrays with one
+    value per edge (the weight, or 1), and multiplied transposed: each vertex
+    passes its score along its outgoing edges.
+    """
+
+    def __init__(self, graph, weighted):
+        """
+        Parameters:
+        graph (CSRGraph): The frozen graph.
+        weighted (boolean): Whether to use the graph's edge weights, if it
+        has any.
+        """
+        weights = graph.get_weights() if weighted else None
+        self.size = len(graph.get_offsets()) - 1
+        if np is not None:
+            offsets, targets = graph.as_numpy()[:2]
+            # the source of every edge, so a product is one scatter-add
+            self.__sources = np.repeat(np.arange(self.size), np.diff(offsets))
+            self.__targets = targets
+            if weights is None:
+                self.__values = np.ones(len(targets))
+            else:
+                self.__values = np.array(weights, dtype=float)
+        else:
+            offsets, targets = graph.get_offsets(), graph.get_targets()
+            self.__rows = [
+                (targets[offsets[i]:offsets[i + 1]],
+                 list(weights[offsets[i]:offsets[i + 1]]) if weights is not None
+                 else [1.0] * (offsets[i + 1] - offsets[i]))
+                for i in range(self.size)
+            ]
+
+    def has_negative_values(self):
+        """Return True if any edge has a negative weight."""
+        if np is not None:
+            return bool((self.__values < 0).any())
+        return any(value < 0 for _, values in self.__rows for value in values)
+
+    def row_sums(self):
+        """Return the total weight of each vertex's outgoing edges."""
+        if np is not None:
+            return np.bincount(self.__sources, weights=self.__values, minlength=self.size)
+        return [float(sum(values)) for _, values in self.__rows]
+
+    def divide_rows(self, divisors):
+        """Divide the values of each vertex's outgoing edges by its entry in `divisors`."""
+        if np is not None:
+            self.__values = self.__values / divisors[self.__sources]
+        else:
+            self.__rows = [
+                (targets, [value / divisor for value in values])
+                for (targets, values), divisor in zip(self.__rows, divisors)
+            ]
+
+    def multiply(self, vector):
+        """Return the product of the transposed matrix and `vector`."""
+        if np is not None:
+            return np.bincount(
+                self.__targets, weights=self.__values * vector[self.__sources],
+                minlength=self.size
+            )
+        result = [0.0] * self.size
+        for (targets, values), score in zip(self.__rows, vector):
+            if score:
+                for target, value in zip(targets, values):
+                    result[target] += score * value
+        return result
+
+
+def compute_pagerank(graph, damping=0.85, personalization=None, dangling=None,
+    start=None, tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS,
+    weighted=True):
+    """
+    Compute the PageRank of every vertex of a frozen graph by power iteration.
+    See Graph.pagerank for the parameters.
+
+    Returns:
+    dict: A map of vertex id -> PageRank; the ranks sum to 1.
+    """
+    if not 0 <= damping <= 1:
+        raise ValueError("damping must be between 0 and 1")
+    vertex_ids = graph.get_vertex_ids()
+    if not vertex_ids:
+        return {}
+    matrix = _EdgeMatrix(graph, weighted)
+    if matrix.has_negative_values():
+        raise ValueError("PageRank requires non-negative weights.")
+
+    # each vertex passes its rank on in proportion to its edge weights;
+    # vertices with no outgoing weight spread theirs by `dangling` instead
+    out_weights = matrix.row_sums()
+    if np is not None:
+        dangling_indices = np.flatnonzero(out_weights == 0)
+        matrix.divide_rows(np.where(out_weights == 0, 1.0, out_weights))
+    else:
+        dangling_indices = [i for i, weight in enumerate(out_weights) if weight == 0]
+        matrix.divide_rows([weight or 1.0 for weight in out_weights])
+
+    teleport = _to_vector(vertex_ids, personalization, 'personalization')
+    dangling_share = (
+        teleport if dangling is None else _to_vector(vertex_ids, dangling, 'dangling')
+    )
+    scores = _to_vector(vertex_ids, start, 'start', default=None)
+
+    for _ in range(max_iterations):
+        spread = matrix.multiply(scores)
+        if np is not None:
+            dangling_rank = damping * float(scores[dangling_indices].sum())
+            next_scores = (
+                damping * spread + dangling_rank * dangling_share + (1 - damping) * teleport
+            )
+        else:
+            dangling_rank = damping * sum(scores[i] for i in dangling_indices)
+            next_scores = [
+                damping * rank + dangling_rank * share + (1 - damping) * jump
+                for rank, share, jump in zip(spread, dangling_share, teleport)
+            ]
+        if _distance(next_scores, scores) < len(vertex_ids) * tolerance:
+            return _to_dict(vertex_ids, next_scores)
+        scores = next_scores
+    raise ConvergenceError('pagerank', max_iterations)
+
+
+def compute_eigenvector_centrality(graph, start=None, tolerance=DEFAULT_TOLERANCE,
+    max_iterations=DEFAULT_MAX_ITERATIONS, weighted=True):
+    """
+    Compute the eigenvector centrality of every vertex of a frozen graph by
+    power iteration. See Graph.eigenvector_centrality for the parameters.
+
+    Returns:
+    dict: A map of vertex id -> centrality, scaled to a Euclidean norm of 1.
+    """
+    vertex_ids = graph.get_vertex_ids()
+    if not vertex_ids:
+        return {}
+    matrix = _EdgeMatrix(graph, weighted)
+    scores = _to_vector(vertex_ids, start, 'start', default=None)
+
+    for _ in range(max_iterations):
+        # iterating with A + I rather than A has the same eigenvectors, but
+        # doesn't oscillate forever on bipartite graphs
+        spread = matrix.multiply(scores)
+        if np is not None:
+            next_scores = scores + spread
+        else:
+            next_scores = [score + rank for score, rank in zip(scores, spread)]
+        next_scores = _normalize(next_scores)
+        if next_scores is None:
+            raise ValueError("Eigenvector centrality is undefined for this graph.")
+        if _distance(next_scores, scores) < len(vertex_ids) * tolerance:
+            return _to_dict(vertex_ids, next_scores)
+        scores = next_scores
+    raise ConvergenceError('eigenvector_centrality', max_iterations)
+
+
+def compute_katz_centrality(graph, alpha=0.1, beta=1.0, start=None,
+    tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS,
+    normalized=True, weighted=True):
+    """
+    Compute the Katz centrality of every vertex of a frozen graph by
+    iterating x = alpha * A^T x + beta. See Graph.katz_centrality for the
+    parameters.
+
+    Returns:
+    dict: A map of vertex id -> centrality, scaled to a Euclidean norm of 1
+    if `normalized`.
+    """
+    vertex_ids = graph.get_vertex_ids()
+    if not vertex_ids:
+        return {}
+    matrix = _EdgeMatrix(graph, weighted)
+    if not isinstance(beta, dict):
+        beta = dict.fromkeys(vertex_ids, beta)
+    bias = _to_vector(vertex_ids, beta, 'beta', normalize=False)
+
+    if start is None:
+        scores = bias # the first step from all zeros
+    else:
+        scores = _fit_katz_start(
+            matrix, alpha, bias,
+            _to_vector(vertex_ids, start, 'start', default=None, normalize=False)
+        )
+
+    for _ in range(max_iterations):
+        spread = matrix.multiply(scores)
+        if np is not None:
+            next_scores = alpha * spread + bias
+        else:
+            next_scores = [alpha * rank + base for rank, base in zip(spread, bias)]
+        if _distance(next_scores, scores) < len(vertex_ids) * tolerance:
+            if normalized:
+                next_scores = _normalize(next_scores)
+                if next_scores is None:
+                    raise ValueError("Katz centrality is zero for every vertex.")
+            return _to_dict(vertex_ids, next_scores)
+        scores = next_scores
+    raise ConvergenceError('katz_centrality', max_iterations)
+
+
+def _fit_katz_start(matrix, alpha, bias, start):
+    """
+    Rescale a start vector for the Katz iteration. A previous result was
+    normalized, so its scale is lost: pick the factor c for which c * start
+    is closest to a fixed point, minimizing |c * (start - alpha * A^T start) - bias|.
+    """
+    spread = matrix.multiply(start)
+    if np is not None:
+        residual = start - alpha * spread
+        squared_norm = float(np.dot(residual, residual))
+        projection = float(np.dot(residual, bias))
+    else:
+        residual = [score - alpha * rank for score, rank in zip(start, spread)]
+        squared_norm = sum(value * value for value in residual)
+        projection = sum(value * base for value, base in zip(residual, bias))
+    if squared_norm == 0:
+        return start
+    if np is not None:
+        return (projection / squared_norm) * start
+    return [projection / squared_norm * score for score in start]
+
+
+def _to_vector(vertex_ids, values, name, default=0.0, normalize=True):
+    """
+    Convert a map of vertex id -> value into a vector in dense index order.
+
+    Parameters:
+    vertex_ids (list<string>): The vertex ids, in dense index order.
+    values (dict): The values by vertex id, or None for the same value for
+    every vertex.
+    name (string): The name of the parameter, for error messages.
+    default (number): The value of ids missing from `values`. None means the
+    mean of the given values, and also ignores ids that are not in the graph,
+    so a previous result works as a start after vertices are added or removed.
+    normalize (boolean): Whether to scale the vector to sum to 1.
+    """
+    num_vertices = len(vertex_ids)
+    if values is None:
+        vector = [1.0 / num_vertices] * num_vertices
+    else:
+        if default is None:
+            default = sum(values.values()) / len(values) if values else 1.0
+        else:
+            known_ids = set(vertex_ids)
+            if not all(vertex_id in known_ids for vertex_id in values):
+                raise KeyError("One or more vertices are not in the graph!")
+        vector = [float(values.get(vertex_id, default)) for vertex_id in vertex_ids]
+        if any(value < 0 for value in vector):
+            raise ValueError("{} values must not be negative".format(name))
+
+    if normalize:
+        total = sum(vector)
+        if total == 0:
+            raise ValueError("{} values must not all be zero".format(name))
+        vector = [value / total for value in vector]
+    return np.array(vector) if np is not None else vector
+
+
+def _normalize(vector):
+    """Scale a vector to a Euclidean norm of 1, or return None if it is all zero."""
+    if np is not None:
+        norm = float(np.sqrt(np.dot(vector, vector)))
+    else:
+        norm = sum(value * value for value in vector) ** 0.5
+    if norm == 0:
+        return None
+    if np is not None:
+        return vector / norm
+    return [value / norm for value in vector]
+
+
+def _distance(vector1, vector2):
+    """Return the L1 distance between two vectors."""
+    if np is not None:
+        return float(np.abs(vector1 - vector2).sum())
+    return sum(abs(value1 - value2) for value1, value2 in zip(vector1, vector2))
+
+
+def _to_dict(vertex_ids, vector):
+    """Convert a vector in dense index order into a map of vertex id -> value."""
+    if np is not None:
+        vector = vector.tolist()
+    return dict(zip(vertex_ids, vector))
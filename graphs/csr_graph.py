@@ -0,0 +1,467 @@
+from array import array
+
+from graphs.graph import Graph
+from graphs.instrumentation import ACTIVE_STATS, count_lookup
+from graphs.weighted_graph import WeightedGraph
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the array buffers work without it
+    np = None
+
+
+def get_buffer_format(buffer):
+    """
+    Return the item format ('q' or 'd') of a CSR buffer, which may be an array
+    or a memoryview (e.g. over a memory-mapped snapshot).
+    """
+    if isinstance(buffer, memoryview):
+        return buffer.format
+    return buffer.typecode
+
+
+def to_array(buffer):
+    """
+    Return a CSR buffer as an array, copying it if it is a memoryview (which,
+    unlike an array, can't be pickled).
+    """
+    if not isinstance(buffer, memoryview):
+        return buffer
+    copy = array(buffer.format)
+    copy.frombytes(buffer.cast('B'))
+    return copy
+
+
+class CSRVertex(object):
+    """
+    A lightweight, read-only view of a single vertex stored in a CSRGraph.
+    """
+
+    __slots__ = ('__graph', '__index')
+
+    def __init__(self, graph, index):
+        """
+        Initialize a view of the vertex at dense index `index`.
+
+        Parameters:
+        graph (CSRGraph): The graph holding the vertex.
+        index (integer): The dense index of the vertex in the graph.
+        """
+        self.__graph = graph
+        self.__index = index
+
+    def __str__(self):
+        """Output the list of neighbors of this vertex."""
+        neighbor_ids = list(self.iter_neighbor_ids())
+        return f'{self.get_id()} adjacent to {neighbor_ids}'
+
+    def __repr__(self):
+        """Output the list of neighbors of this vertex."""
+        return self.__str__()
+
+    def __eq__(self, other):
+        """Two views are equal if they point at the same vertex."""
+        return (
+            isinstance(other, CSRVertex)
+            and self.__graph is other.__graph
+            and self.__index == other.__index
+        )
+
+    def __hash__(self):
+        return hash((id(self.__graph), self.__index))
+
+    def get_neighbors(self):
+        """Return the neighbors of this vertex."""
+        graph = self.__graph
+        return [
+            graph.get_vertex_at(neighbor_index)
+            for neighbor_index in graph.get_neighbor_indices(self.__index)
+        ]
+
+    def iter_neighbors(self):
+        """Return an iterator over views of the neighbors of this vertex."""
+        return map(self.__graph.get_vertex_at, self.__graph.get_neighbor_indices(self.__index))
+
+    def iter_neighbor_ids(self):
+        """Return an iterator over the ids of this vertex's neighbors."""
+        return map(self.__graph.get_vertex_id, self.__graph.get_neighbor_indices(self.__index))
+
+    def get_id(self):
+        """Return the id of this vertex."""
+        return self.__graph.get_vertex_id(self.__index)
+
+    def get_index(self):
+        """Return the dense integer index of this vertex."""
+        return self.__index
+
+    def get_graph(self):
+        """Return the graph this vertex belongs to."""
+        return self.__graph
+
+
+class WeightedCSRVertex(CSRVertex):
+    """
+    A lightweight, read-only view of a single vertex stored in a
+    WeightedCSRGraph.
+    """
+
+    __slots__ = ()
+
+    def get_neighbors_with_weights(self):
+        """Return the neighbors of this vertex along with the edge weights."""
+        graph = self.get_graph()
+        index = self.get_index()
+        return [
+            (graph.get_vertex_at(neighbor_index), weight)
+            for neighbor_index, weight in zip(
+                graph.get_neighbor_indices(index),
+                graph.get_neighbor_weights(index)
+            )
+        ]
+
+    def iter_neighbor_ids_with_weights(self):
+        """Return an iterator over (neighbor id, weight) pairs of this vertex."""
+        return self.get_graph().iter_neighbor_ids_with_weights(self.get_id())
+
+
+class CSRGraph(Graph):
+    """ CSRGraph Class
+    A frozen graph stored in compressed sparse row form. Vertex ids are
+    interned to dense integers 0..V-1; the neighbors of vertex `i` are
+    `targets[offsets[i]:offsets[i + 1]]`.
+
+    Build one with `Graph.freeze()` rather than calling the constructor.
+    """
+
+    VERTEX_CLASS = CSRVertex
+
+    def __init__(self, vertex_ids, offsets, targets, is_directed=True):
+        """
+        Initialize a frozen graph from its CSR arrays.
+
+        Parameters:
+        vertex_ids (list<string>): The vertex ids, in dense index order.
+        offsets (array<int>): V + 1 offsets into `targets`.
+        targets (array<int>): The dense index of every edge's target vertex.
+        is_directed (boolean): Whether the graph is directed.
+
+        The arrays may be any indexable int64 buffers, such as array('q')
+        objects or memoryviews over a memory-mapped file.
+        """
+        super().__init__(is_directed)
+        if len(offsets) != len(vertex_ids) + 1:
+            raise ValueError("offsets must contain one entry per vertex plus one")
+        self.__ids = list(vertex_ids)
+        self.__index = {vertex_id: i for i, vertex_id in enumerate(self.__ids)}
+        self.__offsets = offsets
+        self.__targets = targets
+        # slicing a memoryview shares the buffer, slicing an array copies it
+        self.__targets_view = memoryview(targets)
+        self.__reverse = None # (offsets, sources) of the reversed graph, built on first use
+
+    def __getstate__(self):
+        """
+        Pickle the CSR buffers as arrays, since memoryviews (such as those of a
+        memory-mapped snapshot) can't be pickled. The views slicing them are
+        rebuilt on load.
+        """
+        state = self.__dict__.copy()
+        del state['_CSRGraph__targets_view']
+        state['_CSRGraph__offsets'] = to_array(self.__offsets)
+        state['_CSRGraph__targets'] = to_array(self.__targets)
+        if self.__reverse is not None:
+            state['_CSRGraph__reverse'] = tuple(map(to_array, self.__reverse))
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__targets_view = memoryview(self.__targets)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Build a frozen CSR copy of `graph`, preserving vertex and neighbor order.
+
+        Parameters:
+        graph (Graph): The graph to copy.
+
+        Returns:
+        CSRGraph: The frozen copy.
+        """
+        vertex_ids = graph.get_vertex_ids()
+        index = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+        offsets = array('q', [0])
+        targets = array('q')
+        for vertex_id in vertex_ids:
+            targets.extend(
+                index[neighbor_id]
+                for neighbor_id in graph.iter_neighbor_ids(vertex_id)
+            )
+            offsets.append(len(targets))
+        frozen = cls(vertex_ids, offsets, targets, is_directed=graph.is_directed())
+        return frozen.__copy_attributes__(graph)
+
+    def add_vertex(self, vertex_id):
+        raise TypeError("CSRGraph is frozen and cannot be modified.")
+
+    def add_edge(self, vertex_id1, vertex_id2, *args):
+        raise TypeError("CSRGraph is frozen and cannot be modified.")
+
+    def add_vertices(self, vertex_ids):
+        raise TypeError("CSRGraph is frozen and cannot be modified.")
+
+    def add_edges(self, edges):
+        raise TypeError("CSRGraph is frozen and cannot be modified.")
+
+    def remove_edges(self, edges):
+        raise TypeError("CSRGraph is frozen and cannot be modified.")
+
+    def remove_vertices(self, vertex_ids):
+        raise TypeError("CSRGraph is frozen and cannot be modified.")
+
+    def set_vertex_attributes(self, vertex_id, **attributes):
+        raise TypeError("CSRGraph is frozen and cannot be modified.")
+
+    def __copy_attributes__(self, graph):
+        """Copy the vertex attributes of `graph` into this frozen copy."""
+        for vertex_id in self.get_vertex_ids():
+            attributes = graph.get_vertex_attributes(vertex_id)
+            if attributes:
+                Graph.set_vertex_attributes(self, vertex_id, **attributes)
+        return self
+
+    def freeze(self):
+        """Return this graph, which is already frozen."""
+        return self
+
+    def get_vertex(self, vertex_id):
+        """Return a view of the vertex if it exists."""
+        if vertex_id not in self.__index:
+            return None
+        return self.VERTEX_CLASS(self, self.__index[vertex_id])
+
+    def get_vertex_at(self, index):
+        """Return a view of the vertex at dense index `index`."""
+        return self.VERTEX_CLASS(self, index)
+
+    def get_vertices(self):
+        """
+        Return views of all vertices in the graph.
+
+        Returns:
+        List<CSRVertex>: The vertex views, in dense index order.
+        """
+        return [self.VERTEX_CLASS(self, i) for i in range(len(self.__ids))]
+
+    def get_vertex_ids(self):
+        """Return the ids of all vertices in the graph, in dense index order."""
+        return list(self.__ids)
+
+    def get_vertex_id(self, index):
+        """Return the id of the vertex at dense index `index`."""
+        return self.__ids[index]
+
+    def get_index(self, vertex_id):
+        """Return the dense index of the vertex with id `vertex_id`."""
+        return self.__index[vertex_id]
+
+    def get_neighbor_indices(self, index):
+        """Return the dense indices of the neighbors of vertex `index`, as a zero-copy view."""
+        return self.__targets_view[self.__offsets[index]:self.__offsets[index + 1]]
+
+    def iter_neighbor_ids(self, vertex_id):
+        """Return an iterator over the ids of the neighbors of the vertex with id `vertex_id`."""
+        neighbor_ids = map(
+            self.__ids.__getitem__,
+            self.get_neighbor_indices(self.__index[vertex_id])
+        )
+        if ACTIVE_STATS.get() is not None:
+            return count_lookup(self, neighbor_ids)
+        return neighbor_ids
+
+    def __reverse_csr__(self):
+        """
+        Return the offsets and source indices of the reversed graph, building
+        them with a counting sort over the targets the first time.
+        """
+        if self.__reverse is None:
+            if not self.is_directed():
+                self.__reverse = (self.__offsets, self.__targets)
+                return self.__reverse
+            num_vertices = len(self.__ids)
+            reverse_offsets = array('q', bytes(8 * (num_vertices + 1)))
+            for target in self.__targets:
+                reverse_offsets[target + 1] += 1
+            for i in range(num_vertices):
+                reverse_offsets[i + 1] += reverse_offsets[i]
+            position = array('q', reverse_offsets[:-1])
+            sources = array('q', bytes(8 * len(self.__targets)))
+            offsets = self.__offsets
+            for source in range(num_vertices):
+                for edge in range(offsets[source], offsets[source + 1]):
+                    target = self.__targets[edge]
+                    sources[position[target]] = source
+                    position[target] += 1
+            self.__reverse = (reverse_offsets, sources)
+        return self.__reverse
+
+    def iter_predecessor_ids(self, vertex_id):
+        """Return an iterator over the ids of the vertices with an edge to `vertex_id`."""
+        index = self.__index[vertex_id]
+        reverse_offsets, sources = self.__reverse_csr__()
+        predecessor_ids = map(
+            self.__ids.__getitem__, sources[reverse_offsets[index]:reverse_offsets[index + 1]]
+        )
+        if ACTIVE_STATS.get() is not None:
+            return count_lookup(self, predecessor_ids)
+        return predecessor_ids
+
+    def get_out_degree(self, vertex_id):
+        """Return the number of edges leaving the vertex with id `vertex_id`."""
+        index = self.__index[vertex_id]
+        return self.__offsets[index + 1] - self.__offsets[index]
+
+    def get_in_degree(self, vertex_id):
+        """Return the number of edges entering the vertex with id `vertex_id`."""
+        index = self.__index[vertex_id]
+        reverse_offsets, _ = self.__reverse_csr__()
+        return reverse_offsets[index + 1] - reverse_offsets[index]
+
+    def get_sources(self):
+        """Return the ids of the vertices with no incoming edges, in dense index order."""
+        return [vertex_id for vertex_id in self.__ids if self.get_in_degree(vertex_id) == 0]
+
+    def get_sinks(self):
+        """Return the ids of the vertices with no outgoing edges, in dense index order."""
+        return [vertex_id for vertex_id in self.__ids if self.get_out_degree(vertex_id) == 0]
+
+    def contains_id(self, vertex_id):
+        return vertex_id in self.__index
+
+    def get_offsets(self):
+        """Return the CSR offsets array (V + 1 entries)."""
+        return self.__offsets
+
+    def get_targets(self):
+        """Return the CSR targets array (one entry per stored edge)."""
+        return self.__targets
+
+    def get_weights(self):
+        """Return None, since the graph has no edge weights."""
+        return None
+
+    def num_edges(self):
+        """Return the number of stored (directed) edges."""
+        return len(self.__targets)
+
+    def as_numpy(self):
+        """
+        Return zero-copy NumPy views of the offsets and targets arrays.
+
+        Returns:
+        (ndarray, ndarray): The offsets and targets arrays.
+        """
+        if np is None:
+            raise ImportError("NumPy is required for as_numpy().")
+        return (
+            np.frombuffer(self.__offsets, dtype=np.int64),
+            np.frombuffer(self.__targets, dtype=np.int64)
+        )
+
+
+class WeightedCSRGraph(CSRGraph, WeightedGraph):
+    """ WeightedCSRGraph Class
+    A frozen weighted graph stored in compressed sparse row form, with the
+    weight of edge `e` stored at `weights[e]`.
+    """
+
+    VERTEX_CLASS = WeightedCSRVertex
+
+    def __init__(self, vertex_ids, offsets, targets, weights, is_directed=True):
+        """
+        Initialize a frozen weighted graph from its CSR arrays.
+
+        Parameters:
+        vertex_ids (list<string>): The vertex ids, in dense index order.
+        offsets (array<int>): V + 1 offsets into `targets`.
+        targets (array<int>): The dense index of every edge's target vertex.
+        weights (array<number>): The weight of every edge, aligned with `targets`.
+        is_directed (boolean): Whether the graph is directed.
+        """
+        super().__init__(vertex_ids, offsets, targets, is_directed=is_directed)
+        if len(weights) != len(targets):
+            raise ValueError("weights must contain one entry per edge")
+        self.__weights = weights
+        self.__weights_view = memoryview(weights)
+
+    def __getstate__(self):
+        """Pickle the CSR buffers as arrays; see CSRGraph.__getstate__."""
+        state = super().__getstate__()
+        del state['_WeightedCSRGraph__weights_view']
+        state['_WeightedCSRGraph__weights'] = to_array(self.__weights)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.__weights_view = memoryview(self.__weights)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Build a frozen CSR copy of the weighted graph `graph`. Integer weights
+        are stored as 64-bit ints, anything else as doubles.
+
+        Parameters:
+        graph (WeightedGraph): The graph to copy.
+
+        Returns:
+        WeightedCSRGraph: The frozen copy.
+        """
+        vertex_ids = graph.get_vertex_ids()
+        index = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+        offsets = array('q', [0])
+        targets = array('q')
+        weight_list = []
+        for vertex_id in vertex_ids:
+            for neighbor_id, weight in graph.iter_neighbor_ids_with_weights(vertex_id):
+                targets.append(index[neighbor_id])
+                weight_list.append(weight)
+            offsets.append(len(targets))
+        all_ints = all(
+            isinstance(weight, int) and not isinstance(weight, bool)
+            for weight in weight_list
+        )
+        weights = array('q' if all_ints else 'd', weight_list)
+        frozen = cls(vertex_ids, offsets, targets, weights, is_directed=graph.is_directed())
+        return frozen.__copy_attributes__(graph)
+
+    def get_neighbor_weights(self, index):
+        """Return the weights of the edges leaving vertex `index`, as a zero-copy view."""
+        offsets = self.get_offsets()
+        return self.__weights_view[offsets[index]:offsets[index + 1]]
+
+    def iter_neighbor_ids_with_weights(self, vertex_id):
+        """Return an iterator over (neighbor id, weight) pairs for the vertex with id `vertex_id`."""
+        index = self.get_index(vertex_id)
+        neighbors = zip(
+            map(self.get_vertex_id, self.get_neighbor_indices(index)),
+            self.get_neighbor_weights(index)
+        )
+        if ACTIVE_STATS.get() is not None:
+            return count_lookup(self, neighbors)
+        return neighbors
+
+    def get_weights(self):
+        """Return the CSR weights array (aligned with the targets array)."""
+        return self.__weights
+
+    def as_numpy(self):
+        """
+        Return zero-copy NumPy views of the offsets, targets and weights arrays.
+
+        Returns:
+        (ndarray, ndarray, ndarray): The offsets, targets and weights arrays.
+        """
+        offsets, targets = super().as_numpy()
+        dtype = np.dtype(get_buffer_format(self.__weights))
+        return offsets, targets, np.frombuffer(self.__weights, dtype=dtype)
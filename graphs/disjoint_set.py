@@ -0,0 +1,186 @@
+class DisjointSet(object):
+    """
+    A union-find structure over the dense integers 0..n-1, stored in flat
+    lists. `find` uses path halving and `union` links the smaller set under
+    the larger one, so both run in near-constant amortized time and no find
+    ever recurses.
+    """
+
+    def __init__(self, size=0):
+        """
+        Initialize a disjoint set of `size` elements, each in its own set.
+
+        Parameters:
+        size (integer): The number of elements.
+        """
+        self.__parent = list(range(size))
+        self.__size = [1] * size
+        self.__count = size
+
+    def __len__(self):
+        """Return the number of elements."""
+        return len(self.__parent)
+
+    def add(self):
+        """
+        Add a new element in a set of its own.
+
+        Returns:
+        integer: The new element.
+        """
+        element = len(self.__parent)
+        self.__parent.append(element)
+        self.__size.append(1)
+        self.__count += 1
+        return element
+
+    def find(self, element):
+        """
+        Return the root element of the set containing `element`.
+
+        Parameters:
+        element (integer): The element to look up.
+        """
+        parent = self.__parent
+        while parent[element] != element:
+            # path halving: point every other element at its grandparent
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, element1, element2):
+        """
+        Merge the sets containing `element1` and `element2`.
+
+        Parameters:
+        element1 (integer): An element in the first set.
+        element2 (integer): An element in the second set.
+
+        Returns:
+        boolean: True if two different sets were merged, False if the elements
+        were already in the same set.
+        """
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        if root1 == root2:
+            return False
+
+        size = self.__size
+        if size[root1] < size[root2]:
+            root1, root2 = root2, root1
+        self.__parent[root2] = root1
+        size[root1] += size[root2]
+        self.__count -= 1
+        return True
+
+    def connected(self, element1, element2):
+        """Return True if `element1` and `element2` are in the same set."""
+        return self.find(element1) == self.find(element2)
+
+    def get_set_size(self, element):
+        """Return the number of elements in the set containing `element`."""
+        return self.__size[self.find(element)]
+
+    def count(self):
+        """Return the number of disjoint sets."""
+        return self.__count
+
+    def groups(self):
+        """
+        Return every set as a list of elements. Sets are ordered by their
+        smallest element, and elements in increasing order.
+
+        Returns:
+        list<list<integer>>: The disjoint sets.
+        """
+        root_to_group = {}
+        for element in range(len(self.__parent)):
+            root = self.find(element)
+            if root not in root_to_group:
+                root_to_group[root] = []
+            root_to_group[root].append(element)
+        return list(root_to_group.values())
+
+
+class KeyedDisjointSet(object):
+    """
+    A union-find structure over hashable items, which interns each item to a
+    dense integer and keeps the sets in a DisjointSet.
+    """
+
+    def __init__(self, items=()):
+        """
+        Initialize a disjoint set, with each of `items` in its own set.
+
+        Parameters:
+        items (iterable): The initial items.
+        """
+        self.__index = {} # item -> dense int
+        self.__items = [] # dense int -> item
+        self.__sets = DisjointSet()
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        """Return the number of items."""
+        return len(self.__items)
+
+    def __contains__(self, item):
+        return item in self.__index
+
+    def add(self, item):
+        """
+        Add `item` in a new set of its own.
+
+        Parameters:
+        item (hashable): The item to add.
+
+        Returns:
+        boolean: False if the item was already present, True otherwise.
+        """
+        if item in self.__index:
+            return False
+        self.__index[item] = self.__sets.add()
+        self.__items.append(item)
+        return True
+
+    def find(self, item):
+        """
+        Return the representative item of the set containing `item`.
+
+        Parameters:
+        item (hashable): The item to look up.
+        """
+        return self.__items[self.__sets.find(self.__index[item])]
+
+    def union(self, item1, item2):
+        """
+        Merge the sets containing `item1` and `item2`.
+
+        Returns:
+        boolean: True if two different sets were merged, False if the items
+        were already in the same set.
+        """
+        return self.__sets.union(self.__index[item1], self.__index[item2])
+
+    def connected(self, item1, item2):
+        """Return True if `item1` and `item2` are in the same set."""
+        return self.__sets.connected(self.__index[item1], self.__index[item2])
+
+    def count(self):
+        """Return the number of disjoint sets."""
+        return self.__sets.count()
+
+    def groups(self):
+        """
+        Return every set as a list of items. Sets are ordered by the first
+        time one of their items was added, and items by when they were added.
+
+        Returns:
+        list<list>: The disjoint sets.
+        """
+        items = self.__items
+        return [
+            [items[element] for element in group]
+            for group in self.__sets.groups()
+        ]
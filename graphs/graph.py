@@ -1,12 +1,40 @@
 from collections import deque
-from operator import itemgetter
 import random
 
+from graphs.batch import run_batch_searches, run_betweenness
+from graphs.centrality import (
+    DEFAULT_MAX_ITERATIONS, DEFAULT_TOLERANCE, compute_eigenvector_centrality,
+    compute_katz_centrality, compute_pagerank
+)
+from graphs.disjoint_set import KeyedDisjointSet
+from graphs.instrumentation import (
+    ACTIVE_STATS, count_lookup, get_active_stats, instrumented
+)
+from graphs.query_cache import QueryCache, cached_query
+
+class CycleError(ValueError):
+    """
+    Raised when an operation needs an acyclic graph but finds a cycle.
+    """
+
+    def __init__(self, cycle):
+        """
+        Parameters:
+        cycle (list<string>): The ids on the cycle, with the first id repeated at the end.
+        """
+        super().__init__(
+            "Graph contains a cycle: {}".format(' -> '.join(str(v) for v in cycle))
+        )
+        self.cycle = cycle
+
+
 class Vertex(object):
     """
     Defines a single vertex and its neighbors.
     """
 
+    __slots__ = ('__id', '__neighbors_dict')
+
     def __init__(self, vertex_id):
         """
         Initialize a vertex and its neighbors dictionary.
@@ -23,13 +51,30 @@ class Vertex(object):
 
         Parameters:
         vertex_obj (Vertex): An instance of Vertex to be stored as a neighbor.
+
+        Returns:
+        boolean: True if the neighbor was added, False if it already was one.
+        """
+        neighbors_dict = self.__neighbors_dict
+        vertex_id = vertex_obj.get_id()
+        if vertex_id in neighbors_dict:
+            return False
+        neighbors_dict[vertex_id] = vertex_obj
+        return True
+
+    def remove_neighbor(self, vertex_id):
+        """
+        Remove the neighbor with id `vertex_id`, if it is one.
+
+        Returns:
+        boolean: True if the neighbor was removed, False if it wasn't a neighbor.
         """
-        self.__neighbors_dict[vertex_obj.get_id()] = vertex_obj
+        return self.__neighbors_dict.pop(vertex_id, None) is not None
 
     def __str__(self):
         """Output the list of neighbors of this vertex."""
-        neighbor_ids = list(self.__neighbors_dict.keys())
-        return f'{self.__id} adjacent to {neighbor_ids}'
+        neighbor_ids = list(self.iter_neighbor_ids())
+        return f'{self.get_id()} adjacent to {neighbor_ids}'
 
     def __repr__(self):
         """Output the list of neighbors of this vertex."""
@@ -39,6 +84,14 @@ class Vertex(object):
         """Return the neighbors of this vertex."""
         return list(self.__neighbors_dict.values())
 
+    def iter_neighbors(self):
+        """Return a read-only view of the neighbors of this vertex, without copying."""
+        return self.__neighbors_dict.values()
+
+    def iter_neighbor_ids(self):
+        """Return a read-only view of the ids of this vertex's neighbors, without copying."""
+        return self.__neighbors_dict.keys()
+
     def get_id(self):
         """Return the id of this vertex."""
         return self.__id
@@ -48,6 +101,12 @@ class Graph:
     """ Graph Class
     Represents a directed or undirected graph.
     """
+
+    # The number of fields in an edge tuple: (vertex id, vertex id)
+    EDGE_SIZE = 2
+
+    VERTEX_CLASS = Vertex
+
     def __init__(self, is_directed=True):
         """
         Initialize a graph object with an empty vertex dictionary.
@@ -57,6 +116,20 @@ class Graph:
         """
         self.__vertex_dict = dict() # id -> object
         self.__is_directed = is_directed
+        # id -> {predecessor id: None}, an insertion-ordered set; only kept for
+        # directed graphs, since undirected predecessors are the neighbors
+        self.__predecessors = dict()
+        # ids of the vertices with no incoming / no outgoing edges, as
+        # insertion-ordered sets (in an undirected graph both hold the
+        # isolated vertices)
+        self.__sources = dict()
+        self.__sinks = dict()
+        self.__components = None # union-find index, built on first use
+        # id -> {attribute name: value}, only for vertices that have attributes
+        self.__vertex_attributes = dict()
+        self.__version = 0 # bumped on every change to the graph
+        self.__query_cache = None
+        self.__instrumentation_sink = None
 
     def add_vertex(self, vertex_id):
         """
@@ -66,12 +139,17 @@ class Graph:
         vertex_id (string): The unique identifier for the new vertex.
 
         Returns:
-        Vertex: The new vertex object.
+        Vertex: The new vertex object, or the existing one if the id is
+        already in the graph.
         """
-        new_vertex = Vertex(vertex_id)
+        if vertex_id in self.__vertex_dict:
+            return self.__vertex_dict[vertex_id] # it's already there
+
+        new_vertex = self.VERTEX_CLASS(vertex_id)
         self.__vertex_dict[vertex_id] = new_vertex
+        self.__vertex_added__(vertex_id)
         return new_vertex
-        
+
 
     def get_vertex(self, vertex_id) -> Vertex:
         """Return the vertex if it exists."""
@@ -89,12 +167,264 @@ class Graph:
         vertex_id1 (string): The unique identifier of the first vertex.
         vertex_id2 (string): The unique identifier of the second vertex.
         """
-        vertex_1 = self.__vertex_dict[vertex_id1]
-        vertex_2 = self.__vertex_dict[vertex_id2]
+        if not self.contains_id(vertex_id1) or not self.contains_id(vertex_id2):
+            raise KeyError("One or both vertices are not in the graph!")
+        vertex_1 = self.get_vertex(vertex_id1)
+        if vertex_id2 in vertex_1.iter_neighbor_ids():
+            return # it's already there
+        vertex_2 = self.get_vertex(vertex_id2)
         vertex_1.add_neighbor(vertex_2)
         if not self.__is_directed:
             vertex_2.add_neighbor(vertex_1)
-        
+        self.__edge_added__(vertex_id1, vertex_id2)
+
+    def __vertex_added__(self, vertex_id):
+        """Update the graph's indexes after a vertex is added."""
+        self.__version += 1
+        if self.__is_directed:
+            self.__predecessors[vertex_id] = {}
+        self.__sources[vertex_id] = None
+        self.__sinks[vertex_id] = None
+        if self.__components is not None:
+            self.__components.add(vertex_id)
+
+    def __edge_added__(self, vertex_id1, vertex_id2):
+        """Update the graph's indexes after a new edge is added."""
+        self.__version += 1
+        if self.__is_directed:
+            self.__predecessors[vertex_id2][vertex_id1] = None
+            self.__sinks.pop(vertex_id1, None)
+            self.__sources.pop(vertex_id2, None)
+        else:
+            for vertex_id in (vertex_id1, vertex_id2):
+                self.__sources.pop(vertex_id, None)
+                self.__sinks.pop(vertex_id, None)
+        if self.__components is not None:
+            self.__components.union(vertex_id1, vertex_id2)
+
+    def add_vertices(self, vertex_ids):
+        """
+        Add many vertices at once. Ids already in the graph are skipped.
+
+        Parameters:
+        vertex_ids (iterable<string>): The ids of the new vertices; a NumPy
+        array is converted to Python values first.
+
+        Returns:
+        integer: The number of vertices added.
+        """
+        if hasattr(vertex_ids, 'tolist'):
+            vertex_ids = vertex_ids.tolist()
+        vertex_dict = self.__vertex_dict
+        vertex_class = self.VERTEX_CLASS
+        new_ids = [vertex_id for vertex_id in dict.fromkeys(vertex_ids) if vertex_id not in vertex_dict]
+        for vertex_id in new_ids:
+            vertex_dict[vertex_id] = vertex_class(vertex_id)
+        if self.__is_directed:
+            self.__predecessors.update((vertex_id, {}) for vertex_id in new_ids)
+        self.__sources.update(dict.fromkeys(new_ids))
+        self.__sinks.update(dict.fromkeys(new_ids))
+        if self.__components is not None:
+            for vertex_id in new_ids:
+                self.__components.add(vertex_id)
+        if new_ids:
+            self.__version += 1
+        return len(new_ids)
+
+    def add_edges(self, edges):
+        """
+        Add many edges at once. The edges are all checked before any is
+        added, so a bad edge leaves the graph unchanged. Edges already in the
+        graph are skipped.
+
+        Parameters:
+        edges (iterable<tuple>): (vertex id, vertex id) pairs, or for a
+        WeightedGraph (vertex id, vertex id, weight) triples. A NumPy array
+        with one row per edge is converted to Python values first.
+
+        Returns:
+        integer: The number of edges added.
+        """
+        return self.__insert_edges__(self.__check_edges__(edges, self.EDGE_SIZE))
+
+    def __insert_edges__(self, edges):
+        """
+        Add edges without checking them, skipping those already in the graph.
+        This is the bulk path behind add_edges; the file loader also calls it
+        directly for edges between the vertices it has declared itself.
+
+        Parameters:
+        edges (iterable<tuple>): Edge tuples with EDGE_SIZE fields, between
+        vertices that are all in the graph.
+
+        Returns:
+        integer: The number of edges added.
+        """
+        vertex_dict = self.__vertex_dict
+        is_directed = self.__is_directed
+        predecessors = self.__predecessors
+        sources = self.__sources
+        sinks = self.__sinks
+        components = self.__components
+        weighted = self.EDGE_SIZE > 2
+
+        num_added = 0
+        for edge in edges:
+            vertex_id1 = edge[0]
+            vertex_id2 = edge[1]
+            vertex_1 = vertex_dict[vertex_id1]
+            vertex_2 = vertex_dict[vertex_id2]
+            if weighted:
+                if not vertex_1.add_neighbor(vertex_2, edge[2]):
+                    continue # it's already there
+            elif not vertex_1.add_neighbor(vertex_2):
+                continue
+            if is_directed:
+                predecessors[vertex_id2][vertex_id1] = None
+            elif weighted:
+                vertex_2.add_neighbor(vertex_1, edge[2])
+            else:
+                vertex_2.add_neighbor(vertex_1)
+            # membership tests first, they are cheaper than pop calls
+            if vertex_id1 in sinks:
+                del sinks[vertex_id1]
+            if vertex_id2 in sources:
+                del sources[vertex_id2]
+            if not is_directed:
+                if vertex_id1 in sources:
+                    del sources[vertex_id1]
+                if vertex_id2 in sinks:
+                    del sinks[vertex_id2]
+            if components is not None:
+                components.union(vertex_id1, vertex_id2)
+            num_added += 1
+
+        if num_added:
+            self.__version += 1
+        return num_added
+
+    def remove_edge(self, vertex_id1, vertex_id2):
+        """
+        Remove the edge from vertex with id `vertex_id1` to vertex with id
+        `vertex_id2` (in an undirected graph, the edge between them).
+
+        Returns:
+        boolean: True if the edge was removed, False if there was no such edge.
+        """
+        return self.remove_edges([(vertex_id1, vertex_id2)]) == 1
+
+    def remove_edges(self, edges):
+        """
+        Remove many edges at once. Edges that aren't in the graph are skipped.
+
+        Parameters:
+        edges (iterable<tuple>): (vertex id, vertex id) pairs. Any further
+        fields, such as weights, are ignored, so the input of `add_edges`
+        can be passed back. A NumPy array is converted to Python values first.
+
+        Returns:
+        integer: The number of edges removed.
+        """
+        edges = self.__check_edges__(edges, 2, allow_extra_fields=True)
+        num_removed = 0
+        for edge in edges:
+            if self.__unlink__(edge[0], edge[1]):
+                num_removed += 1
+        if num_removed:
+            self.__edges_removed__()
+        return num_removed
+
+    def remove_vertex(self, vertex_id):
+        """
+        Remove the vertex with id `vertex_id` and every edge to or from it.
+        """
+        self.remove_vertices([vertex_id])
+
+    def remove_vertices(self, vertex_ids):
+        """
+        Remove many vertices at once, with every edge to or from them. All of
+        the ids are checked before anything is removed.
+
+        Parameters:
+        vertex_ids (iterable<string>): The ids of the vertices to remove; a
+        NumPy array is converted to Python values first.
+
+        Returns:
+        integer: The number of vertices removed.
+        """
+        if hasattr(vertex_ids, 'tolist'):
+            vertex_ids = vertex_ids.tolist()
+        vertex_ids = list(dict.fromkeys(vertex_ids))
+        if not all(vertex_id in self.__vertex_dict for vertex_id in vertex_ids):
+            raise KeyError("One or more vertices are not in the graph!")
+
+        for vertex_id in vertex_ids:
+            for neighbor_id in list(self.iter_neighbor_ids(vertex_id)):
+                self.__unlink__(vertex_id, neighbor_id)
+            for predecessor_id in list(self.iter_predecessor_ids(vertex_id)):
+                self.__unlink__(predecessor_id, vertex_id)
+            del self.__vertex_dict[vertex_id]
+            self.__predecessors.pop(vertex_id, None)
+            self.__sources.pop(vertex_id, None)
+            self.__sinks.pop(vertex_id, None)
+            self.__vertex_attributes.pop(vertex_id, None)
+        if vertex_ids:
+            self.__edges_removed__()
+        return len(vertex_ids)
+
+    def __check_edges__(self, edges, edge_size, allow_extra_fields=False):
+        """
+        Return `edges` as a list of tuples after checking that each one has
+        the right number of fields and that all of their vertices exist.
+        """
+        if hasattr(edges, 'tolist'):
+            edges = edges.tolist()
+        edges = [tuple(edge) for edge in edges]
+        for edge in edges:
+            if len(edge) != edge_size and not (allow_extra_fields and len(edge) > edge_size):
+                raise ValueError(
+                    "Expected edges with {} fields, got {!r}".format(edge_size, edge)
+                )
+
+        vertex_dict = self.__vertex_dict
+        for edge in edges:
+            if edge[0] not in vertex_dict or edge[1] not in vertex_dict:
+                raise KeyError("One or both vertices are not in the graph!")
+        return edges
+
+    def __unlink__(self, vertex_id1, vertex_id2):
+        """
+        Remove the edge from vertex_id1 to vertex_id2 and update the degree
+        indexes. The caller invalidates the other indexes once per batch.
+
+        Returns:
+        boolean: True if there was such an edge.
+        """
+        vertex_1 = self.__vertex_dict[vertex_id1]
+        if not vertex_1.remove_neighbor(vertex_id2):
+            return False
+        if self.__is_directed:
+            predecessors = self.__predecessors[vertex_id2]
+            del predecessors[vertex_id1]
+            if not predecessors:
+                self.__sources[vertex_id2] = None
+        else:
+            self.__vertex_dict[vertex_id2].remove_neighbor(vertex_id1)
+            if not self.get_out_degree(vertex_id2):
+                self.__sources[vertex_id2] = None
+                self.__sinks[vertex_id2] = None
+        if not self.get_out_degree(vertex_id1):
+            if not self.__is_directed:
+                self.__sources[vertex_id1] = None
+            self.__sinks[vertex_id1] = None
+        return True
+
+    def __edges_removed__(self):
+        """Update the graph's indexes after edges or vertices are removed."""
+        self.__version += 1
+        # a union-find structure can't split sets, so rebuild it on next use
+        self.__components = None
+
     def get_vertices(self):
         """
         Return all vertices in the graph.
@@ -104,9 +434,211 @@ class Graph:
         """
         return list(self.__vertex_dict.values())
 
+    def get_vertex_ids(self):
+        """
+        Return the ids of all vertices in the graph, in insertion order.
+
+        Returns:
+        List<string>: The vertex ids contained in the graph.
+        """
+        return list(self.__vertex_dict.keys())
+
+    def get_neighbor_ids(self, vertex_id):
+        """
+        Return the ids of the neighbors of the vertex with id `vertex_id`.
+
+        Parameters:
+        vertex_id (string): The unique identifier of the vertex.
+
+        Returns:
+        List<string>: The ids of the vertices adjacent to `vertex_id`.
+        """
+        return list(self.iter_neighbor_ids(vertex_id))
+
+    def iter_neighbor_ids(self, vertex_id):
+        """
+        Return a read-only view of the ids of the neighbors of the vertex with
+        id `vertex_id`. Unlike `get_neighbor_ids` nothing is copied, so this is
+        what the algorithms use; the view must not outlive changes to the graph.
+
+        Parameters:
+        vertex_id (string): The unique identifier of the vertex.
+
+        Returns:
+        Iterable<string>: The ids of the vertices adjacent to `vertex_id`.
+        """
+        neighbor_ids = self.__vertex_dict[vertex_id].iter_neighbor_ids()
+        if ACTIVE_STATS.get() is not None:
+            return count_lookup(self, neighbor_ids)
+        return neighbor_ids
+
+    def iter_predecessor_ids(self, vertex_id):
+        """
+        Return a read-only view of the ids of the vertices with an edge to
+        the vertex with id `vertex_id`. In an undirected graph these are its
+        neighbors. The view must not outlive changes to the graph.
+
+        Parameters:
+        vertex_id (string): The unique identifier of the vertex.
+
+        Returns:
+        Iterable<string>: The ids of the vertices with an edge to `vertex_id`.
+        """
+        if not self.__is_directed:
+            predecessor_ids = self.__vertex_dict[vertex_id].iter_neighbor_ids()
+        else:
+            predecessor_ids = self.__predecessors[vertex_id].keys()
+        if ACTIVE_STATS.get() is not None:
+            return count_lookup(self, predecessor_ids)
+        return predecessor_ids
+
+    def get_predecessor_ids(self, vertex_id):
+        """
+        Return the ids of the vertices with an edge to the vertex with id
+        `vertex_id`, in the order the edges were added.
+
+        Returns:
+        List<string>: The ids of the vertices with an edge to `vertex_id`.
+        """
+        return list(self.iter_predecessor_ids(vertex_id))
+
+    def get_out_degree(self, vertex_id):
+        """Return the number of edges leaving the vertex with id `vertex_id`."""
+        return len(self.__vertex_dict[vertex_id].iter_neighbor_ids())
+
+    def get_in_degree(self, vertex_id):
+        """
+        Return the number of edges entering the vertex with id `vertex_id`.
+        In an undirected graph this is the same as the out-degree.
+        """
+        if not self.__is_directed:
+            return self.get_out_degree(vertex_id)
+        return len(self.__predecessors[vertex_id])
+
+    def get_sources(self):
+        """
+        Return the ids of the vertices with no incoming edges, in the order
+        they became sources (insertion order, unless edges were removed). In
+        an undirected graph these are the isolated vertices.
+        """
+        return list(self.__sources)
+
+    def get_sinks(self):
+        """
+        Return the ids of the vertices with no outgoing edges, in the order
+        they became sinks (insertion order, unless edges were removed). In
+        an undirected graph these are the isolated vertices.
+        """
+        return list(self.__sinks)
+
+    def set_vertex_attributes(self, vertex_id, **attributes):
+        """
+        Set named attributes of a vertex, such as its coordinates. Attributes
+        are not part of the graph's structure, so setting them doesn't change
+        its version.
+
+        Parameters:
+        vertex_id (string): The unique identifier of the vertex.
+        attributes: The attribute values, by name.
+        """
+        if not self.contains_id(vertex_id):
+            raise KeyError("One or both vertices are not in the graph!")
+        self.__vertex_attributes.setdefault(vertex_id, {}).update(attributes)
+
+    def get_vertex_attribute(self, vertex_id, name, default=None):
+        """
+        Return the attribute `name` of the vertex with id `vertex_id`, or
+        `default` if it isn't set.
+        """
+        attributes = self.__vertex_attributes.get(vertex_id)
+        if attributes is None:
+            return default
+        return attributes.get(name, default)
+
+    def get_vertex_attributes(self, vertex_id):
+        """Return a copy of all attributes of the vertex with id `vertex_id`."""
+        return dict(self.__vertex_attributes.get(vertex_id, ()))
+
     def contains_id(self, vertex_id):
         return vertex_id in self.__vertex_dict
 
+    def is_directed(self):
+        """Return True if the graph is directed, False otherwise."""
+        return self.__is_directed
+
+    def get_version(self):
+        """Return a counter that changes every time the graph is modified."""
+        return self.__version
+
+    def enable_query_cache(self, maxsize=1024):
+        """
+        Start caching the results of repeated read-only queries
+        (`find_shortest_path`, `find_vertices_n_away`,
+        `get_connected_components`, ...). Modifying the graph invalidates
+        the cached results. Cached results are shared, so don't modify them.
+
+        Parameters:
+        maxsize (integer): The most results to keep, least recently used first out.
+        """
+        self.__query_cache = QueryCache(maxsize)
+
+    def disable_query_cache(self):
+        """Stop caching query results and drop the cache."""
+        self.__query_cache = None
+
+    def get_query_cache(self):
+        """Return the graph's QueryCache, or None if caching is disabled."""
+        return self.__query_cache
+
+    def get_query_cache_stats(self):
+        """
+        Return the query cache's hit/miss/eviction statistics, or None if
+        caching is disabled.
+        """
+        if self.__query_cache is None:
+            return None
+        return self.__query_cache.get_stats()
+
+    def set_instrumentation_sink(self, sink):
+        """
+        Start (or, with None, stop) reporting how much work the algorithms
+        do. After every call to an instrumented algorithm (`bfs_traversal`,
+        `find_shortest_path`, `topological_sort`, `floyd_warshall`, the
+        minimum spanning trees, ...), `sink` is called with an
+        AlgorithmStats holding the vertices visited, edges scanned, queue
+        peak size and wall time of the call.
+
+        Parameters:
+        sink (function): Called with each AlgorithmStats, e.g. a StatsRecorder
+        or LoggingSink from graphs.instrumentation.
+        """
+        self.__instrumentation_sink = sink
+
+    def get_instrumentation_sink(self):
+        """Return the instrumentation sink, or None if instrumentation is off."""
+        return self.__instrumentation_sink
+
+    def get_active_stats(self):
+        """
+        Return the AlgorithmStats of the instrumented call in progress on this
+        graph in the current thread, or None if there isn't one.
+        """
+        return get_active_stats(self)
+
+    def freeze(self):
+        """
+        Return a compact, read-only copy of this graph in compressed sparse
+        row (CSR) form. Vertex ids are interned to dense integers and the
+        adjacency is stored in flat arrays, so the copy costs a few bytes
+        per edge instead of a Python object per vertex.
+
+        Returns:
+        CSRGraph: A frozen copy of this graph supporting all read-only
+        algorithms.
+        """
+        from graphs.csr_graph import CSRGraph
+        return CSRGraph.from_graph(self)
+
     def __str__(self):
         """Return a string representation of the graph."""
         return f'Graph with vertices: {self.get_vertices()}'
@@ -115,43 +647,138 @@ class Graph:
         """Return a string representation of the graph."""
         return self.__str__()
 
+    @instrumented
     def bfs_traversal(self, start_id):
         """
         Traverse the graph using breadth-first search.
+
+        Returns:
+        set<string>: The ids of all vertices reachable from the start vertex.
+        """
+        return set(self.iter_bfs(start_id))
+
+    def iter_bfs(self, start_id, max_depth=None, vertex_filter=None,
+        with_details=False):
+        """
+        Lazily traverse the graph using breadth-first search, yielding each
+        vertex as soon as it is reached. Stop iterating to stop the search.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): If given, do not go further than this many edges
+        from the start vertex.
+        vertex_filter (function): If given, only vertex ids for which
+        `vertex_filter(vertex_id)` is true are yielded and expanded.
+        with_details (boolean): Yield (id, depth, parent id) tuples instead of
+        bare vertex ids. The start vertex has depth 0 and parent None.
+
+        Returns:
+        generator: The vertex ids (or tuples) in breadth-first order.
         """
         if not self.contains_id(start_id):
             raise KeyError("One or both vertices are not in the graph!")
+        return self.__iter_bfs__(start_id, max_depth, vertex_filter, with_details)
+
+    def __iter_bfs__(self, start_id, max_depth, vertex_filter, with_details):
+        if vertex_filter is not None and not vertex_filter(start_id):
+            return
 
         # Keep a set to denote which vertices we've seen before
-        seen = set()
-        seen.add(start_id)
+        seen = {start_id}
+        stats = get_active_stats(self)
 
         # Keep a queue so that we visit vertices in the appropriate order
         queue = deque()
-        queue.append(self.get_vertex(start_id))
+        queue.append((start_id, 0, None))
 
         while queue:
-            current_vertex_obj = queue.pop()
-            current_vertex_id = current_vertex_obj.get_id()
+            if stats is not None:
+                stats.observe_queue(len(queue))
+            current_vertex_id, depth, parent_id = queue.popleft()
+            yield (current_vertex_id, depth, parent_id) if with_details else current_vertex_id
 
-            # Process current node
-            print('Processing vertex {}'.format(current_vertex_id))
+            if max_depth is not None and depth >= max_depth:
+                continue
 
             # Add its neighbors to the queue
-            for neighbor in current_vertex_obj.get_neighbors():
-                if neighbor.get_id() not in seen:
-                    seen.add(neighbor.get_id())
-                    queue.append(neighbor)
+            for neighbor_id in self.iter_neighbor_ids(current_vertex_id):
+                if neighbor_id not in seen:
+                    seen.add(neighbor_id)
+                    if vertex_filter is None or vertex_filter(neighbor_id):
+                        queue.append((neighbor_id, depth + 1, current_vertex_id))
+
+    def iter_dfs(self, start_id, max_depth=None, vertex_filter=None,
+        with_details=False):
+        """
+        Lazily traverse the graph using an iterative depth-first search,
+        yielding each vertex in pre-order as it is first visited. Stop
+        iterating to stop the search.
 
-        return seen # everything has been processed
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): If given, do not go further than this many edges
+        from the start vertex. Every vertex within that distance is yielded,
+        as with iter_bfs, even if the search first reaches it by a longer route.
+        vertex_filter (function): If given, only vertex ids for which
+        `vertex_filter(vertex_id)` is true are yielded and expanded.
+        with_details (boolean): Yield (id, depth, parent id) tuples instead of
+        bare vertex ids. The start vertex has depth 0 and parent None; the
+        depth and parent are those of the route the vertex was first reached by.
 
-    def find_shortest_path(self, start_id, target_id):
+        Returns:
+        generator: The vertex ids (or tuples) in depth-first order.
+        """
+        if not self.contains_id(start_id):
+            raise KeyError("One or both vertices are not in the graph!")
+        return self.__iter_dfs__(start_id, max_depth, vertex_filter, with_details)
+
+    def __iter_dfs__(self, start_id, max_depth, vertex_filter, with_details):
+        # id -> the shallowest depth the vertex was expanded at. With a depth
+        # bound, a vertex reached again by a shorter route is expanded again
+        # (but not yielded again), so nothing within the bound is missed.
+        # Vertices rejected by the filter are stored with depth -1.
+        depths = {}
+
+        # stack of vertices to visit next
+        stack = [(start_id, 0, None)]
+
+        while stack:
+            current_vertex_id, depth, parent_id = stack.pop()
+            previous_depth = depths.get(current_vertex_id)
+            if previous_depth is not None and (max_depth is None or previous_depth <= depth):
+                continue
+            depths[current_vertex_id] = depth
+            if previous_depth is None:
+                if vertex_filter is not None and not vertex_filter(current_vertex_id):
+                    depths[current_vertex_id] = -1
+                    continue
+                yield (current_vertex_id, depth, parent_id) if with_details else current_vertex_id
+
+            if max_depth is not None and depth >= max_depth:
+                continue
+
+            # push in reverse so neighbors are visited in their stored order
+            neighbor_ids = self.iter_neighbor_ids(current_vertex_id)
+            if not hasattr(neighbor_ids, '__reversed__'):
+                # an iterator, such as a CSRGraph's; a dict view reverses without copying
+                neighbor_ids = tuple(neighbor_ids)
+            for neighbor_id in reversed(neighbor_ids):
+                neighbor_depth = depths.get(neighbor_id)
+                if neighbor_depth is None or (
+                        max_depth is not None and neighbor_depth > depth + 1):
+                    stack.append((neighbor_id, depth + 1, current_vertex_id))
+
+    @instrumented
+    @cached_query
+    def find_shortest_path(self, start_id, target_id, bidirectional=False):
         """
         Find and return the shortest path from start_id to target_id.
 
         Parameters:
         start_id (string): The id of the start vertex.
         target_id (string): The id of the target (end) vertex.
+        bidirectional (boolean): Search from both ends at once, meeting in the
+        middle. Expands far fewer vertices on graphs with high branching.
 
         Returns:
         list<string>: A list of all vertex ids in the shortest path, from start to end.
@@ -159,342 +786,1094 @@ class Graph:
         if not self.contains_id(start_id) or not self.contains_id(target_id):
             raise KeyError("One or both vertices are not in the graph!")
 
-        # vertex keys we've seen before and their paths from the start vertex
-        vertex_id_to_path = {
-            start_id: [start_id] # only one thing in the path
+        if bidirectional:
+            return self.__find_shortest_path_bidirectional__(start_id, target_id)
+
+        vertex_id_to_parent = self.__bfs_parents__(start_id, (target_id,))
+        if target_id not in vertex_id_to_parent: # path not found
+            return None
+
+        return self.__reconstruct_path__(vertex_id_to_parent, target_id)
+
+    def __bfs_parents__(self, start_id, target_ids=()):
+        """
+        Run a breadth-first search from start_id and return a map of every
+        discovered vertex id -> the vertex id it was first reached from.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_ids (iterable<string>): If given, stop as soon as all of these
+        vertices have been discovered.
+        """
+        # vertex keys we've seen before and the vertex we reached them from
+        vertex_id_to_parent = {
+            start_id: None # the start vertex has no parent
         }
+        remaining_ids = set(target_ids)
+        search_all = not remaining_ids
+        remaining_ids.discard(start_id)
 
-        # queue of vertices to visit next
-        queue = deque() 
-        queue.append(self.get_vertex(start_id))
+        # queue of vertex ids to visit next
+        queue = deque()
+        queue.append(start_id)
+        stats = get_active_stats(self)
 
-        # while queue is not empty
-        while queue:
-            current_vertex_obj = queue.pop() # vertex obj to visit next
-            current_vertex_id = current_vertex_obj.get_id()
+        # while queue is not empty and some target hasn't been found
+        while queue and (search_all or remaining_ids):
+            if stats is not None:
+                stats.observe_queue(len(queue))
+            current_vertex_id = queue.popleft() # vertex id to visit next
 
-            # found target, can stop the loop early
-            if current_vertex_id == target_id:
-                break
+            for neighbor_id in self.iter_neighbor_ids(current_vertex_id):
+                if neighbor_id not in vertex_id_to_parent:
+                    vertex_id_to_parent[neighbor_id] = current_vertex_id
+                    queue.append(neighbor_id)
+                    remaining_ids.discard(neighbor_id)
 
-            neighbors = current_vertex_obj.get_neighbors()
-            for neighbor in neighbors:
-                if neighbor.get_id() not in vertex_id_to_path:
-                    current_path = vertex_id_to_path[current_vertex_id]
-                    # extend the path by 1 vertex
-                    next_path = current_path + [neighbor.get_id()]
-                    vertex_id_to_path[neighbor.get_id()] = next_path
-                    queue.append(neighbor)
-                    # print(vertex_id_to_path)
-
-        if target_id not in vertex_id_to_path: # path not found
-            return None
+        return vertex_id_to_parent
 
-        return vertex_id_to_path[target_id]
+    def batch_shortest_paths(self, pairs, workers=None, chunk_size=16):
+        """
+        Answer many shortest path queries at once. Queries are grouped by
+        start vertex so each start vertex is searched only once, and the
+        searches are spread over a pool of worker processes, which receive
+        the graph once rather than per query.
 
-    def find_vertices_n_away(self, start_id, target_distance):
+        Parameters:
+        pairs (iterable<(string, string)>): The (start_id, target_id) queries.
+        workers (integer): The number of worker processes, by default one per
+        CPU. With 1 worker the searches run in this process.
+        chunk_size (integer): How many start vertices each task handles.
+
+        Returns:
+        generator: ((start_id, target_id), result) for every distinct pair, in
+        the order the searches finish. The result is what
+        `find_shortest_path` would return for a Graph, and what
+        `find_shortest_path_with_distance` would return for a WeightedGraph.
         """
-        Find and return all vertices n distance away.
-        
-        Arguments:
+        start_to_targets = {}
+        for start_id, target_id in pairs:
+            if not self.contains_id(start_id) or not self.contains_id(target_id):
+                raise KeyError("One or both vertices are not in the graph!")
+            if start_id not in start_to_targets:
+                start_to_targets[start_id] = {}
+            start_to_targets[start_id][target_id] = None # ordered set
+        return run_batch_searches(
+            self, [
+                (start_id, list(target_ids))
+                for start_id, target_ids in start_to_targets.items()
+            ],
+            workers, chunk_size
+        )
+
+    def __shortest_paths_from__(self, start_id, target_ids):
+        """
+        Find the shortest path from start_id to each of target_ids with one
+        breadth-first search.
+
+        Returns:
+        dict: A map of target id -> path (list of ids), or None if unreachable.
+        """
+        vertex_id_to_parent = self.__bfs_parents__(start_id, target_ids)
+        return {
+            target_id: (
+                self.__reconstruct_path__(vertex_id_to_parent, target_id)
+                if target_id in vertex_id_to_parent else None
+            )
+            for target_id in target_ids
+        }
+
+    def __find_shortest_path_bidirectional__(self, start_id, target_id):
+        """
+        Find the shortest path from start_id to target_id by running one BFS
+        forward from the start and one backward from the target, always
+        expanding a full level of whichever frontier is smaller.
+
+        Parameters:
         start_id (string): The id of the start vertex.
-        target_distance (integer): The distance from the start vertex we are looking for
+        target_id (string): The id of the target (end) vertex.
 
         Returns:
-        list<string>: All vertex ids that are `target_distance` away from the start vertex
+        list<string>: A list of all vertex ids in the shortest path, from start to end.
         """
-        distance_dict = {}
-        self.__find_vertices_n_away_helper__(start_id, target_distance, 0, distance_dict)
-        return [
-            key
-            for key, value in distance_dict.items()
-            if value == target_distance
-        ]
+        if start_id == target_id:
+            return [start_id]
+
+        forward_parent = {start_id: None}
+        forward_depth = {start_id: 0}
+        forward_frontier = [start_id]
+        backward_parent = {target_id: None}
+        backward_depth = {target_id: 0}
+        backward_frontier = [target_id]
+        stats = get_active_stats(self)
+
+        while forward_frontier and backward_frontier:
+            if stats is not None:
+                stats.observe_queue(len(forward_frontier) + len(backward_frontier))
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting_edge = self.__expand_bfs_level__(
+                    forward_frontier, self.iter_neighbor_ids,
+                    forward_parent, forward_depth, backward_depth
+                )
+                if meeting_edge is not None:
+                    last_forward_id, first_backward_id = meeting_edge
+                    break
+            else:
+                backward_frontier, meeting_edge = self.__expand_bfs_level__(
+                    backward_frontier, self.iter_predecessor_ids,
+                    backward_parent, backward_depth, forward_depth
+                )
+                if meeting_edge is not None:
+                    first_backward_id, last_forward_id = meeting_edge
+                    break
+        else:
+            return None # the searches never met, path not found
+
+        path = self.__reconstruct_path__(forward_parent, last_forward_id)
+        current_id = first_backward_id
+        while current_id is not None:
+            path.append(current_id)
+            current_id = backward_parent[current_id]
+        return path
+
+    def __expand_bfs_level__(self, frontier, get_next_ids, vertex_to_parent,
+        vertex_to_depth, other_vertex_to_depth):
+        """
+        Expand one full BFS level for one side of a bidirectional search.
+
+        Parameters:
+        frontier (list<string>): The vertex ids at the current depth.
+        get_next_ids (function): Returns the ids to step to from a vertex id.
+        vertex_to_parent (dict): This side's map of vertex id -> parent id.
+        vertex_to_depth (dict): This side's map of vertex id -> depth.
+        other_vertex_to_depth (dict): The other side's map of vertex id -> depth.
 
+        Returns:
+        (list<string>, tuple): The next frontier, and the edge (this side's id,
+        other side's id) that joins the searches on the shortest path, or None
+        if the searches have not met yet.
+        """
+        next_frontier = []
+        best_length = None
+        meeting_edge = None
+        for current_id in frontier:
+            current_depth = vertex_to_depth[current_id]
+            for next_id in get_next_ids(current_id):
+                if next_id in other_vertex_to_depth:
+                    length = current_depth + 1 + other_vertex_to_depth[next_id]
+                    if best_length is None or length < best_length:
+                        best_length = length
+                        meeting_edge = (current_id, next_id)
+                if next_id not in vertex_to_parent:
+                    vertex_to_parent[next_id] = current_id
+                    vertex_to_depth[next_id] = current_depth + 1
+                    next_frontier.append(next_id)
+        return next_frontier, meeting_edge
+
+    def __reconstruct_path__(self, vertex_to_parent, target_id):
+        """
+        Walk a map of vertex id -> parent id back from `target_id` to the root
+        (the vertex whose parent is None) and return the path from root to target.
 
-    def __find_vertices_n_away_helper__(self, start_id,
-        target_distance: int, curr_distance: int, distance_dict: dict):
+        Parameters:
+        vertex_to_parent (dict): A map of vertex id -> previous vertex id.
+        target_id (string): The id of the last vertex on the path.
+
+        Returns:
+        list<string>: The vertex ids on the path, from root to target.
+        """
+        path = []
+        current_id = target_id
+        while current_id is not None:
+            path.append(current_id)
+            current_id = vertex_to_parent[current_id]
+        path.reverse()
+        return path
+
+    def find_vertices_n_away(self, start_id, target_distance):
         """
         Find and return all vertices n distance away.
         
         Arguments:
         start_id (string): The id of the start vertex.
         target_distance (integer): The distance from the start vertex we are looking for
-        seen (Set): A set containing ids that you wanted excluded from this call's result.
 
         Returns:
         list<string>: All vertex ids that are `target_distance` away from the start vertex
         """
-        if start_id not in distance_dict or distance_dict[start_id] > curr_distance:
-                distance_dict[start_id] = curr_distance
-        if target_distance == curr_distance: 
-            return
+        if target_distance < 0:
+            return []
+        rings = self.find_vertex_rings(start_id, target_distance)
+        if target_distance >= len(rings):
+            return []
+        # the rings are cached when the query cache is on, so this isn't, and
+        # each caller gets its own copy of the ring to modify
+        return list(rings[target_distance])
+
+    @cached_query
+    def find_vertex_rings(self, start_id, max_distance):
+        """
+        Find all vertices up to `max_distance` away in one breadth-first pass,
+        grouped by their distance from the start vertex. Each vertex is visited
+        at most once and the search stops at depth `max_distance`.
 
-        curr_vertex_obj: Vertex = self.get_vertex(start_id)
-        for neighbor_vertex_obj in curr_vertex_obj.get_neighbors():
-            neighbor_vertex_id = neighbor_vertex_obj.get_id()
-            self.__find_vertices_n_away_helper__(
-                neighbor_vertex_id, target_distance, curr_distance + 1, distance_dict
-            )
+        Arguments:
+        start_id (string): The id of the start vertex.
+        max_distance (integer): The largest distance to collect.
 
+        Returns:
+        list<list<string>>: The rings, where ring `d` holds the ids of all
+        vertices exactly `d` away from the start vertex. Rings past the
+        farthest reachable vertex are left out.
+        """
+        if not self.contains_id(start_id):
+            raise KeyError("One or both vertices are not in the graph!")
 
-    def __get_entry_points__(self, if_not_directed_return_one=True, return_all_values_too=False):
-        if not self.__is_directed:
-            if if_not_directed_return_one:
-                startable_ids = [list(self.__vertex_dict.keys())[0]]
-            else:
-                startable_ids = list(self.__vertex_dict.keys())
-        else:
-            startable_ids = set(self.__vertex_dict.keys())
-            all_values = set()
-            for starting_id in startable_ids:
-                neighbors_arr = [neighbor_vertex.get_id() for neighbor_vertex in self.__vertex_dict[starting_id].get_neighbors()]
-                all_values.update(neighbors_arr)
-            startable_ids = list(startable_ids - all_values)
+        seen = {start_id}
+        rings = [[start_id]]
+        for _ in range(max_distance):
+            next_ring = []
+            for vertex_id in rings[-1]:
+                for neighbor_id in self.iter_neighbor_ids(vertex_id):
+                    if neighbor_id not in seen:
+                        seen.add(neighbor_id)
+                        next_ring.append(neighbor_id)
+            if not next_ring:
+                break # nothing further away is reachable
+            rings.append(next_ring)
+
+        return rings
+
+    def find_vertices_n_away_from_many(self, start_ids, target_distance):
+        """
+        Find all vertices n distance away from each of several start vertices.
+
+        Arguments:
+        start_ids (iterable<string>): The ids of the start vertices.
+        target_distance (integer): The distance from each start vertex we are looking for
 
-        return startable_ids if not return_all_values_too else (startable_ids, list(all_values))
+        Returns:
+        dict: A map of start id -> list of all vertex ids `target_distance`
+        away from that start vertex.
+        """
+        return {
+            start_id: self.find_vertices_n_away(start_id, target_distance)
+            for start_id in start_ids
+        }
 
+    @cached_query
     def is_bipartite(self):
         """
-        Return True if the graph is bipartite, and False otherwise.
+        Return True if the graph is bipartite, and False otherwise. Edge
+        directions are ignored. See `bipartition`.
         """
-        startable_ids = self.__get_entry_points__()
+        _, odd_cycle = self.bipartition()
+        return odd_cycle is None
 
-        is_actually_bipartite = False
-        for start_id in startable_ids:
-            next_try = False
-            # Keep a set to denote which vertices we've seen before
-            red_seen = set()
-            red_seen.add(start_id)
-            blue_seen = set()
+    @cached_query
+    def bipartition(self):
+        """
+        Split the vertices into two sides so that every edge joins the two
+        sides, with one O(V + E) breadth-first 2-coloring that covers every
+        component. Edge directions are ignored, so a directed graph is
+        bipartite when its underlying undirected graph is.
 
-            # Keep a queue so that we visit vertices in the appropriate order
-            queue = deque()
-            queue.append(self.get_vertex(start_id))
-
-            current_color_blue = True
-            # print('Current color is:', "blue" if current_color_blue else "red")
-            while queue and not next_try:
-                current_vertex_obj = queue.pop()
-                # current_vertex_id = current_vertex_obj.get_id()
-
-                # Process current node
-                # print('Processing neighbors of vertex {}'.format(current_vertex_id))
-                # print("Neighbors are", [neighbor.get_id() for neighbor in current_vertex_obj.get_neighbors()])
-                # print('Color to be assigned to neighbors is:', "blue" if current_color_blue else "red")
-
-                # Add its neighbors to the queue
-                for neighbor in current_vertex_obj.get_neighbors():
-                    neighbor_id = neighbor.get_id()
-                    if neighbor_id in red_seen:
-                        if current_color_blue:
-                            next_try = True
-                            break
-                    elif neighbor_id in blue_seen:
-                        if not current_color_blue:
-                            next_try = True
-                            break
-                    else:
-                        if current_color_blue:
-                            blue_seen.add(neighbor_id)
-                        else:
-                            red_seen.add(neighbor_id)
-                        queue.append(neighbor)
-                current_color_blue = not current_color_blue
-            if not next_try:
-                is_actually_bipartite = True
-                break
+        Returns:
+        ((list<string>, list<string>), list<string>): If the graph is
+        bipartite, the two sides (each in vertex order) and None. Otherwise
+        None and a cycle with an odd number of edges, which proves the graph
+        is not bipartite, as a list of ids with the first id repeated at the end.
+        """
+        if self.is_directed():
+            # walk edges both ways to color the underlying undirected graph
+            def get_adjacent_ids(vertex_id):
+                yield from self.iter_neighbor_ids(vertex_id)
+                yield from self.iter_predecessor_ids(vertex_id)
+        else:
+            get_adjacent_ids = self.iter_neighbor_ids
 
-        # print("blue_seen:", blue_seen)
-        # print("red_seen:", red_seen)
-        # print('is_actually_bipartite:', is_actually_bipartite)
-        return is_actually_bipartite
+        vertex_to_color = {} # vertex id -> 0 or 1
+        vertex_to_parent = {}
+        for root_id in self.get_vertex_ids():
+            if root_id in vertex_to_color:
+                continue
+            vertex_to_color[root_id] = 0
+            vertex_to_parent[root_id] = None
 
-    def get_connected_components(self):
+            queue = deque()
+            queue.append(root_id)
+            while queue:
+                current_id = queue.popleft()
+                next_color = 1 - vertex_to_color[current_id]
+                for neighbor_id in get_adjacent_ids(current_id):
+                    if neighbor_id not in vertex_to_color:
+                        vertex_to_color[neighbor_id] = next_color
+                        vertex_to_parent[neighbor_id] = current_id
+                        queue.append(neighbor_id)
+                    elif vertex_to_color[neighbor_id] != next_color:
+                        return None, self.__odd_cycle__(
+                            vertex_to_parent, current_id, neighbor_id
+                        )
+
+        sides = ([], [])
+        for vertex_id in self.get_vertex_ids():
+            sides[vertex_to_color[vertex_id]].append(vertex_id)
+        return sides, None
+
+    def __odd_cycle__(self, vertex_to_parent, vertex_id1, vertex_id2):
+        """
+        Return the odd cycle closed by an edge between two vertices of the
+        same color in the same BFS tree: the tree paths from both ends up to
+        their lowest common ancestor, joined by the edge.
+        """
+        path1 = [vertex_id1]
+        path2 = [vertex_id2]
+        # with the same color in a BFS tree the two ends are at the same depth,
+        # so stepping up together meets at the common ancestor
+        while path1[-1] != path2[-1]:
+            path1.append(vertex_to_parent[path1[-1]])
+            path2.append(vertex_to_parent[path2[-1]])
+        # ancestor ... vertex_id1, vertex_id2 ... ancestor
+        return path1[::-1] + path2
+
+    @cached_query
+    def get_connected_components(self, strongly=False):
         """
         Return a list of all connected components, with each connected component
         represented as a list of vertex ids.
+
+        For directed graphs the components are weakly connected (edge direction
+        is ignored) unless `strongly` is True. Weak components come from a
+        union-find index that is kept up to date as vertices and edges are
+        added; strong components are found with an iterative Tarjan's
+        algorithm in O(V + E).
+
+        Parameters:
+        strongly (boolean): Return the strongly connected components instead.
         """
-        # startable_ids, all_values = self.__get_entry_points__(True, True)
-        all_values = set(self.__vertex_dict.keys())
+        if strongly and self.is_directed():
+            return self.__strongly_connected_components__()
+        return self.__component_index__().groups()
+
+    def count_connected_components(self):
+        """Return the number of (weakly) connected components."""
+        return self.__component_index__().count()
 
-        all_seen = {}
-        components = {}
-        curr_component = -1
-        for start_id in all_values:
-            if start_id in all_seen:
+    def are_connected(self, vertex_id1, vertex_id2):
+        """
+        Return True if both vertices are in the same (weakly) connected component.
+
+        Parameters:
+        vertex_id1 (string): The unique identifier of the first vertex.
+        vertex_id2 (string): The unique identifier of the second vertex.
+        """
+        if not self.contains_id(vertex_id1) or not self.contains_id(vertex_id2):
+            raise KeyError("One or both vertices are not in the graph!")
+        return self.__component_index__().connected(vertex_id1, vertex_id2)
+
+    def __component_index__(self):
+        """
+        Return the union-find index of (weakly) connected components, building
+        it from the adjacency the first time it is needed.
+        """
+        if self.__components is None:
+            vertex_ids = self.get_vertex_ids()
+            components = KeyedDisjointSet(vertex_ids)
+            for vertex_id in vertex_ids:
+                for neighbor_id in self.iter_neighbor_ids(vertex_id):
+                    components.union(vertex_id, neighbor_id)
+            self.__components = components
+        return self.__components
+
+    def __strongly_connected_components__(self):
+        """
+        Return the strongly connected components of a directed graph, using an
+        iterative version of Tarjan's algorithm.
+        """
+        vertex_to_index = {}
+        vertex_to_lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+
+        for root_id in self.get_vertex_ids():
+            if root_id in vertex_to_index:
                 continue
 
-            curr_component += 1
-            temp_component = None
-            components[curr_component] = set()
-            curr_vertex_obj = self.get_vertex(start_id)
-            queue = deque()
-            queue.append(curr_vertex_obj)
-            while queue:
-                current_vertex_obj = queue.pop()
-                curr_id = current_vertex_obj.get_id()
-                if curr_id in all_seen:
-                    correct_component = all_seen[curr_id]
-                    if correct_component == curr_component:
-                        continue
-                    components[correct_component].update(
-                        components[curr_component]
+            vertex_to_index[root_id] = vertex_to_lowlink[root_id] = len(vertex_to_index)
+            stack.append(root_id)
+            on_stack.add(root_id)
+            # (vertex id, iterator over its remaining neighbors) per DFS frame
+            work = [(root_id, iter(self.iter_neighbor_ids(root_id)))]
+
+            while work:
+                current_id, neighbor_iter = work[-1]
+                descended = False
+                for neighbor_id in neighbor_iter:
+                    if neighbor_id not in vertex_to_index:
+                        vertex_to_index[neighbor_id] = len(vertex_to_index)
+                        vertex_to_lowlink[neighbor_id] = vertex_to_index[neighbor_id]
+                        stack.append(neighbor_id)
+                        on_stack.add(neighbor_id)
+                        work.append((neighbor_id, iter(self.iter_neighbor_ids(neighbor_id))))
+                        descended = True
+                        break
+                    elif neighbor_id in on_stack:
+                        vertex_to_lowlink[current_id] = min(
+                            vertex_to_lowlink[current_id], vertex_to_index[neighbor_id]
+                        )
+                if descended:
+                    continue
+
+                # all neighbors are done, so finish this vertex
+                work.pop()
+                if work:
+                    parent_id = work[-1][0]
+                    vertex_to_lowlink[parent_id] = min(
+                        vertex_to_lowlink[parent_id], vertex_to_lowlink[current_id]
                     )
-                    components[correct_component].add(curr_id)
-                    for id in components[curr_component]:
-                        all_seen[id] = correct_component
-                    
-                    temp_component = curr_component
-                    curr_component = correct_component
-                    # components.pop(curr_component, None)
-                    components[temp_component] = set()
-                else:
-                    all_seen[curr_id] = curr_component
-                    components[curr_component].add(curr_id)
-                # Process current node
-                # print('Processing neighbors of vertex {}'.format(current_vertex_obj.get_id()))
-                # print("Neighbors are", [neighbor.get_id() for neighbor in current_vertex_obj.get_neighbors()])
-
-                # Add its neighbors to the queue
-                for neighbor in current_vertex_obj.get_neighbors():
-                    queue.append(neighbor)
-            curr_component = temp_component - 1 if temp_component else curr_component
-            temp_component = None
+                if vertex_to_lowlink[current_id] == vertex_to_index[current_id]:
+                    component = []
+                    while True:
+                        member_id = stack.pop()
+                        on_stack.discard(member_id)
+                        component.append(member_id)
+                        if member_id == current_id:
+                            break
+                    components.append(component)
 
-        return [list(components[component_key]) for component_key in components if len(components[component_key]) > 0]
+        return components
 
-    
+    @instrumented
     def find_path_dfs_iter(self, start_id, target_id):
         """
-        Use DFS with a stack to find a path from start_id to target_id.
+        Use DFS with a stack to find a path from start_id to target_id. Each
+        vertex is visited at most once, so this runs in O(V + E) even on
+        cyclic graphs. The path found is the one the depth-first search takes,
+        not necessarily a shortest one.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+
+        Returns:
+        list<string>: The vertex ids on the path, from start to end, or None
+        if the target cannot be reached.
         """
         if not self.contains_id(start_id) or not self.contains_id(target_id):
             raise KeyError("One or both vertices are not in the graph!")
 
-        # vertex keys we've seen before and their paths from the start vertex
-        vertex_id_to_path = {
-            start_id: [start_id] # only one thing in the path
-        }
+        # vertex ids we've visited -> the vertex id we reached them from
+        vertex_to_parent = dict()
+        stats = get_active_stats(self)
 
-        # stack of vertices to visit next
-        stack = list() 
-        stack.append(self.get_vertex(start_id))
+        # stack of (vertex id to visit next, the vertex id it was pushed from);
+        # a vertex may be pushed more than once, but is visited only from the
+        # last push, so the parents always form the DFS tree
+        stack = [(start_id, None)]
 
-        # while stack is not empty
         while stack:
-            current_vertex_obj = stack.pop() # vertex obj to visit next
-            current_vertex_id = current_vertex_obj.get_id()
-            # print('current_vertex_id:', current_vertex_id)
-            # print('vertex_id_to_path:', vertex_id_to_path)
+            if stats is not None:
+                stats.observe_queue(len(stack))
+            current_vertex_id, parent_id = stack.pop()
+            if current_vertex_id in vertex_to_parent:
+                continue
+            vertex_to_parent[current_vertex_id] = parent_id
 
             # found target, can stop the loop early
             if current_vertex_id == target_id:
+                return self.__reconstruct_path__(vertex_to_parent, target_id)
+
+            for neighbor_id in self.iter_neighbor_ids(current_vertex_id):
+                if neighbor_id not in vertex_to_parent:
+                    stack.append((neighbor_id, current_vertex_id))
+
+        return None # path not found
+
+    @instrumented
+    def find_path_iddfs(self, start_id, target_id, max_depth=None):
+        """
+        Find a path with the fewest edges from start_id to target_id by
+        iterative deepening: depth-limited DFS with a limit of 0, 1, 2, ...
+        edges. Memory is proportional to the depth of the path rather than the
+        size of the graph, at the cost of revisiting the shallow vertices once
+        per limit.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+        max_depth (integer): If given, give up on paths longer than this many
+        edges.
+
+        Returns:
+        list<string>: The vertex ids on the path, from start to end, or None
+        if there is no path within `max_depth` edges.
+        """
+        if not self.contains_id(start_id) or not self.contains_id(target_id):
+            raise KeyError("One or both vertices are not in the graph!")
+
+        depth_limit = 0
+        while max_depth is None or depth_limit <= max_depth:
+            path, cut_off = self.__depth_limited_search__(start_id, target_id, depth_limit)
+            if path is not None:
+                return path
+            if not cut_off:
+                return None # the whole reachable graph fit within the limit
+            depth_limit += 1
+        return None
+
+    def __depth_limited_search__(self, start_id, target_id, depth_limit):
+        """
+        Search for a simple path of at most `depth_limit` edges with a DFS
+        that keeps only the current path in memory.
+
+        Returns:
+        (list<string>, boolean): The path found or None, and whether any
+        vertex was left unexpanded because of the limit.
+        """
+        if start_id == target_id:
+            return [start_id], False
+        if depth_limit == 0:
+            return None, any(True for _ in self.iter_neighbor_ids(start_id))
+
+        path = [start_id]
+        on_path = {start_id}
+        # one neighbor iterator per vertex on the path
+        iterators = [iter(self.iter_neighbor_ids(start_id))]
+        cut_off = False
+        stats = get_active_stats(self)
+
+        while iterators:
+            if stats is not None:
+                stats.observe_queue(len(iterators))
+            neighbor_id = next(iterators[-1], None)
+            if neighbor_id is None: # no neighbors left, backtrack
+                iterators.pop()
+                on_path.discard(path.pop())
+                continue
+            if neighbor_id in on_path:
+                continue
+            if neighbor_id == target_id:
+                return path + [neighbor_id], cut_off
+            if len(path) > depth_limit - 1:
+                cut_off = True # there may be more beyond this vertex
+                continue
+
+            path.append(neighbor_id)
+            on_path.add(neighbor_id)
+            iterators.append(iter(self.iter_neighbor_ids(neighbor_id)))
+
+        return None, cut_off
+
+    def iter_simple_paths(self, start_id, target_id, max_length=None):
+        """
+        Lazily generate every simple path (one that repeats no vertex) from
+        start_id to target_id, in depth-first order. Stop iterating to stop
+        the search.
+
+        Before the first path, one reverse BFS from the target finds how far
+        every vertex is from it, so the search never enters a vertex that
+        cannot reach the target within the remaining length. Without a
+        `max_length`, vertices are also blocked as in Johnson's cycle
+        algorithm: a vertex that led nowhere stays blocked until a vertex it
+        depends on is freed, so the time between two paths is O(V + E) rather
+        than exponential. Only the current path and the blocking lists are
+        kept in memory.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+        max_length (integer): If given, only generate paths of at most this
+        many edges.
+
+        Returns:
+        generator: Lists of the vertex ids on each path, from start to end.
+        """
+        if not self.contains_id(start_id) or not self.contains_id(target_id):
+            raise KeyError("One or both vertices are not in the graph!")
+        return self.__iter_simple_paths__(start_id, target_id, max_length)
+
+    def __iter_simple_paths__(self, start_id, target_id, max_length):
+        if start_id == target_id:
+            yield [start_id]
+            return
+
+        # vertex id -> the fewest edges from it to the target
+        distance_to_target = {target_id: 0}
+        queue = deque([target_id])
+        while queue:
+            current_vertex_id = queue.popleft()
+            distance = distance_to_target[current_vertex_id] + 1
+            if max_length is not None and distance > max_length:
                 break
+            for predecessor_id in self.iter_predecessor_ids(current_vertex_id):
+                if predecessor_id not in distance_to_target:
+                    distance_to_target[predecessor_id] = distance
+                    queue.append(predecessor_id)
 
-            # print('Didnt break')
-
-            neighbors = current_vertex_obj.get_neighbors()
-            # print('neighbors', neighbors)
-            for neighbor in neighbors:
-                # if neighbor.get_id() not in vertex_id_to_path:
-                current_path = vertex_id_to_path[current_vertex_id]
-                # extend the path by 1 vertex
-                next_path = current_path + [neighbor.get_id()]
-                vertex_id_to_path[neighbor.get_id()] = next_path
-                stack.append(neighbor)
-                    # print(vertex_id_to_path)
-            
-
-        if target_id not in vertex_id_to_path: # path not found
-            return None
+        if start_id not in distance_to_target:
+            return
 
-        # print('vertex_id_to_path:', vertex_id_to_path)
-        return vertex_id_to_path[target_id]
+        # the vertices on the path, and without a length limit also those
+        # that can't currently reach the target
+        blocked = {start_id}
+        # vertex id -> ids to unblock along with it; stays empty with a limit,
+        # since a vertex too far from the target down one path may be close
+        # enough down a shorter one
+        vertex_to_blocked = dict()
+        path = [start_id]
+        # per vertex on the path: its neighbor iterator, and whether any path
+        # to the target was found through it
+        iterators = [iter(self.iter_neighbor_ids(start_id))]
+        found = [False]
+
+        while iterators:
+            neighbor_id = next(iterators[-1], None)
+            if neighbor_id is None: # no neighbors left, backtrack
+                current_vertex_id = path.pop()
+                iterators.pop()
+                if found.pop() or max_length is not None:
+                    self.__unblock__(current_vertex_id, blocked, vertex_to_blocked)
+                    if found:
+                        found[-1] = True
+                else:
+                    # stay blocked until one of the neighbors is unblocked
+                    for next_id in self.iter_neighbor_ids(current_vertex_id):
+                        if next_id in distance_to_target:
+                            vertex_to_blocked.setdefault(next_id, set()).add(current_vertex_id)
+                continue
+
+            if neighbor_id == target_id:
+                # the path would have len(path) edges when it reaches the target
+                if max_length is None or len(path) <= max_length:
+                    found[-1] = True
+                    yield path + [target_id]
+                continue # a simple path can't go on past the target
+            if neighbor_id in blocked or neighbor_id not in distance_to_target:
+                continue
+            if (max_length is not None
+                    and len(path) + distance_to_target[neighbor_id] > max_length):
+                continue
 
+            blocked.add(neighbor_id)
+            path.append(neighbor_id)
+            iterators.append(iter(self.iter_neighbor_ids(neighbor_id)))
+            found.append(False)
+
+    def __unblock__(self, vertex_id, blocked, vertex_to_blocked):
+        """Unblock a vertex, and every vertex that was waiting on it."""
+        stack = [vertex_id]
+        while stack:
+            current_vertex_id = stack.pop()
+            if current_vertex_id in blocked:
+                blocked.discard(current_vertex_id)
+                stack.extend(vertex_to_blocked.pop(current_vertex_id, ()))
 
     def contains_cycle(self):
         """
-        Return True if the directed graph contains a cycle, False otherwise.
+        Return True if the graph contains a cycle, False otherwise.
         """
-        all_components = self.get_connected_components()
-        if not self.__is_directed:
-            return len(all_components) > 0
-        for component in all_components:
-            all_neighbors = set()
-            for vertex_id in component:
-                all_neighbors.update(
-                    [
-                        vertex.get_id()
-                        for vertex in self.get_vertex(vertex_id).get_neighbors()
-                    ]
-                )
-            starting_points = list(set(component) - all_neighbors)
-            if len(starting_points) == 0:
-                return True
-            for starting_point in starting_points:
-                seen = set()
-                queue = deque()
-                queue.append((None, starting_point))
-                while queue:
-                    parent, curr_vertex_id = queue.pop()
-                    if (parent, curr_vertex_id) in seen:
-                        print("Cycle at:", (parent, curr_vertex_id))
-                        return True
-                    else:
-                        seen.add(curr_vertex_id)
-                        for neighbor in self.get_vertex(curr_vertex_id).get_neighbors():
-                            queue.append((parent, neighbor.get_id()))
-
-        return False
-
-
-    def topological_sort_helper(
-        self, dependencies, parent_priority, curr_vertex_id
-    ):
-        dependencies[curr_vertex_id] = (
-            (
-                dependencies[curr_vertex_id]
-                if dependencies[curr_vertex_id] > parent_priority + 1
-                else parent_priority + 1
-            )
-            if curr_vertex_id in dependencies else parent_priority + 1
-        )
-        for neighbor in self.get_vertex(curr_vertex_id).get_neighbors():
-            self.topological_sort_helper(
-                dependencies,
-                dependencies[curr_vertex_id],
-                neighbor.get_id()
-            )
+        if self.is_directed() and not self.get_sources() and self.get_vertex_ids():
+            return True # every vertex has a predecessor, so walking back must repeat
+        return self.find_cycle() is not None
+
+    def find_cycle(self):
+        """
+        Find one cycle in the graph in O(V + E), without recursion.
+
+        Directed graphs use a three-color depth-first search: reaching a vertex
+        that is still on the current search path closes a cycle. Undirected
+        graphs use a depth-first search that tracks each vertex's parent, since
+        stepping straight back over the edge just used is not a cycle.
+
+        Returns:
+        list<string>: The ids on the cycle, with the first id repeated at the
+        end, or None if the graph is acyclic.
+        """
+        if self.is_directed():
+            return self.__find_directed_cycle__()
+        return self.__find_undirected_cycle__()
+
+    def __find_directed_cycle__(self):
+        # vertices on the current search path -> their position on it; vertices
+        # that are finished are in `done`, anything else is still unvisited
+        path_position = {}
+        path = []
+        done = set()
+
+        for root_id in self.get_vertex_ids():
+            if root_id in done:
+                continue
 
+            path_position[root_id] = 0
+            path.append(root_id)
+            work = [iter(self.iter_neighbor_ids(root_id))]
+
+            while work:
+                descended = False
+                for neighbor_id in work[-1]:
+                    if neighbor_id in path_position:
+                        # back edge to a vertex on the path closes a cycle
+                        cycle = path[path_position[neighbor_id]:]
+                        cycle.append(neighbor_id)
+                        return cycle
+                    if neighbor_id not in done:
+                        path_position[neighbor_id] = len(path)
+                        path.append(neighbor_id)
+                        work.append(iter(self.iter_neighbor_ids(neighbor_id)))
+                        descended = True
+                        break
+                if descended:
+                    continue
+
+                # all neighbors are done, so finish this vertex
+                work.pop()
+                finished_id = path.pop()
+                del path_position[finished_id]
+                done.add(finished_id)
+
+        return None
+
+    def __find_undirected_cycle__(self):
+        vertex_to_parent = {}
+
+        for root_id in self.get_vertex_ids():
+            if root_id in vertex_to_parent:
+                continue
+
+            vertex_to_parent[root_id] = None
+            work = [(root_id, iter(self.iter_neighbor_ids(root_id)))]
+
+            while work:
+                current_id, neighbor_iter = work[-1]
+                descended = False
+                for neighbor_id in neighbor_iter:
+                    if neighbor_id not in vertex_to_parent:
+                        vertex_to_parent[neighbor_id] = current_id
+                        work.append((neighbor_id, iter(self.iter_neighbor_ids(neighbor_id))))
+                        descended = True
+                        break
+                    if (neighbor_id != vertex_to_parent[current_id]
+                            and vertex_to_parent[neighbor_id] != current_id):
+                        # an edge back to an ancestor other than the parent;
+                        # the tree path between them plus this edge is a cycle
+                        cycle = [current_id]
+                        while cycle[-1] != neighbor_id:
+                            cycle.append(vertex_to_parent[cycle[-1]])
+                        cycle.reverse()
+                        cycle.append(neighbor_id)
+                        return cycle
+                if not descended:
+                    work.pop()
+
+        return None
+
+    @instrumented
     def topological_sort(self):
         """
         Return a valid ordering of vertices in a directed acyclic graph.
         If the graph contains a cycle, throw a ValueError.
-        """
-        if self.contains_cycle():
-            raise ValueError("Graph contains a cycle and/or is not a directed graph.")
-        all_components = self.get_connected_components()
-        dependencies = {}
-        for component in all_components:
-            all_neighbors = set()
-            for vertex_id in component:
-                all_neighbors.update(
-                    [
-                        vertex.get_id()
-                        for vertex in self.get_vertex(vertex_id).get_neighbors()
-                    ]
-                )
-            starting_points = list(set(component) - all_neighbors)
-            for starting_point in starting_points:
-                self.topological_sort_helper(dependencies, -1, starting_point)
 
+        Vertices are ordered by level (see `topological_levels`), then by id.
+
+        Returns:
+        list<string>: The vertex ids, each one before all of its neighbors.
+        """
         return [
-            key
-            for key, priority in sorted([
-                (key, dependencies[key])
-                for key in dependencies
-            ], key=itemgetter(1,0))
+            vertex_id
+            for level in self.topological_levels()
+            for vertex_id in level
         ]
-                
 
+    @instrumented
+    def topological_levels(self):
+        """
+        Group the vertices of a directed acyclic graph into levels that can be
+        processed in parallel, using Kahn's algorithm in O(V + E). Level 0 holds
+        the vertices with no incoming edges, and every other vertex is one
+        level below its deepest predecessor, so each level only depends on
+        earlier ones.
+
+        If the graph contains a cycle, throw a CycleError (a ValueError) whose
+        `cycle` attribute holds one offending cycle.
+
+        Returns:
+        list<list<string>>: The levels, each sorted by vertex id.
+        """
+        if not self.is_directed():
+            raise ValueError("Graph contains a cycle and/or is not a directed graph.")
+
+        vertex_ids = self.get_vertex_ids()
+        in_degree = {vertex_id: self.get_in_degree(vertex_id) for vertex_id in vertex_ids}
+
+        levels = []
+        level = self.get_sources()
+        num_sorted = 0
+        stats = get_active_stats(self)
+        while level:
+            if stats is not None:
+                stats.observe_queue(len(level))
+            levels.append(sorted(level))
+            num_sorted += len(level)
+            next_level = []
+            for vertex_id in level:
+                for neighbor_id in self.iter_neighbor_ids(vertex_id):
+                    in_degree[neighbor_id] -= 1
+                    if in_degree[neighbor_id] == 0:
+                        next_level.append(neighbor_id)
+            level = next_level
+
+        if num_sorted < len(vertex_ids):
+            # every vertex left over still has an incoming edge from another
+            # left over vertex, so there is a cycle among them
+            remaining = [vertex_id for vertex_id in vertex_ids if in_degree[vertex_id] > 0]
+            cycle = self.__find_cycle_among__(set(remaining), remaining[0])
+            raise CycleError(cycle)
+
+        return levels
+
+    def __find_cycle_among__(self, remaining, start_id):
+        """
+        Return a cycle within `remaining`, a set of vertex ids in which every
+        vertex has an incoming edge from another vertex of the set.
+
+        Parameters:
+        remaining (set<string>): The vertex ids to search.
+        start_id (string): A vertex id in `remaining` to start from.
+
+        Returns:
+        list<string>: The ids on the cycle, with the first id repeated at the end.
+        """
+        # pick one predecessor per vertex, then walk backward until a vertex
+        # repeats - the repeated stretch of the walk is a cycle
+        vertex_to_predecessor = {}
+        for vertex_id in remaining:
+            for neighbor_id in self.iter_neighbor_ids(vertex_id):
+                if neighbor_id in remaining:
+                    vertex_to_predecessor[neighbor_id] = vertex_id
+
+        walk_position = {}
+        walk = []
+        current_id = start_id
+        while current_id not in walk_position:
+            walk_position[current_id] = len(walk)
+            walk.append(current_id)
+            current_id = vertex_to_predecessor[current_id]
+
+        cycle = walk[walk_position[current_id]:]
+        cycle.reverse() # the walk went backward along the edges
+        cycle.append(cycle[0])
+        return cycle
+
+    @instrumented
+    @cached_query
+    def pagerank(self, damping=0.85, personalization=None, dangling=None, start=None,
+        tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS, weighted=True):
+        """
+        Rank the vertices with PageRank: the share of time a random walker
+        spends at each vertex, if at every step it follows a random outgoing
+        edge with probability `damping` and otherwise jumps to a vertex drawn
+        from `personalization`. Computed by power iteration over a frozen CSR
+        copy of the graph, in O(E) per iteration.
+
+        Parameters:
+        damping (float): The probability of following an edge, from 0 to 1.
+        personalization (dict): A map of vertex id -> weight of jumping to
+        that vertex; missing ids get 0. By default every vertex is equally
+        likely.
+        dangling (dict): A map of vertex id -> weight of moving there from a
+        vertex with no outgoing edges. By default `personalization` is used.
+        start (dict): The scores to start iterating from, such as the result
+        of an earlier call. After a few edge changes this converges in far
+        fewer iterations than starting from scratch.
+        tolerance (float): Stop when the scores change by less than this per
+        vertex (as a sum of absolute changes).
+        max_iterations (integer): Raise ConvergenceError after this many
+        iterations.
+        weighted (boolean): For a weighted graph, follow edges in proportion
+        to their weights rather than uniformly.
+
+        Returns:
+        dict: A map of vertex id -> PageRank; the ranks sum to 1.
+        """
+        return compute_pagerank(
+            self.freeze(), damping, personalization, dangling, start, tolerance,
+            max_iterations, weighted
+        )
+
+    @instrumented
+    @cached_query
+    def eigenvector_centrality(self, start=None, tolerance=DEFAULT_TOLERANCE,
+        max_iterations=DEFAULT_MAX_ITERATIONS, weighted=True):
+        """
+        Score every vertex by eigenvector centrality: a vertex is as central
+        as the sum of the centralities of the vertices with edges to it. The
+        scores are the principal eigenvector of the adjacency matrix,
+        computed by power iteration over a frozen CSR copy of the graph.
+
+        Parameters:
+        start (dict): The scores to start iterating from, such as the result
+        of an earlier call.
+        tolerance (float): Stop when the scores change by less than this per
+        vertex (as a sum of absolute changes).
+        max_iterations (integer): Raise ConvergenceError after this many
+        iterations.
+        weighted (boolean): For a weighted graph, scale each edge's
+        contribution by its weight.
+
+        Returns:
+        dict: A map of vertex id -> centrality, scaled to a Euclidean norm of 1.
+        """
+        return compute_eigenvector_centrality(
+            self.freeze(), start, tolerance, max_iterations, weighted
+        )
+
+    @instrumented
+    @cached_query
+    def katz_centrality(self, alpha=0.1, beta=1.0, start=None, tolerance=DEFAULT_TOLERANCE,
+        max_iterations=DEFAULT_MAX_ITERATIONS, normalized=True, weighted=True):
+        """
+        Score every vertex by Katz centrality: `beta` plus `alpha` times the
+        sum of the centralities of the vertices with edges to it, which counts
+        the walks ending at each vertex, with a walk of length k weighted by
+        alpha^k. Unlike eigenvector centrality it gives vertices outside the
+        strongly connected core a non-zero score.
+
+        Parameters:
+        alpha (float): The attenuation factor. The iteration only converges if
+        it is less than 1 / (largest eigenvalue of the adjacency matrix).
+        beta (number or dict): The base score of every vertex, or a map of
+        vertex id -> base score (missing ids get 0).
+        start (dict): The scores to start iterating from, such as the result
+        of an earlier call; a normalized start is rescaled to fit.
+        tolerance (float): Stop when the scores change by less than this per
+        vertex (as a sum of absolute changes).
+        max_iterations (integer): Raise ConvergenceError after this many
+        iterations.
+        normalized (boolean): Scale the scores to a Euclidean norm of 1.
+        weighted (boolean): For a weighted graph, scale each edge's
+        contribution by its weight.
+
+        Returns:
+        dict: A map of vertex id -> centrality.
+        """
+        return compute_katz_centrality(
+            self.freeze(), alpha, beta, start, tolerance, max_iterations, normalized, weighted
+        )
+
+    @instrumented
+    @cached_query
+    def betweenness_centrality(self, normalized=True, sample_size=None, seed=None,
+        workers=None, chunk_size=None, weighted=True):
+        """
+        Score every vertex by betweenness centrality: the fraction of shortest
+        paths between other pairs of vertices that pass through it. Uses
+        Brandes' algorithm, one BFS (or, on a weighted graph, one run of
+        Dijkstra's Algorithm) per source vertex, in O(VE) for an unweighted
+        graph. The sources can be spread over a pool of worker processes.
+
+        Parameters:
+        normalized (boolean): Divide by the number of pairs of other vertices,
+        so scores are between 0 and 1.
+        sample_size (integer): If given, only search from this many randomly
+        chosen source vertices and scale the result up, estimating the
+        scores in a fraction of the time.
+        seed (integer): The random seed for choosing the sampled sources.
+        workers (integer): The number of worker processes, by default one per
+        CPU. With 1 worker the searches run in this process.
+        chunk_size (integer): How many sources each worker task handles, by
+        default about four tasks per worker.
+        weighted (boolean): For a weighted graph, use the edge weights as path
+        lengths rather than counting edges.
+
+        Returns:
+        dict: A map of vertex id -> betweenness centrality.
+        """
+        vertex_ids = self.get_vertex_ids()
+        num_vertices = len(vertex_ids)
+        if sample_size is not None and sample_size < 1:
+            raise ValueError("sample_size must be at least 1")
+        if sample_size is None or sample_size >= num_vertices:
+            source_ids = vertex_ids
+        else:
+            source_ids = random.Random(seed).sample(vertex_ids, sample_size)
+
+        betweenness = run_betweenness(self, source_ids, weighted, workers, chunk_size)
+
+        if normalized:
+            # by the number of ordered pairs of other vertices; an undirected
+            # path is found from both of its ends, so it was counted twice too
+            scale = 1 / ((num_vertices - 1) * (num_vertices - 2)) if num_vertices > 2 else None
+        else:
+            scale = None if self.__is_directed else 0.5
+        if len(source_ids) < num_vertices:
+            scale = (scale or 1) * num_vertices / len(source_ids)
+        if scale is not None:
+            for vertex_id in betweenness:
+                betweenness[vertex_id] *= scale
+        return betweenness
+
+    def __dependencies_from__(self, source_ids, weighted):
+        """
+        Sum the dependencies of every vertex on the shortest paths from each
+        of `source_ids`: how many of those paths pass through it, where a
+        path shared by several equally short routes counts fractionally.
+
+        Returns:
+        dict: A map of vertex id -> summed dependency, for the vertices that
+        have any.
+        """
+        dependencies = {}
+        for source_id in source_ids:
+            order, vertex_to_parents, path_counts = self.__shortest_path_dag__(
+                source_id, weighted
+            )
+            # walk back from the farthest vertices, passing each vertex's
+            # dependency to its parents in proportion to their path counts
+            vertex_to_dependency = dict.fromkeys(order, 0.0)
+            for vertex_id in reversed(order):
+                dependency = vertex_to_dependency[vertex_id]
+                share = (1 + dependency) / path_counts[vertex_id]
+                for parent_id in vertex_to_parents[vertex_id]:
+                    vertex_to_dependency[parent_id] += path_counts[parent_id] * share
+                if dependency and vertex_id != source_id:
+                    dependencies[vertex_id] = dependencies.get(vertex_id, 0.0) + dependency
+        return dependencies
+
+    def __shortest_path_dag__(self, source_id, weighted):
+        """
+        Find every shortest path from `source_id` with a BFS, for Brandes'
+        algorithm.
+
+        Returns:
+        (list<string>, dict, dict): The reached vertex ids in order of
+        distance, a map of vertex id -> the ids before it on its shortest
+        paths, and a map of vertex id -> the number of shortest paths to it.
+        """
+        order = []
+        vertex_to_distance = {source_id: 0}
+        vertex_to_parents = {source_id: []}
+        path_counts = {source_id: 1}
+        # this loop runs once per edge per source, so look methods up once
+        get_distance = vertex_to_distance.get
+        iter_neighbor_ids = self.iter_neighbor_ids
+
+        queue = deque([source_id])
+        while queue:
+            current_vertex_id = queue.popleft()
+            order.append(current_vertex_id)
+            next_distance = vertex_to_distance[current_vertex_id] + 1
+            current_count = path_counts[current_vertex_id]
+
+            for neighbor_id in iter_neighbor_ids(current_vertex_id):
+                neighbor_distance = get_distance(neighbor_id)
+                if neighbor_distance is None:
+                    vertex_to_distance[neighbor_id] = next_distance
+                    vertex_to_parents[neighbor_id] = [current_vertex_id]
+                    path_counts[neighbor_id] = current_count
+                    queue.append(neighbor_id)
+                elif neighbor_distance == next_distance:
+                    vertex_to_parents[neighbor_id].append(current_vertex_id)
+                    path_counts[neighbor_id] += current_count
+
+        return order, vertex_to_parents, path_counts
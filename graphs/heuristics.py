@@ -0,0 +1,68 @@
+import math
+
+# Mean radius of the Earth, in kilometres
+EARTH_RADIUS_KM = 6371.0088
+
+
+def euclidean(position1, position2):
+    """
+    Return the straight line distance between two points.
+
+    Parameters:
+    position1 (tuple<number>): The coordinates of the first point.
+    position2 (tuple<number>): The coordinates of the second point, with as
+    many dimensions as the first.
+
+    Returns:
+    float: The Euclidean distance.
+    """
+    return math.dist(position1, position2)
+
+
+def manhattan(position1, position2):
+    """
+    Return the sum of the absolute coordinate differences between two
+    points, the distance when moving along grid lines only.
+
+    Parameters:
+    position1 (tuple<number>): The coordinates of the first point.
+    position2 (tuple<number>): The coordinates of the second point, with as
+    many dimensions as the first.
+
+    Returns:
+    number: The Manhattan distance.
+    """
+    return sum(abs(a - b) for a, b in zip(position1, position2))
+
+
+def haversine(position1, position2, radius=EARTH_RADIUS_KM):
+    """
+    Return the great circle distance between two points on a sphere.
+
+    Parameters:
+    position1 ((number, number)): The (latitude, longitude) of the first
+    point, in degrees.
+    position2 ((number, number)): The (latitude, longitude) of the second
+    point, in degrees.
+    radius (number): The radius of the sphere, by default the Earth's in
+    kilometres; the distance is in the same unit.
+
+    Returns:
+    float: The great circle distance.
+    """
+    latitude1, longitude1 = map(math.radians, position1)
+    latitude2, longitude2 = map(math.radians, position2)
+    a = (
+        math.sin((latitude2 - latitude1) / 2) ** 2
+        + math.cos(latitude1) * math.cos(latitude2)
+        * math.sin((longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * radius * math.asin(min(1.0, math.sqrt(a)))
+
+
+# The built-in A* heuristics, by the name WeightedGraph.astar accepts
+HEURISTICS = {
+    'euclidean': euclidean,
+    'manhattan': manhattan,
+    'haversine': haversine,
+}
@@ -0,0 +1,127 @@
+class IndexedHeap(object):
+    """
+    A binary min-heap of hashable keys with priorities, which tracks where
+    every key sits in the heap so that a key's priority can be lowered in
+    place (decrease-key) in O(log n) instead of pushing a duplicate entry.
+    """
+
+    def __init__(self):
+        """Initialize an empty heap."""
+        self.__keys = [] # heap-ordered keys
+        self.__priorities = {} # key -> priority
+        self.__positions = {} # key -> index in self.__keys
+
+    def __len__(self):
+        """Return the number of keys in the heap."""
+        return len(self.__keys)
+
+    def __contains__(self, key):
+        return key in self.__positions
+
+    def get_priority(self, key):
+        """Return the current priority of `key`."""
+        return self.__priorities[key]
+
+    def push(self, key, priority):
+        """
+        Add `key` with the given priority.
+
+        Parameters:
+        key (hashable): The key to add. It must not already be in the heap.
+        priority (number): The priority of the key; smaller pops first.
+        """
+        if key in self.__positions:
+            raise KeyError("Key is already in the heap!")
+        self.__priorities[key] = priority
+        self.__positions[key] = len(self.__keys)
+        self.__keys.append(key)
+        self.__sift_up__(len(self.__keys) - 1)
+
+    def decrease_key(self, key, priority):
+        """
+        Lower the priority of `key` if `priority` is smaller than its current one.
+
+        Parameters:
+        key (hashable): A key in the heap.
+        priority (number): The new priority.
+
+        Returns:
+        boolean: True if the priority was lowered, False otherwise.
+        """
+        if priority >= self.__priorities[key]:
+            return False
+        self.__priorities[key] = priority
+        self.__sift_up__(self.__positions[key])
+        return True
+
+    def push_or_decrease(self, key, priority):
+        """
+        Add `key` if it is not in the heap, otherwise lower its priority.
+
+        Returns:
+        boolean: True if the key was added or its priority lowered.
+        """
+        if key not in self.__positions:
+            self.push(key, priority)
+            return True
+        return self.decrease_key(key, priority)
+
+    def pop(self):
+        """
+        Remove and return the key with the smallest priority.
+
+        Returns:
+        (hashable, number): The key and its priority.
+        """
+        keys = self.__keys
+        if not keys:
+            raise IndexError("pop from an empty heap")
+        top_key = keys[0]
+        last_key = keys.pop()
+        if keys:
+            keys[0] = last_key
+            self.__positions[last_key] = 0
+            self.__sift_down__(0)
+        del self.__positions[top_key]
+        return top_key, self.__priorities.pop(top_key)
+
+    def __sift_up__(self, position):
+        keys = self.__keys
+        priorities = self.__priorities
+        positions = self.__positions
+        key = keys[position]
+        priority = priorities[key]
+        while position > 0:
+            parent_position = (position - 1) >> 1
+            parent_key = keys[parent_position]
+            if priorities[parent_key] <= priority:
+                break
+            keys[position] = parent_key
+            positions[parent_key] = position
+            position = parent_position
+        keys[position] = key
+        positions[key] = position
+
+    def __sift_down__(self, position):
+        keys = self.__keys
+        priorities = self.__priorities
+        positions = self.__positions
+        size = len(keys)
+        key = keys[position]
+        priority = priorities[key]
+        while True:
+            child_position = 2 * position + 1
+            if child_position >= size:
+                break
+            right_position = child_position + 1
+            if (right_position < size
+                    and priorities[keys[right_position]] < priorities[keys[child_position]]):
+                child_position = right_position
+            child_key = keys[child_position]
+            if priorities[child_key] >= priority:
+                break
+            keys[position] = child_key
+            positions[child_key] = position
+            position = child_position
+        keys[position] = key
+        positions[key] = position
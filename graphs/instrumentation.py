@@ -0,0 +1,215 @@
+import contextvars
+import logging
+import time
+from functools import wraps
+
+# The (graph, AlgorithmStats) of the instrumented call running in the current
+# thread (or asyncio task), or None. Being a context variable, it is never
+# seen by calls running at the same time elsewhere. The graph's neighbor and
+# predecessor lookups check it and count into the stats while it is set.
+ACTIVE_STATS = contextvars.ContextVar('active_stats', default=None)
+
+
+class AlgorithmStats(object):
+    """
+    The counters gathered during one run of an instrumented algorithm.
+
+    vertices_visited: how many times a vertex's neighbors were scanned.
+    edges_scanned: how many (vertex, neighbor) entries were read.
+    queue_peak: the largest size the algorithm's queue, stack, heap or
+    frontier reached, or 0 if it doesn't keep one.
+    wall_time: the time the call took, in seconds.
+    """
+
+    __slots__ = ('algorithm', 'vertices_visited', 'edges_scanned', 'queue_peak', 'wall_time')
+
+    def __init__(self, algorithm):
+        """
+        Parameters:
+        algorithm (string): The name of the method being measured.
+        """
+        self.algorithm = algorithm
+        self.vertices_visited = 0
+        self.edges_scanned = 0
+        self.queue_peak = 0
+        self.wall_time = 0.0
+
+    def __repr__(self):
+        return 'AlgorithmStats({})'.format(
+            ', '.join('{}={!r}'.format(name, value) for name, value in self.to_dict().items())
+        )
+
+    def merge(self, counts):
+        """
+        Add the counters of work done elsewhere, such as in a worker process.
+
+        Parameters:
+        counts (dict): vertices_visited, edges_scanned and queue_peak, as
+        returned by `to_dict`.
+        """
+        self.vertices_visited += counts['vertices_visited']
+        self.edges_scanned += counts['edges_scanned']
+        self.observe_queue(counts['queue_peak'])
+
+    def observe_queue(self, size):
+        """Record the current size of the algorithm's queue."""
+        if size > self.queue_peak:
+            self.queue_peak = size
+
+    def to_dict(self):
+        """Return the counters as a dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class StatsRecorder(object):
+    """
+    A sink that keeps every AlgorithmStats it receives, for inspection in
+    tests or at the end of a request.
+    """
+
+    def __init__(self):
+        self.__records = []
+
+    def __call__(self, stats):
+        self.__records.append(stats)
+
+    def get_records(self):
+        """Return the recorded stats, oldest first."""
+        return list(self.__records)
+
+    def clear(self):
+        """Forget every recorded stats object."""
+        self.__records = []
+
+    def summary(self):
+        """
+        Return the totals per algorithm.
+
+        Returns:
+        dict: algorithm name -> dict of calls, vertices_visited,
+        edges_scanned, the largest queue_peak and the summed wall_time.
+        """
+        totals = {}
+        for stats in self.__records:
+            total = totals.setdefault(stats.algorithm, {
+                'calls': 0, 'vertices_visited': 0, 'edges_scanned': 0,
+                'queue_peak': 0, 'wall_time': 0.0,
+            })
+            total['calls'] += 1
+            total['vertices_visited'] += stats.vertices_visited
+            total['edges_scanned'] += stats.edges_scanned
+            total['queue_peak'] = max(total['queue_peak'], stats.queue_peak)
+            total['wall_time'] += stats.wall_time
+        return totals
+
+
+class LoggingSink(object):
+    """A sink that writes every AlgorithmStats to a logger."""
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        """
+        Parameters:
+        logger (logging.Logger): The logger to write to, by default this
+        module's logger.
+        level (integer): The logging level of the messages.
+        """
+        self.__logger = logger if logger is not None else logging.getLogger(__name__)
+        self.__level = level
+
+    def __call__(self, stats):
+        self.__logger.log(
+            self.__level, '%s: %d vertices visited, %d edges scanned, queue peak %d, %.6fs',
+            stats.algorithm, stats.vertices_visited, stats.edges_scanned,
+            stats.queue_peak, stats.wall_time
+        )
+
+
+def get_active_stats(graph):
+    """
+    Return the AlgorithmStats of the instrumented call running on `graph` in
+    the current context, or None if there isn't one.
+    """
+    active = ACTIVE_STATS.get()
+    if active is None or active[0] is not graph:
+        return None
+    return active[1]
+
+
+def count_lookup(graph, neighbors):
+    """
+    Count a neighbor (or predecessor) lookup on `graph` into the stats of the
+    instrumented call running on it, if any.
+
+    Parameters:
+    graph (Graph): The graph the lookup was made on.
+    neighbors (iterable): What the lookup found.
+
+    Returns:
+    iterable: `neighbors`, or an iterator over them that counts each one.
+    """
+    stats = get_active_stats(graph)
+    if stats is None:
+        return neighbors
+    stats.vertices_visited += 1
+    return _count_neighbors(neighbors, stats)
+
+
+def _count_neighbors(neighbors, stats):
+    for neighbor in neighbors:
+        stats.edges_scanned += 1
+        yield neighbor
+
+
+def measure(graph, stats, function, *args, **kwargs):
+    """
+    Call `function(*args, **kwargs)` with `stats` as the active stats of
+    `graph`, so the lookups it makes on `graph` count into them.
+    """
+    token = ACTIVE_STATS.set((graph, stats))
+    try:
+        return function(*args, **kwargs)
+    finally:
+        ACTIVE_STATS.reset(token)
+
+
+def unmeasured(function, *args, **kwargs):
+    """
+    Call `function(*args, **kwargs)` without counting its lookups towards
+    the instrumented call in progress, e.g. to copy the graph.
+    """
+    token = ACTIVE_STATS.set(None)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        ACTIVE_STATS.reset(token)
+
+
+def instrumented(method):
+    """
+    Decorate a graph algorithm so that, while the graph has an
+    instrumentation sink, each call is measured and its AlgorithmStats sent
+    to the sink. Without a sink the only cost is one None check per call,
+    plus one per neighbor lookup and per expanded vertex in the algorithms
+    that track a queue.
+
+    Calls made on the same graph from inside another instrumented algorithm
+    count towards the outer call. The active stats live in a context
+    variable, so calls in other threads are measured separately.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        sink = self.get_instrumentation_sink()
+        if sink is None or get_active_stats(self) is not None:
+            return method(self, *args, **kwargs)
+
+        stats = AlgorithmStats(name)
+        start = time.perf_counter()
+        try:
+            return measure(self, stats, method, self, *args, **kwargs)
+        finally:
+            stats.wall_time = time.perf_counter() - start
+            sink(stats)
+
+    return wrapper
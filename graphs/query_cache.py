@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from functools import wraps
+
+
+class QueryCache(object):
+    """
+    A size-bounded, least-recently-used cache of query results. Every entry
+    remembers the graph version it was computed at, and an entry from an
+    older version is treated as a miss and dropped when it is looked up.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+        maxsize (integer): The most entries to keep before evicting the least
+        recently used one.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.__maxsize = maxsize
+        self.__entries = OrderedDict() # key -> (version, result)
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+
+    def __len__(self):
+        """Return the number of entries in the cache."""
+        return len(self.__entries)
+
+    def lookup(self, key, version):
+        """
+        Look up the result stored for `key`.
+
+        Parameters:
+        key (hashable): The query key.
+        version (integer): The current version of the graph.
+
+        Returns:
+        (boolean, object): Whether a current result was found, and the result.
+        """
+        entry = self.__entries.get(key)
+        if entry is not None:
+            if entry[0] == version:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return True, entry[1]
+            # computed before the graph last changed
+            del self.__entries[key]
+            self.__invalidations += 1
+        self.__misses += 1
+        return False, None
+
+    def store(self, key, version, result):
+        """
+        Store the result for `key`, evicting the least recently used entry if
+        the cache is full.
+
+        Parameters:
+        key (hashable): The query key.
+        version (integer): The version of the graph the result was computed at.
+        result (object): The query result.
+        """
+        self.__entries[key] = (version, result)
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__maxsize:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+    def clear(self):
+        """Remove every entry. The statistics are kept."""
+        self.__entries.clear()
+
+    def get_stats(self):
+        """
+        Return the cache statistics.
+
+        Returns:
+        dict: hits, misses, evictions (entries dropped to make room),
+        invalidations (stale entries dropped), size and maxsize.
+        """
+        return {
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions,
+            'invalidations': self.__invalidations,
+            'size': len(self.__entries),
+            'maxsize': self.__maxsize,
+        }
+
+
+def cached_query(method):
+    """
+    Decorate a read-only graph method so that, while the graph's query cache
+    is enabled, its results are cached by method name and arguments. With the
+    cache disabled the only cost is one None check.
+
+    Cached results are shared between callers and must not be modified.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.get_query_cache()
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            found, result = cache.lookup(key, self.get_version())
+        except TypeError: # unhashable arguments can't be cached
+            return method(self, *args, **kwargs)
+        if not found:
+            result = method(self, *args, **kwargs)
+            cache.store(key, self.get_version(), result)
+        return result
+
+    return wrapper
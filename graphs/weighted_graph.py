@@ -1,16 +1,33 @@
+from heapq import heappop, heappush
+from itertools import count
+
+from graphs.disjoint_set import DisjointSet
 from graphs.graph import Graph, Vertex
+from graphs.heuristics import HEURISTICS
+from graphs.indexed_heap import IndexedHeap
+from graphs.instrumentation import ACTIVE_STATS, count_lookup, instrumented
+from graphs.query_cache import cached_query
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, plain lists are used without it
+    np = None
+
+NO_PREDECESSOR = -1
 
 
 class WeightedVertex(Vertex):
 
+    __slots__ = ('__weights_dict',)
+
     def __init__(self, vertex_id):
         """
         Initialize a vertex and its neighbors dictionary.
         Parameters:
         vertex_id (string): A unique identifier to identify this vertex.
         """
-        self.id = vertex_id
-        self.neighbors_dict = {}  # id -> (obj, weight)
+        super().__init__(vertex_id)
+        self.__weights_dict = {}  # id -> weight, in the same order as the neighbors
 
     def add_neighbor(self, vertex_obj, weight):
         """
@@ -18,28 +35,95 @@ class WeightedVertex(Vertex):
         Parameters:
         vertex_obj (Vertex): An instance of Vertex to be stored as a neighbor.
         weight (number): The weight of this edge.
+
+        Returns:
+        boolean: True if the neighbor was added, False if it already was one.
         """
-        if vertex_obj.get_id() in self.neighbors_dict.keys():
-            return  # it's already a neighbor
+        if not super().add_neighbor(vertex_obj):
+            return False  # it's already a neighbor
+        self.__weights_dict[vertex_obj.get_id()] = weight
+        return True
 
-        self.neighbors_dict[vertex_obj.get_id()] = (vertex_obj, weight)
+    def remove_neighbor(self, vertex_id):
+        """
+        Remove the neighbor with id `vertex_id`, if it is one.
 
-    def get_neighbors(self):
-        """Return the neighbors of this vertex."""
-        return [neighbor for (neighbor, weight) in self.neighbors_dict.values()]
+        Returns:
+        boolean: True if the neighbor was removed, False if it wasn't a neighbor.
+        """
+        self.__weights_dict.pop(vertex_id, None)
+        return super().remove_neighbor(vertex_id)
 
     def get_neighbors_with_weights(self):
-        """Return the neighbors of this vertex."""
-        return list(self.neighbors_dict.values())
+        """Return the neighbors of this vertex along with the edge weights."""
+        return list(zip(self.iter_neighbors(), self.__weights_dict.values()))
+
+    def iter_neighbor_ids_with_weights(self):
+        """Return a read-only view of (neighbor id, weight) pairs, without copying."""
+        return self.__weights_dict.items()
 
-    def get_id(self):
-        """Return the id of this vertex."""
-        return self.id
+
+class AllPairsShortestPaths(object):
+    """
+    The result of an all-pairs shortest path search: a V x V distance matrix,
+    and optionally a predecessor matrix, indexed by dense vertex index.
+    """
+
+    def __init__(self, vertex_ids, distances, predecessors=None):
+        """
+        Parameters:
+        vertex_ids (list<string>): The vertex ids, in matrix index order.
+        distances (matrix): `distances[i][j]` is the shortest distance from
+        vertex i to vertex j (a NumPy array, or a list of lists).
+        predecessors (matrix): `predecessors[i][j]` is the index of the vertex
+        before j on the shortest path from i, or NO_PREDECESSOR.
+        """
+        self.vertex_ids = vertex_ids
+        self.index = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+        self.distances = distances
+        self.predecessors = predecessors
+
+    def get_distance(self, start_id, target_id):
+        """Return the shortest distance from start_id to target_id."""
+        return self.distances[self.index[start_id]][self.index[target_id]]
+
+    def get_path(self, start_id, target_id):
+        """
+        Return the vertex ids on the shortest path from start_id to target_id,
+        or None if there is no path.
+        """
+        if self.predecessors is None:
+            raise ValueError("Predecessors were not computed for these paths.")
+        start_index = self.index[start_id]
+        current_index = self.index[target_id]
+        if self.distances[start_index][current_index] == WeightedGraph.INFINITY:
+            return None
+
+        path = [target_id]
+        while current_index != start_index:
+            current_index = int(self.predecessors[start_index][current_index])
+            path.append(self.vertex_ids[current_index])
+        path.reverse()
+        return path
+
+    def to_dict(self):
+        """
+        Return the distances as a nested dictionary of
+        start id -> target id -> distance.
+        """
+        rows = self.distances.tolist() if np is not None else self.distances
+        return {
+            start_id: dict(zip(self.vertex_ids, rows[i]))
+            for i, start_id in enumerate(self.vertex_ids)
+        }
 
 
 class WeightedGraph(Graph):
 
     INFINITY = float('inf')
+    VERTEX_CLASS = WeightedVertex
+    # The number of fields in an edge tuple: (vertex id, vertex id, weight)
+    EDGE_SIZE = 3
 
     def __init__(self, is_directed=True):
         """
@@ -47,8 +131,7 @@ class WeightedGraph(Graph):
         Parameters:
         is_directed (boolean): Whether the graph is directed (edges go in only one direction).
         """
-        self.vertex_dict = {}
-        self.is_directed = is_directed
+        super().__init__(is_directed)
 
     def add_vertex(self, vertex_id):
         """
@@ -58,19 +141,11 @@ class WeightedGraph(Graph):
         Returns:
         Vertex: The new vertex object.
         """
-        if vertex_id in self.vertex_dict.keys():
+        if self.contains_id(vertex_id):
             return False  # it's already there
-        vertex_obj = WeightedVertex(vertex_id)
-        self.vertex_dict[vertex_id] = vertex_obj
+        super().add_vertex(vertex_id)
         return True
 
-    def get_vertex(self, vertex_id):
-        """Return the vertex if it exists."""
-        if vertex_id not in self.vertex_dict.keys():
-            return None
-        vertex_obj = self.vertex_dict[vertex_id]
-        return vertex_obj
-
     def add_edge(self, vertex_id1, vertex_id2, weight):
         """
         Add an edge from vertex with id `vertex_id1` to vertex with id `vertex_id2`.
@@ -79,162 +154,541 @@ class WeightedGraph(Graph):
         vertex_id2 (string): The unique identifier of the second vertex.
         weight (number): The edge weight.
         """
-        all_ids = self.vertex_dict.keys()
-        if vertex_id1 not in all_ids or vertex_id2 not in all_ids:
+        if not self.contains_id(vertex_id1) or not self.contains_id(vertex_id2):
             return False
         vertex_obj1 = self.get_vertex(vertex_id1)
+        if vertex_id2 in vertex_obj1.iter_neighbor_ids():
+            return  # it's already there, keeping its first weight
         vertex_obj2 = self.get_vertex(vertex_id2)
         vertex_obj1.add_neighbor(vertex_obj2, weight)
-        if not self.is_directed:
+        if not self.is_directed():
             vertex_obj2.add_neighbor(vertex_obj1, weight)
+        self.__edge_added__(vertex_id1, vertex_id2)
 
-    def get_vertices(self):
-        """Return all the vertices in the graph"""
-        return list(self.vertex_dict.values())
+    def get_neighbor_ids_with_weights(self, vertex_id):
+        """
+        Return (neighbor id, weight) pairs for the vertex with id `vertex_id`.
+        Parameters:
+        vertex_id (string): The unique identifier of the vertex.
+        Returns:
+        List<(string, number)>: The adjacent vertex ids and edge weights.
+        """
+        return list(self.iter_neighbor_ids_with_weights(vertex_id))
+
+    def iter_neighbor_ids_with_weights(self, vertex_id):
+        """
+        Return a read-only view of the (neighbor id, weight) pairs for the
+        vertex with id `vertex_id`, without copying them into a list.
+        Parameters:
+        vertex_id (string): The unique identifier of the vertex.
+        Returns:
+        Iterable<(string, number)>: The adjacent vertex ids and edge weights.
+        """
+        neighbors = self.get_vertex(vertex_id).iter_neighbor_ids_with_weights()
+        if ACTIVE_STATS.get() is not None:
+            return count_lookup(self, neighbors)
+        return neighbors
+
+    def freeze(self):
+        """
+        Return a compact, read-only CSR copy of this graph, including the
+        edge weights.
+        Returns:
+        WeightedCSRGraph: A frozen copy of this graph.
+        """
+        from graphs.csr_graph import WeightedCSRGraph
+        return WeightedCSRGraph.from_graph(self)
 
     def __iter__(self):
         """Iterate over the vertex objects in the graph, to use sytax:
         for vertex in graph"""
-        return iter(self.vertex_dict.values())
-
-    def union(self, parent_map, vertex_id1, vertex_id2):
-        """Combine vertex_id1 and vertex_id2 into the same group."""
-        vertex1_root = self.find(parent_map, vertex_id1)
-        vertex2_root = self.find(parent_map, vertex_id2)
-        parent_map[vertex1_root] = vertex2_root
-
-    def find(self, parent_map, vertex_id):
-        """Get the root (or, group label) for vertex_id."""
-        if (parent_map[vertex_id] == vertex_id):
-            return vertex_id
-        return self.find(parent_map, parent_map[vertex_id])
+        return iter(self.get_vertices())
 
+    @instrumented
     def minimum_spanning_tree_kruskal(self):
         """
         Use Kruskal's Algorithm to return a list of edges, as tuples of 
         (start_id, dest_id, weight) in the graph's minimum spanning tree.
-        """
-        # Create a list of all edges in the graph, sort them by weight
-        # from smallest to largest
-        edges = list()
-        seen_edges = set()
-        for vertex_obj in self.get_vertices():
-            for neighbor_obj in vertex_obj.get_neighbors_with_weights():
-                neighbor, weight = neighbor_obj
-                vertex_id = vertex_obj.get_id()
-                neighbor_id = neighbor.get_id()
-                if (vertex_id, neighbor_id) not in seen_edges and (neighbor_id, vertex_id) not in seen_edges:
-                    edges.append((weight, vertex_id, neighbor_id))
-                    seen_edges.add((vertex_id, neighbor_id))
-        edges = sorted(edges)
-
-        parent_map = dict()
-        for vertex in self.vertex_dict:
-            parent_map[vertex] = vertex
 
+        The edges are sorted by weight once (with a NumPy argsort when NumPy
+        is available) and joined through a DisjointSet over dense vertex
+        indices. The search stops as soon as V - 1 edges are taken; on a
+        disconnected graph it returns a minimum spanning forest.
+        """
+        vertex_ids = self.get_vertex_ids()
+        id_to_index = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+        is_directed = self.is_directed()
+
+        # Create flat lists of all edges in the graph. An undirected edge is
+        # stored from both ends, so only keep it from its lower index end.
+        edge_starts = list()
+        edge_ends = list()
+        edge_weights = list()
+        for i, vertex_id in enumerate(vertex_ids):
+            for neighbor_id, weight in self.iter_neighbor_ids_with_weights(vertex_id):
+                j = id_to_index[neighbor_id]
+                if i < j or (is_directed and i != j):
+                    edge_starts.append(i)
+                    edge_ends.append(j)
+                    edge_weights.append(weight)
+
+        # Sort them by weight from smallest to largest
+        if np is not None:
+            order = np.argsort(np.asarray(edge_weights), kind='stable').tolist()
+        else:
+            order = sorted(range(len(edge_weights)), key=edge_weights.__getitem__)
+
+        components = DisjointSet(len(vertex_ids))
         spanning_tree = list()
-        index = 0
-        while len(spanning_tree) < len(self.get_vertices()) - 1:
-            weight, v1, v2 = edges[index]
-            if self.find(parent_map, v1) != self.find(parent_map, v2):
-                spanning_tree.append((v1, v2, weight))
-                self.union(parent_map, v1, v2)
-            else:
-                index += 1
+        max_edges = len(vertex_ids) - 1
+        for edge_index in order:
+            if len(spanning_tree) >= max_edges:
+                break
+            start, end = edge_starts[edge_index], edge_ends[edge_index]
+            if components.union(start, end):
+                spanning_tree.append(
+                    (vertex_ids[start], vertex_ids[end], edge_weights[edge_index])
+                )
 
         # Return the solution list.
         return spanning_tree
 
-    def minimum_spanning_tree_prim(self):
-        vertex_to_weight = {}
-        vertices = self.vertex_dict
-        for vertex in vertices:
-            vertex_to_weight[vertex] = WeightedGraph.INFINITY
+    @instrumented
+    def minimum_spanning_tree_prim(self, lazy=True):
+        """
+        Use Prim's Algorithm to return the minimum spanning tree of the graph,
+        in O(E log V). If the graph is disconnected, a tree is grown from every
+        component, giving a minimum spanning forest.
 
-        current_id = list(self.vertex_dict.keys())[0]
-        vertex_to_weight[current_id] = 0
+        Parameters:
+        lazy (boolean): If True, push a new heap entry whenever a cheaper edge
+        to a vertex is found and skip stale entries when popped. If False, use
+        an indexed heap that lowers the vertex's key in place, keeping the heap
+        at no more than V entries.
 
+        Returns:
+        (list, number): The tree edges, as tuples of (start_id, dest_id, weight)
+        in the order they were added, and the total weight of the tree.
+        """
+        in_tree = set()
+        spanning_tree = list()
         mst_weight = 0
 
-        while len(vertex_to_weight)-1 > 0:
-            current_obj = self.get_vertex(current_id)
-            neighbors = current_obj.get_neighbors_with_weights()
-            vertex_to_weight.pop(current_id)
-
-            for neighbor in neighbors:
-                neighbor_id, neighbor_weight = neighbor[0].get_id(
-                ), neighbor[1]
-                if neighbor_id in vertex_to_weight:
-                    if neighbor_weight < vertex_to_weight[neighbor_id]:
-                        vertex_to_weight[neighbor_id] = neighbor_weight
-
-            min_weight = WeightedGraph.INFINITY
-            min_id = None
-            for v_id, v_weight in zip(vertex_to_weight.keys(), vertex_to_weight.values()):
-                v_weight = vertex_to_weight[v_id]
-                if v_weight < min_weight:
-                    min_weight = v_weight
-                    min_id = v_id
-            mst_weight += min_weight
-            current_id = min_id
-
-        return mst_weight
+        for root_id in self.get_vertex_ids():
+            if root_id in in_tree:
+                continue
+            if lazy:
+                tree_edges = self.__grow_prim_tree_lazy__(root_id, in_tree)
+            else:
+                tree_edges = self.__grow_prim_tree_indexed__(root_id, in_tree)
+            for edge in tree_edges:
+                spanning_tree.append(edge)
+                mst_weight += edge[2]
+
+        return spanning_tree, mst_weight
 
+    def __grow_prim_tree_lazy__(self, root_id, in_tree):
+        """
+        Grow a minimum spanning tree from root_id with a lazy-deletion heap,
+        adding its vertices to `in_tree` and yielding its edges.
+        """
+        # (weight, tie breaker, vertex id, parent id)
+        counter = count()
+        heap = [(0, next(counter), root_id, None)]
+        stats = self.get_active_stats()
+        while heap:
+            if stats is not None:
+                stats.observe_queue(len(heap))
+            weight, _, current_id, parent_id = heappop(heap)
+            if current_id in in_tree:
+                continue # stale entry, the vertex was reached more cheaply
+            in_tree.add(current_id)
+            if parent_id is not None:
+                yield (parent_id, current_id, weight)
+
+            for neighbor_id, neighbor_weight in self.iter_neighbor_ids_with_weights(current_id):
+                if neighbor_id not in in_tree:
+                    heappush(heap, (neighbor_weight, next(counter), neighbor_id, current_id))
+
+    def __grow_prim_tree_indexed__(self, root_id, in_tree):
+        """
+        Grow a minimum spanning tree from root_id with an indexed heap,
+        adding its vertices to `in_tree` and yielding its edges.
+        """
+        vertex_to_parent = {root_id: None}
+        heap = IndexedHeap()
+        heap.push(root_id, 0)
+        stats = self.get_active_stats()
+        while heap:
+            if stats is not None:
+                stats.observe_queue(len(heap))
+            current_id, weight = heap.pop()
+            in_tree.add(current_id)
+            if vertex_to_parent[current_id] is not None:
+                yield (vertex_to_parent[current_id], current_id, weight)
+
+            for neighbor_id, neighbor_weight in self.iter_neighbor_ids_with_weights(current_id):
+                if neighbor_id not in in_tree and heap.push_or_decrease(neighbor_id, neighbor_weight):
+                    vertex_to_parent[neighbor_id] = current_id
+
+    @instrumented
+    def dijkstra(self, start_id, target_id=None):
+        """
+        Run Dijkstra's Algorithm from `start_id` using a binary heap with lazy
+        deletion: instead of decreasing a key in place, a vertex is pushed
+        again whenever its distance improves, and stale heap entries are
+        skipped when popped. Runs in O((V + E) log V).
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): If given, stop as soon as this vertex is settled.
+
+        Returns:
+        (dict, dict): A map of vertex id -> shortest distance from the start,
+        and a map of vertex id -> previous vertex id on that shortest path.
+        Only vertices reached by the search appear in either map.
+        """
+        if not self.contains_id(start_id):
+            raise KeyError("One or both vertices are not in the graph!")
+
+        vertex_to_distance = {start_id: 0}
+        vertex_to_parent = {start_id: None}
+        settled = set()
+
+        # (distance, tie breaker, vertex id) - the counter keeps ids from
+        # ever being compared to each other
+        counter = count()
+        heap = [(0, next(counter), start_id)]
+        stats = self.get_active_stats()
+
+        while heap:
+            if stats is not None:
+                stats.observe_queue(len(heap))
+            distance, _, current_id = heappop(heap)
+            if current_id in settled:
+                continue  # stale entry, a shorter distance was already found
+            settled.add(current_id)
+
+            # found target, can stop the loop early
+            if current_id == target_id:
+                break
+
+            for neighbor_id, weight in self.iter_neighbor_ids_with_weights(current_id):
+                if weight < 0:
+                    raise ValueError("Dijkstra's Algorithm requires non-negative weights.")
+                next_distance = distance + weight
+                if (neighbor_id not in vertex_to_distance
+                        or next_distance < vertex_to_distance[neighbor_id]):
+                    vertex_to_distance[neighbor_id] = next_distance
+                    vertex_to_parent[neighbor_id] = current_id
+                    heappush(heap, (next_distance, next(counter), neighbor_id))
+
+        return vertex_to_distance, vertex_to_parent
+
+    @instrumented
+    @cached_query
     def find_shortest_path(self, start_id, target_id):
         """
         Use Dijkstra's Algorithm to return the total weight of the shortest path
         from a start vertex to a destination.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+
+        Returns:
+        number: The total weight of the shortest path, or None if the target
+        cannot be reached.
+        """
+        distance, _ = self.find_shortest_path_with_distance(start_id, target_id)
+        return distance
+
+    @instrumented
+    @cached_query
+    def find_shortest_path_with_distance(self, start_id, target_id):
+        """
+        Use Dijkstra's Algorithm to find the shortest path from a start vertex
+        to a destination, along with its total weight.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+
+        Returns:
+        (number, list<string>): The total weight of the shortest path and the
+        vertex ids on it, from start to end, or (None, None) if the target
+        cannot be reached.
+        """
+        if not self.contains_id(start_id) or not self.contains_id(target_id):
+            raise KeyError("One or both vertices are not in the graph!")
+
+        vertex_to_distance, vertex_to_parent = self.dijkstra(start_id, target_id)
+        if target_id not in vertex_to_distance:  # path not found
+            return None, None
+
+        return (
+            vertex_to_distance[target_id],
+            self.__reconstruct_path__(vertex_to_parent, target_id)
+        )
+
+    def __shortest_paths_from__(self, start_id, target_ids):
+        """
+        Find the shortest path from start_id to each of target_ids with one
+        run of Dijkstra's Algorithm.
+
+        Returns:
+        dict: A map of target id -> (distance, path), or (None, None) if the
+        target is unreachable.
+        """
+        # with a single target the search can stop as soon as it is settled
+        single_target_id = target_ids[0] if len(target_ids) == 1 else None
+        vertex_to_distance, vertex_to_parent = self.dijkstra(start_id, single_target_id)
+        return {
+            target_id: (
+                (vertex_to_distance[target_id],
+                 self.__reconstruct_path__(vertex_to_parent, target_id))
+                if target_id in vertex_to_distance else (None, None)
+            )
+            for target_id in target_ids
+        }
+
+    @instrumented
+    @cached_query
+    def find_all_distances(self, start_id):
+        """
+        Use Dijkstra's Algorithm to find the shortest distance from a start
+        vertex to every vertex it can reach.
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+
+        Returns:
+        dict: A map of vertex id -> total weight of the shortest path from the
+        start vertex. Unreachable vertices are left out.
+        """
+        vertex_to_distance, _ = self.dijkstra(start_id)
+        return vertex_to_distance
+
+    @instrumented
+    def astar(self, start_id, target_id, heuristic=None, attribute='coordinates'):
+        """
+        Find the shortest path from a start vertex to a destination with A*
+        search: Dijkstra's Algorithm with the heap ordered by the distance so
+        far plus an estimate of the distance left, so vertices leading away
+        from the target are expanded late or not at all.
+
+        The path found is a shortest one as long as the estimate never
+        exceeds the true remaining distance. A vertex is expanded again if a
+        shorter path to it turns up later, which can only happen when the
+        estimate is not consistent (h(u) <= weight(u, v) + h(v)).
+
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+        heuristic (string or function): The name of a built-in heuristic in
+        graphs.heuristics ('euclidean', 'manhattan' or 'haversine'), measured
+        between the vertices' `attribute` positions; or a
+        function(vertex_id, target_id) returning the estimate; or None for no
+        estimate, which expands vertices in the same order as Dijkstra's
+        Algorithm.
+        attribute (string): The vertex attribute holding the position of
+        each vertex, used by the built-in heuristics.
+
+        Returns:
+        (number, list<string>, integer): The total weight of the shortest
+        path, the vertex ids on it from start to end, and the number of
+        vertices expanded. The weight and path are None if the target cannot
+        be reached.
+        """
+        if not self.contains_id(start_id) or not self.contains_id(target_id):
+            raise KeyError("One or both vertices are not in the graph!")
+        estimate = self.__astar_estimate__(target_id, heuristic, attribute)
+
+        vertex_to_distance = {start_id: 0}
+        vertex_to_parent = {start_id: None}
+        vertex_to_estimate = {} # each estimate is computed once
+        num_expanded = 0
+
+        # (distance + estimate, estimate, tie breaker, distance, vertex id) -
+        # among equal totals the vertex estimated closest to the target goes
+        # first, which saves a lot of expansions on grids
+        counter = count()
+        heap = [(0, 0, next(counter), 0, start_id)]
+        stats = self.get_active_stats()
+
+        while heap:
+            if stats is not None:
+                stats.observe_queue(len(heap))
+            _, _, _, distance, current_id = heappop(heap)
+            if distance > vertex_to_distance[current_id]:
+                continue  # stale entry, a shorter distance was already found
+            num_expanded += 1
+
+            if current_id == target_id:
+                return (
+                    distance,
+                    self.__reconstruct_path__(vertex_to_parent, target_id),
+                    num_expanded
+                )
+
+            for neighbor_id, weight in self.iter_neighbor_ids_with_weights(current_id):
+                if weight < 0:
+                    raise ValueError("A* search requires non-negative weights.")
+                next_distance = distance + weight
+                if (neighbor_id not in vertex_to_distance
+                        or next_distance < vertex_to_distance[neighbor_id]):
+                    vertex_to_distance[neighbor_id] = next_distance
+                    vertex_to_parent[neighbor_id] = current_id
+                    if neighbor_id not in vertex_to_estimate:
+                        vertex_to_estimate[neighbor_id] = estimate(neighbor_id)
+                    neighbor_estimate = vertex_to_estimate[neighbor_id]
+                    heappush(heap, (
+                        next_distance + neighbor_estimate, neighbor_estimate,
+                        next(counter), next_distance, neighbor_id
+                    ))
+
+        return None, None, num_expanded
+
+    def __astar_estimate__(self, target_id, heuristic, attribute):
+        """
+        Return a function(vertex_id) estimating the distance left to
+        `target_id`, for the `heuristic` and `attribute` given to astar.
+        """
+        if heuristic is None:
+            return lambda vertex_id: 0
+        if callable(heuristic):
+            return lambda vertex_id: heuristic(vertex_id, target_id)
+        if heuristic not in HEURISTICS:
+            raise ValueError("Unknown heuristic {!r}, expected one of: {}".format(
+                heuristic, ', '.join(sorted(HEURISTICS))
+            ))
+
+        distance = HEURISTICS[heuristic]
+        get_attribute = self.get_vertex_attribute
+
+        def get_position(vertex_id):
+            position = get_attribute(vertex_id, attribute)
+            if position is None:
+                raise ValueError("Vertex {!r} has no {!r} attribute.".format(
+                    vertex_id, attribute
+                ))
+            return position
+
+        target_position = get_position(target_id)
+        return lambda vertex_id: distance(get_position(vertex_id), target_position)
+
+    def __shortest_path_dag__(self, source_id, weighted):
+        """
+        Find every shortest path from `source_id` with Dijkstra's Algorithm,
+        for Brandes' algorithm; without `weighted`, fall back to a BFS.
+
+        Returns:
+        (list<string>, dict, dict): The reached vertex ids in the order they
+        were settled, a map of vertex id -> the ids before it on its shortest
+        paths, and a map of vertex id -> the number of shortest paths to it.
+        """
+        if not weighted:
+            return super().__shortest_path_dag__(source_id, weighted)
+
+        order = []
+        settled = set()
+        vertex_to_distance = {source_id: 0}
+        vertex_to_parents = {source_id: []}
+        path_counts = {source_id: 1}
+
+        counter = count()
+        heap = [(0, next(counter), source_id)]
+        while heap:
+            distance, _, current_id = heappop(heap)
+            if current_id in settled:
+                continue  # stale entry, a shorter distance was already found
+            settled.add(current_id)
+            order.append(current_id)
+
+            for neighbor_id, weight in self.iter_neighbor_ids_with_weights(current_id):
+                if weight < 0:
+                    raise ValueError("Dijkstra's Algorithm requires non-negative weights.")
+                next_distance = distance + weight
+                if (neighbor_id not in vertex_to_distance
+                        or next_distance < vertex_to_distance[neighbor_id]):
+                    # a shorter route, so forget the parents found so far
+                    vertex_to_distance[neighbor_id] = next_distance
+                    vertex_to_parents[neighbor_id] = [current_id]
+                    path_counts[neighbor_id] = path_counts[current_id]
+                    heappush(heap, (next_distance, next(counter), neighbor_id))
+                elif (next_distance == vertex_to_distance[neighbor_id]
+                        and neighbor_id not in settled):
+                    vertex_to_parents[neighbor_id].append(current_id)
+                    path_counts[neighbor_id] += path_counts[current_id]
+
+        return order, vertex_to_parents, path_counts
+
+    @instrumented
+    def floyd_warshall(self, with_predecessors=False):
+        """
+        Compute the shortest path distance between every pair of vertices.
+
+        With NumPy available, the distances live in a dense V x V float matrix
+        and each round of the k-loop is one whole-matrix `np.minimum` over the
+        broadcast sum `dist[:, k] + dist[k, :]`, so only the O(V) outer loop
+        runs in Python. Without NumPy the same algorithm runs over lists.
+        Negative cycles are not detected.
+
+        Parameters:
+        with_predecessors (boolean): Also track a predecessor matrix, so that
+        the actual shortest paths can be extracted.
+
+        Returns:
+        AllPairsShortestPaths: The distance matrix and id <-> index mapping.
         """
-        # vertices to INFINITY - hint: use `float('inf')`
-        vertex_to_distance = {i.get_id(): float("inf") for i in self.get_vertices()}
-        vertex_to_distance[start_id] = 0
-
-        # 1. Get the minimum-distance remaining vertex, remove it from the
-        #    dictionary. If it is the target vertex, return its distance.
-        # 2. Update that vertex's neighbors by adding the edge weight to the
-        #    vertex's distance, if it is lower than previous.
-        while(vertex_to_distance):
-            bestVert = (start_id, float("inf"))
-            for vert_id, dist in vertex_to_distance.items():
-                if dist < bestVert[1]:
-                    bestVert = (vert_id, dist)
-            if(bestVert[0] == target_id):
-                return bestVert[1]
-
-            del vertex_to_distance[bestVert[0]]
-            for neighbor, weight in self.get_vertex(bestVert[0]).get_neighbors_with_weights():
-                if(neighbor in vertex_to_distance):
-                    vertex_to_distance[neighbor] = min(vertex_to_distance[neighbor], weight + bestVert[1])
-        return None
-
-    def floyd_warshall(self):
-        """
-        Return the All-Pairs-Shortest-Paths dictionary, containing the shortest
-        paths from each vertex to each other vertex.
-        """
-        
-        dist = {}
-        vertex_ids = self.vertex_dict.keys()
-        
-        # Create a dictionary of all vertices and their possible connections
-        for v1 in vertex_ids:
-            dist[v1] = dict()
-            for v2 in vertex_ids:
-                dist[v1][v2] = WeightedGraph.INFINITY
-            dist[v1][v1] = 0
-        
-        # Add all edge weights to the dict
-        vertices = self.get_vertices()
-        
-        for vertex in vertices:
-            weighted_neighbors = vertex.get_neighbors_with_weights()
-            
-            for neighbor, weight in weighted_neighbors:
-                dist[vertex.get_id()][neighbor.get_id()] = weight
-        
-        for i in vertices:
-            for j in vertices:
-                for k in vertices:
-                    dist[i][j] = min(dist[i][j], dist[i][k] + dist[k][j])
-                    
-        return dist
\ No newline at end of file
+        vertex_ids = self.get_vertex_ids()
+        id_to_index = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+        num_vertices = len(vertex_ids)
+
+        if np is not None:
+            dist = np.full((num_vertices, num_vertices), WeightedGraph.INFINITY)
+            pred = (
+                np.full((num_vertices, num_vertices), NO_PREDECESSOR, dtype=np.int64)
+                if with_predecessors else None
+            )
+        else:
+            dist = [[WeightedGraph.INFINITY] * num_vertices for _ in range(num_vertices)]
+            pred = (
+                [[NO_PREDECESSOR] * num_vertices for _ in range(num_vertices)]
+                if with_predecessors else None
+            )
+
+        # Add all edge weights to the matrix
+        for i, vertex_id in enumerate(vertex_ids):
+            dist[i][i] = 0
+            for neighbor_id, weight in self.iter_neighbor_ids_with_weights(vertex_id):
+                j = id_to_index[neighbor_id]
+                if i != j and weight < dist[i][j]:
+                    dist[i][j] = weight
+                    if pred is not None:
+                        pred[i][j] = i
+
+        if np is not None:
+            for k in range(num_vertices):
+                candidate = dist[:, k:k + 1] + dist[k:k + 1, :]
+                if pred is not None:
+                    # going through k, the vertex before j is the one on k -> j
+                    pred = np.where(candidate < dist, pred[k:k + 1, :], pred)
+                np.minimum(dist, candidate, out=dist)
+        else:
+            for k in range(num_vertices):
+                row_k = dist[k]
+                pred_k = pred[k] if pred is not None else None
+                for i in range(num_vertices):
+                    row_i = dist[i]
+                    dist_i_k = row_i[k]
+                    if dist_i_k == WeightedGraph.INFINITY:
+                        continue
+                    for j in range(num_vertices):
+                        candidate = dist_i_k + row_k[j]
+                        if candidate < row_i[j]:
+                            row_i[j] = candidate
+                            if pred is not None:
+                                pred[i][j] = pred_k[j]
+
+        return AllPairsShortestPaths(vertex_ids, dist, pred)
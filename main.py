@@ -41,7 +41,8 @@ if __name__ == '__main__':
 
     # Search the graph
     print('Performing BFS traversal...')
-    graph.bfs_traversal('A')
+    for vertex_id in graph.iter_bfs('A'):
+        print('Processing vertex {}'.format(vertex_id))
 
     # Find shortest path
     print('Finding shortest path from vertex A to vertex E...')
@@ -73,7 +74,8 @@ if __name__ == '__main__':
 
      # Search the graph
     print('Performing BFS traversal...')
-    graph.bfs_traversal('1')
+    for vertex_id in graph.iter_bfs('1'):
+        print('Processing vertex {}'.format(vertex_id))
 
     # Find shortest path
     print('Finding shortest path from vertex 1 to vertex 6...')
@@ -1,6 +1,21 @@
+import glob
+import itertools
+import os
+import pickle
+import tempfile
+import threading
 import unittest
-from graphs.graph import Graph
+from graphs.graph import Graph, CycleError
+from graphs.centrality import ConvergenceError
+from graphs.weighted_graph import WeightedGraph
+from graphs.csr_graph import CSRGraph, WeightedCSRGraph
+from graphs.disjoint_set import DisjointSet, KeyedDisjointSet
+from graphs.query_cache import QueryCache
+from graphs.instrumentation import StatsRecorder
 from util.file_reader import read_graph_from_file
+from util.snapshot import save_snapshot, load_snapshot
+from benchmarks import generators
+from benchmarks.suite import run_benchmarks, compare_results
 
 
 class TestGraph(unittest.TestCase):
@@ -37,6 +52,117 @@ class TestGraph(unittest.TestCase):
         self.assertEqual(len(vertex_b.get_neighbors()), 2)
         self.assertEqual(len(vertex_c.get_neighbors()), 2)
 
+    def test_degree_index(self):
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C', 'D']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('A', 'C')
+        graph.add_edge('C', 'B')
+        graph.add_edge('C', 'B') # duplicate edges are ignored
+
+        self.assertEqual(graph.get_predecessor_ids('B'), ['A', 'C'])
+        self.assertEqual(graph.get_in_degree('B'), 2)
+        self.assertEqual(graph.get_out_degree('A'), 2)
+        self.assertEqual(graph.get_sources(), ['A', 'D'])
+        self.assertEqual(graph.get_sinks(), ['B', 'D'])
+
+        frozen = graph.freeze()
+        self.assertEqual(frozen.get_predecessor_ids('B'), ['A', 'C'])
+        self.assertEqual(frozen.get_in_degree('B'), 2)
+        self.assertEqual(frozen.get_sources(), ['A', 'D'])
+        self.assertEqual(frozen.get_sinks(), ['B', 'D'])
+
+        graph.add_edge('B', 'A')
+        self.assertEqual(graph.get_sources(), ['D'])
+        self.assertTrue(graph.contains_cycle())
+
+        graph = Graph(is_directed=False)
+        for vertex_id in ['A', 'B', 'C']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        self.assertEqual(graph.get_predecessor_ids('A'), ['B'])
+        self.assertEqual(graph.get_in_degree('B'), 1)
+        self.assertEqual(graph.get_sources(), ['C'])
+        self.assertEqual(graph.get_sinks(), ['C'])
+
+    def test_bulk_mutation(self):
+        graph = Graph(is_directed=True)
+        self.assertEqual(graph.add_vertices(['A', 'B', 'C', 'D', 'A']), 4)
+        self.assertEqual(graph.count_connected_components(), 4)
+        version = graph.get_version()
+        self.assertEqual(graph.add_edges([('A', 'B'), ('B', 'C'), ('C', 'D'), ('A', 'B')]), 3)
+        self.assertGreater(graph.get_version(), version)
+        self.assertEqual(graph.get_neighbor_ids('A'), ['B'])
+        self.assertEqual(graph.count_connected_components(), 1)
+
+        # a bad edge is caught before anything is added
+        with self.assertRaises(KeyError):
+            graph.add_edges([('D', 'A'), ('D', 'Z')])
+        self.assertEqual(graph.get_neighbor_ids('D'), [])
+        with self.assertRaises(ValueError):
+            graph.add_edges([('D', 'A', 5)])
+
+        self.assertEqual(graph.remove_edges([('B', 'C'), ('C', 'B')]), 1)
+        self.assertFalse(graph.remove_edge('B', 'C'))
+        self.assertEqual(graph.count_connected_components(), 2)
+        self.assertEqual(graph.get_sources(), ['A', 'C'])
+        self.assertEqual(graph.get_sinks(), ['D', 'B'])
+
+        graph.remove_vertex('C')
+        self.assertEqual(graph.get_vertex_ids(), ['A', 'B', 'D'])
+        self.assertEqual(graph.get_predecessor_ids('D'), [])
+        self.assertEqual(graph.count_connected_components(), 2)
+        with self.assertRaises(KeyError):
+            graph.remove_vertices(['A', 'C'])
+        self.assertEqual(graph.get_vertex_ids(), ['A', 'B', 'D'])
+
+        graph = WeightedGraph(is_directed=False)
+        graph.add_vertices(['A', 'B', 'C'])
+        self.assertEqual(graph.add_edges([('A', 'B', 4), ('B', 'C', 1)]), 2)
+        self.assertEqual(graph.get_neighbor_ids_with_weights('B'), [('A', 4), ('C', 1)])
+        self.assertEqual(graph.find_shortest_path('A', 'C'), 5)
+        self.assertEqual(graph.remove_edges([('C', 'B', 1)]), 1)
+        self.assertEqual(graph.get_neighbor_ids_with_weights('B'), [('A', 4)])
+        self.assertIsNone(graph.find_shortest_path('A', 'C'))
+        self.assertEqual(graph.get_sources(), ['C'])
+
+        with self.assertRaises(TypeError):
+            graph.freeze().add_edges([('A', 'C', 1)])
+
+    def test_neighbor_views(self):
+        graph = WeightedGraph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B', 4)
+        graph.add_edge('A', 'C', 1)
+
+        ids_view = graph.iter_neighbor_ids('A')
+        pairs_view = graph.iter_neighbor_ids_with_weights('A')
+        self.assertEqual(list(ids_view), ['B', 'C'])
+        self.assertEqual(list(pairs_view), [('B', 4), ('C', 1)])
+        self.assertEqual(
+            [vertex.get_id() for vertex in graph.get_vertex('A').iter_neighbors()],
+            ['B', 'C']
+        )
+
+        # views are live, so they see edges added later
+        graph.add_vertex('D')
+        graph.add_edge('A', 'D', 2)
+        self.assertEqual(list(ids_view), ['B', 'C', 'D'])
+        self.assertEqual(list(pairs_view)[-1], ('D', 2))
+
+        self.assertFalse(hasattr(graph.get_vertex('A'), '__dict__'))
+        with self.assertRaises(AttributeError):
+            graph.get_vertex('A').color = 'red'
+
+        frozen = graph.freeze()
+        self.assertEqual(list(frozen.iter_neighbor_ids('A')), ['B', 'C', 'D'])
+        self.assertEqual(
+            list(frozen.iter_neighbor_ids_with_weights('A')),
+            [('B', 4), ('C', 1), ('D', 2)]
+        )
+
 class TestReadGraphFromFile(unittest.TestCase):
     def test_read_directed_graph_from_file(self):
         filename = 'test_files/graph_small_directed.txt'
@@ -76,6 +202,60 @@ class TestReadGraphFromFile(unittest.TestCase):
         with self.assertRaises(ValueError) as error:
             graph = read_graph_from_file(filename)
 
+    def test_read_weighted_graph_from_file(self):
+        filename = 'test_files/graph_small_weighted.txt'
+        graph = read_graph_from_file(filename)
+
+        self.assertIsInstance(graph, WeightedGraph)
+        self.assertEqual(len(graph.get_vertices()), 4)
+        self.assertEqual(graph.get_neighbor_ids_with_weights('A'), [('B', 4), ('C', 1)])
+        self.assertEqual(graph.find_shortest_path('A', 'D'), 8)
+
+        graph = read_graph_from_file(filename, weighted=False)
+        self.assertNotIsInstance(graph, WeightedGraph)
+        self.assertEqual(graph.get_neighbor_ids('A'), ['B', 'C'])
+
+    def test_read_graph_from_file_streaming_options(self):
+        filename = 'test_files/graph_medium_undirected.txt'
+        expected = read_graph_from_file(filename)
+
+        progress = []
+        graph = read_graph_from_file(
+            filename, use_mmap=True, batch_size=4,
+            progress_callback=lambda num_edges, bytes_read: progress.append(num_edges)
+        )
+        self.assertEqual(graph.get_vertex_ids(), expected.get_vertex_ids())
+        for vertex_id in expected.get_vertex_ids():
+            self.assertEqual(
+                graph.get_neighbor_ids(vertex_id), expected.get_neighbor_ids(vertex_id)
+            )
+        self.assertListEqual(progress, [4, 8, 9])
+
+        for filename in ('test_files/graph_medium_undirected.txt',
+                'test_files/graph_small_weighted.txt'):
+            expected = read_graph_from_file(filename).freeze()
+            frozen = read_graph_from_file(filename, frozen=True)
+            self.assertIs(type(frozen), type(expected))
+            self.assertEqual(frozen.get_vertex_ids(), expected.get_vertex_ids())
+            self.assertEqual(list(frozen.get_offsets()), list(expected.get_offsets()))
+            self.assertEqual(list(frozen.get_targets()), list(expected.get_targets()))
+            if expected.get_weights() is not None:
+                self.assertEqual(list(frozen.get_weights()), list(expected.get_weights()))
+
+        # repeated edge lines are only counted once
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'graph.txt')
+            with open(filename, 'w') as graph_file:
+                graph_file.write('G\nA,B,C\n(A,B)\n(B,A)\n(B,C)\n\n(A,B)\n')
+            for frozen in (False, True):
+                progress = []
+                graph = read_graph_from_file(
+                    filename, frozen=frozen,
+                    progress_callback=lambda num_edges, bytes_read: progress.append(num_edges)
+                )
+                self.assertEqual(progress[-1], 2)
+                self.assertEqual(list(graph.iter_neighbor_ids('B')), ['A', 'C'])
+
     def test_find_shortest_path(self):
         filename = 'test_files/graph_medium_undirected.txt'
         graph = read_graph_from_file(filename)
@@ -84,6 +264,57 @@ class TestReadGraphFromFile(unittest.TestCase):
 
         self.assertEqual(len(path_from_A_to_F), 4)
 
+        path_from_A_to_F = graph.find_shortest_path('A', 'F', bidirectional=True)
+        self.assertEqual(len(path_from_A_to_F), 4)
+        self.assertEqual(path_from_A_to_F[0], 'A')
+        self.assertEqual(path_from_A_to_F[-1], 'F')
+
+    def test_find_shortest_path_directed(self):
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E', 'F']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('B', 'C')
+        graph.add_edge('C', 'D')
+        graph.add_edge('D', 'E')
+        graph.add_edge('A', 'E')
+        graph.add_edge('F', 'A')
+
+        for bidirectional in (False, True):
+            self.assertListEqual(
+                graph.find_shortest_path('A', 'E', bidirectional=bidirectional),
+                ['A', 'E']
+            )
+            self.assertListEqual(
+                graph.find_shortest_path('B', 'E', bidirectional=bidirectional),
+                ['B', 'C', 'D', 'E']
+            )
+            self.assertListEqual(
+                graph.find_shortest_path('F', 'A', bidirectional=bidirectional),
+                ['F', 'A']
+            )
+            self.assertListEqual(
+                graph.find_shortest_path('C', 'C', bidirectional=bidirectional),
+                ['C']
+            )
+            self.assertIsNone(
+                graph.find_shortest_path('E', 'A', bidirectional=bidirectional)
+            )
+
+    def test_batch_shortest_paths(self):
+        filename = 'test_files/graph_small_directed_2.txt'
+        graph = read_graph_from_file(filename)
+        pairs = [('1', '6'), ('1', '4'), ('3', '5'), ('6', '1'), ('1', '6')]
+
+        for workers in (1, 2):
+            results = dict(graph.batch_shortest_paths(pairs, workers=workers, chunk_size=1))
+            self.assertEqual(len(results), 4)
+            for (start_id, target_id), path in results.items():
+                self.assertEqual(path, graph.find_shortest_path(start_id, target_id))
+
+        with self.assertRaises(KeyError):
+            graph.batch_shortest_paths([('1', 'Z')])
+
     def test_get_all_vertices_n_away(self):
         filename = 'test_files/graph_medium_undirected.txt'
         graph = read_graph_from_file(filename)
@@ -97,6 +328,23 @@ class TestReadGraphFromFile(unittest.TestCase):
         vertices_3_away = graph.find_vertices_n_away('A', 3)
         self.assertEqual(vertices_3_away, ['F'])
 
+        self.assertEqual(graph.find_vertices_n_away('A', 0), ['A'])
+        self.assertEqual(graph.find_vertices_n_away('A', 4), [])
+
+    def test_find_vertex_rings(self):
+        filename = 'test_files/graph_medium_undirected.txt'
+        graph = read_graph_from_file(filename)
+
+        rings = graph.find_vertex_rings('A', 10)
+        self.assertEqual(
+            [sorted(ring) for ring in rings],
+            [['A'], ['B', 'C'], ['D', 'E'], ['F']]
+        )
+
+        vertices_2_away = graph.find_vertices_n_away_from_many(['A', 'F'], 2)
+        self.assertEqual(sorted(vertices_2_away['A']), ['D', 'E'])
+        self.assertEqual(sorted(vertices_2_away['F']), ['B', 'C'])
+
 
     def test_is_bipartite(self):
         """Create a graph."""
@@ -150,6 +398,36 @@ class TestReadGraphFromFile(unittest.TestCase):
         graph.add_edge('B','D')
         self.assertEqual(graph.is_bipartite(), False)
 
+    def test_bipartition(self):
+        graph = Graph(is_directed=False)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
+            graph.add_vertex(vertex_id)
+        # a bipartite path, then a triangle in a second component
+        graph.add_edge('A', 'B')
+        graph.add_edge('B', 'C')
+        graph.add_edge('E', 'F')
+        graph.add_edge('F', 'G')
+        sides, odd_cycle = graph.bipartition()
+        self.assertIsNone(odd_cycle)
+        self.assertEqual(sides, (['A', 'C', 'D', 'E', 'G'], ['B', 'F']))
+
+        graph.add_edge('G', 'E')
+        self.assertFalse(graph.is_bipartite())
+        sides, odd_cycle = graph.bipartition()
+        self.assertIsNone(sides)
+        self.assertEqual(odd_cycle[0], odd_cycle[-1])
+        self.assertEqual(sorted(odd_cycle[:-1]), ['E', 'F', 'G'])
+
+        # edge directions are ignored
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('C', 'B')
+        self.assertEqual(graph.bipartition(), ((['A', 'C'], ['B']), None))
+        graph.add_edge('C', 'A')
+        self.assertEqual(len(graph.bipartition()[1]), 4)
+
     def test_connected_components_undirected(self):
         """Create a graph."""
         graph = Graph(is_directed=False)
@@ -221,6 +499,53 @@ class TestReadGraphFromFile(unittest.TestCase):
         self.assertListEqual(connected_components, answer)
         
 
+    def test_connected_components_incremental(self):
+        graph = Graph(is_directed=False)
+        graph.add_vertex('A')
+        graph.add_vertex('B')
+        self.assertEqual(graph.count_connected_components(), 2)
+        self.assertFalse(graph.are_connected('A', 'B'))
+
+        graph.add_edge('A', 'B')
+        graph.add_vertex('C')
+        self.assertEqual(graph.count_connected_components(), 2)
+        self.assertTrue(graph.are_connected('A', 'B'))
+        self.assertFalse(graph.are_connected('A', 'C'))
+
+        graph.add_edge('C', 'B')
+        self.assertEqual(graph.count_connected_components(), 1)
+        self.assertTrue(graph.are_connected('A', 'C'))
+        self.assertEqual(graph.get_connected_components(), [['A', 'B', 'C']])
+
+        with self.assertRaises(KeyError):
+            graph.are_connected('A', 'Z')
+
+    def test_strongly_connected_components(self):
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('B', 'C')
+        graph.add_edge('C', 'A')
+        graph.add_edge('C', 'D')
+        graph.add_edge('D', 'E')
+        graph.add_edge('E', 'F')
+        graph.add_edge('F', 'D')
+        graph.add_edge('G', 'H')
+
+        connected_components = sorted([
+            sorted(component)
+            for component in graph.get_connected_components(strongly=True)
+        ])
+        answer = sorted([
+            ['A', 'B', 'C'],
+            ['D', 'E', 'F'],
+            ['G'],
+            ['H']
+        ])
+        self.assertListEqual(connected_components, answer)
+        self.assertEqual(graph.count_connected_components(), 2)
+
     def test_bfs(self):
         """Create a graph."""
         graph = Graph(is_directed=True)
@@ -244,6 +569,108 @@ class TestReadGraphFromFile(unittest.TestCase):
         self.assertListEqual(graph.find_path_dfs_iter('A', 'F'), answer)
 
 
+    def build_traversal_graph(self):
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E', 'F']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('A', 'C')
+        graph.add_edge('B', 'D')
+        graph.add_edge('C', 'D')
+        graph.add_edge('D', 'E')
+        graph.add_edge('E', 'A')
+        return graph
+
+    def test_find_path_dfs(self):
+        graph = self.build_traversal_graph() # has the cycle A -> B -> D -> E -> A
+
+        self.assertEqual(graph.find_path_dfs_iter('A', 'E'), ['A', 'C', 'D', 'E'])
+        self.assertEqual(graph.find_path_dfs_iter('D', 'C'), ['D', 'E', 'A', 'C'])
+        self.assertIsNone(graph.find_path_dfs_iter('A', 'F'))
+        self.assertEqual(graph.find_path_dfs_iter('F', 'F'), ['F'])
+
+        self.assertEqual(graph.find_path_iddfs('A', 'E'), ['A', 'B', 'D', 'E'])
+        self.assertEqual(graph.find_path_iddfs('E', 'D'), ['E', 'A', 'B', 'D'])
+        self.assertIsNone(graph.find_path_iddfs('E', 'D', max_depth=2))
+        self.assertIsNone(graph.find_path_iddfs('A', 'F'))
+        with self.assertRaises(KeyError):
+            graph.find_path_iddfs('A', 'Z')
+
+        self.assertEqual(list(graph.iter_simple_paths('A', 'E')), [
+            ['A', 'B', 'D', 'E'], ['A', 'C', 'D', 'E']
+        ])
+        self.assertEqual(list(graph.iter_simple_paths('B', 'C', max_length=3)), [])
+        self.assertEqual(list(graph.iter_simple_paths('B', 'C', max_length=4)), [
+            ['B', 'D', 'E', 'A', 'C']
+        ])
+        self.assertEqual(list(graph.iter_simple_paths('A', 'F')), [])
+
+        # a ladder has 2^n simple paths from end to end, generated lazily
+        ladder = Graph(is_directed=False)
+        rungs = 20
+        ladder.add_vertices(['{}{}'.format(side, i) for i in range(rungs) for side in 'LR'])
+        ladder.add_edges([('L{}'.format(i), 'R{}'.format(i)) for i in range(rungs)])
+        for side in 'LR':
+            ladder.add_edges([
+                ('{}{}'.format(side, i), '{}{}'.format(side, i + 1)) for i in range(rungs - 1)
+            ])
+        paths = ladder.iter_simple_paths('L0', 'R{}'.format(rungs - 1))
+        for path in itertools.islice(paths, 100):
+            self.assertEqual(len(set(path)), len(path))
+        self.assertEqual(len(ladder.find_path_iddfs('L0', 'R5')), 7)
+        self.assertEqual(
+            sum(1 for _ in ladder.freeze().iter_simple_paths('L0', 'R5', max_length=7)), 6
+        )
+
+    def test_bfs_traversal(self):
+        graph = self.build_traversal_graph()
+
+        self.assertEqual(graph.bfs_traversal('A'), {'A', 'B', 'C', 'D', 'E'})
+        self.assertEqual(graph.bfs_traversal('F'), {'F'})
+        with self.assertRaises(KeyError):
+            graph.bfs_traversal('Z')
+
+    def test_iter_bfs(self):
+        graph = self.build_traversal_graph()
+
+        self.assertListEqual(list(graph.iter_bfs('A')), ['A', 'B', 'C', 'D', 'E'])
+        self.assertListEqual(
+            list(graph.iter_bfs('A', with_details=True)),
+            [('A', 0, None), ('B', 1, 'A'), ('C', 1, 'A'), ('D', 2, 'B'), ('E', 3, 'D')]
+        )
+        self.assertListEqual(list(graph.iter_bfs('A', max_depth=1)), ['A', 'B', 'C'])
+        self.assertListEqual(
+            list(graph.iter_bfs('A', vertex_filter=lambda vertex_id: vertex_id != 'B')),
+            ['A', 'C', 'D', 'E']
+        )
+
+        traversal = graph.iter_bfs('A')
+        self.assertEqual(next(traversal), 'A')
+        self.assertEqual(next(traversal), 'B')
+
+    def test_iter_dfs(self):
+        graph = self.build_traversal_graph()
+
+        self.assertListEqual(list(graph.iter_dfs('A')), ['A', 'B', 'D', 'E', 'C'])
+        self.assertListEqual(
+            list(graph.iter_dfs('A', with_details=True)),
+            [('A', 0, None), ('B', 1, 'A'), ('D', 2, 'B'), ('E', 3, 'D'), ('C', 1, 'A')]
+        )
+        self.assertListEqual(list(graph.iter_dfs('A', max_depth=2)), ['A', 'B', 'D', 'C'])
+        self.assertListEqual(
+            list(graph.iter_dfs('A', vertex_filter=lambda vertex_id: vertex_id != 'D')),
+            ['A', 'B', 'C']
+        )
+        with self.assertRaises(KeyError):
+            graph.iter_dfs('Z')
+
+        # D is two edges away through A -> C, though DFS first reaches C via B
+        graph = Graph(is_directed=True)
+        graph.add_vertices(['A', 'B', 'C', 'D'])
+        graph.add_edges([('A', 'B'), ('B', 'C'), ('C', 'D'), ('A', 'C')])
+        self.assertListEqual(list(graph.iter_dfs('A', max_depth=2)), ['A', 'B', 'C', 'D'])
+        self.assertCountEqual(graph.iter_dfs('A', max_depth=2), graph.iter_bfs('A', max_depth=2))
+
     def test_has_cycle(self):
         """Create a graph."""
         graph = Graph(is_directed=True)
@@ -299,6 +726,43 @@ class TestReadGraphFromFile(unittest.TestCase):
         self.assertEqual(False, graph.contains_cycle())
 
 
+    def test_find_cycle_directed(self):
+        """Create a graph."""
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C', 'D']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('A', 'C')
+        graph.add_edge('B', 'D')
+        graph.add_edge('C', 'D')
+        self.assertIsNone(graph.find_cycle())
+
+        graph.add_edge('D', 'A')
+        cycle = graph.find_cycle()
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertIn('A', cycle)
+        self.assertIn('D', cycle)
+        for vertex_id, next_id in zip(cycle, cycle[1:]):
+            self.assertIn(next_id, graph.get_neighbor_ids(vertex_id))
+
+    def test_find_cycle_undirected(self):
+        """Create a graph."""
+        graph = Graph(is_directed=False)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('B', 'C')
+        graph.add_edge('B', 'D')
+        graph.add_edge('D', 'E')
+        self.assertEqual(False, graph.contains_cycle())
+        self.assertIsNone(graph.find_cycle())
+
+        graph.add_edge('E', 'B')
+        self.assertEqual(True, graph.contains_cycle())
+        cycle = graph.find_cycle()
+        self.assertEqual(sorted(cycle[:-1]), ['B', 'D', 'E'])
+        self.assertEqual(cycle[0], cycle[-1])
+
     def test_topological_sort(self):
         """Create a graph."""
         graph = Graph(is_directed=True)
@@ -332,8 +796,772 @@ class TestReadGraphFromFile(unittest.TestCase):
         answer = ['A', 'G', 'B', 'H', 'C', 'I', 'J', 'D', 'E', 'F']
         self.assertListEqual(answer, graph.topological_sort())
 
+        levels = [['A', 'G'], ['B', 'H'], ['C', 'I', 'J'], ['D', 'E'], ['F']]
+        self.assertListEqual(levels, graph.topological_levels())
+
+    def test_topological_sort_cycle(self):
+        """Create a graph."""
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('B', 'C')
+        graph.add_edge('C', 'D')
+        graph.add_edge('D', 'B')
+        graph.add_edge('D', 'E')
+
+        with self.assertRaises(CycleError) as error:
+            graph.topological_sort()
+        cycle = error.exception.cycle
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual(sorted(cycle[:-1]), ['B', 'C', 'D'])
+        for vertex_id, next_id in zip(cycle, cycle[1:]):
+            self.assertIn(next_id, graph.get_neighbor_ids(vertex_id))
+
+        with self.assertRaises(ValueError):
+            Graph(is_directed=False).topological_sort()
+
         
 
+class TestWeightedGraph(unittest.TestCase):
+
+    def build_weighted_graph(self, is_directed=False):
+        graph = WeightedGraph(is_directed=is_directed)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E', 'F']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B', 4)
+        graph.add_edge('A', 'C', 1)
+        graph.add_edge('C', 'B', 2)
+        graph.add_edge('B', 'D', 5)
+        graph.add_edge('C', 'D', 8)
+        graph.add_edge('D', 'E', 3)
+        return graph
+
+    def test_find_shortest_path(self):
+        graph = self.build_weighted_graph()
+
+        self.assertEqual(graph.find_shortest_path('A', 'E'), 11)
+        self.assertEqual(graph.find_shortest_path('A', 'A'), 0)
+        self.assertIsNone(graph.find_shortest_path('A', 'F'))
+
+        distance, path = graph.find_shortest_path_with_distance('A', 'E')
+        self.assertEqual(distance, 11)
+        self.assertListEqual(path, ['A', 'C', 'B', 'D', 'E'])
+        self.assertEqual(
+            graph.find_shortest_path_with_distance('A', 'F'), (None, None)
+        )
+
+        with self.assertRaises(KeyError):
+            graph.find_shortest_path('A', 'Z')
+
+    def test_find_shortest_path_directed(self):
+        graph = self.build_weighted_graph(is_directed=True)
+
+        self.assertEqual(graph.find_shortest_path('A', 'D'), 8)
+        self.assertIsNone(graph.find_shortest_path('D', 'A'))
+
+    def test_batch_shortest_paths(self):
+        graph = self.build_weighted_graph()
+        pairs = [('A', 'E'), ('A', 'B'), ('E', 'C'), ('A', 'F')]
+
+        results = dict(graph.batch_shortest_paths(pairs, workers=2, chunk_size=1))
+        self.assertEqual(results[('A', 'E')], (11, ['A', 'C', 'B', 'D', 'E']))
+        self.assertEqual(results[('A', 'B')], (3, ['A', 'C', 'B']))
+        self.assertEqual(results[('E', 'C')], (10, ['E', 'D', 'B', 'C']))
+        self.assertEqual(results[('A', 'F')], (None, None))
+
+    def test_find_all_distances(self):
+        graph = self.build_weighted_graph()
+
+        self.assertDictEqual(
+            graph.find_all_distances('A'),
+            {'A': 0, 'B': 3, 'C': 1, 'D': 8, 'E': 11}
+        )
+
+    def test_astar(self):
+        graph = self.build_weighted_graph()
+        self.assertEqual(graph.astar('A', 'E')[:2], (11, ['A', 'C', 'B', 'D', 'E']))
+        self.assertEqual(graph.astar('A', 'A'), (0, ['A'], 1))
+        self.assertEqual(graph.astar('A', 'F')[:2], (None, None))
+        self.assertEqual(graph.astar('A', 'E', lambda vertex_id, target_id: 0)[0], 11)
+        with self.assertRaises(KeyError):
+            graph.astar('A', 'Z')
+        with self.assertRaises(ValueError):
+            graph.astar('A', 'E', 'euclidean') # no coordinates
+
+        # on a road-like grid every edge costs at least its length, so the
+        # Manhattan distance is admissible and finds the same shortest paths
+        # as Dijkstra's Algorithm while expanding fewer vertices
+        grid = generators.grid(20, 20, weighted=True, seed=5, weight_range=(10, 12), spacing=10)
+        self.assertEqual(grid.get_vertex_attribute('3_4', 'coordinates'), (30, 40))
+        for start_id, target_id in [('0_0', '19_19'), ('2_15', '17_3'), ('10_10', '10_11')]:
+            distance = grid.find_shortest_path(start_id, target_id)
+            _, _, dijkstra_expanded = grid.astar(start_id, target_id)
+            for heuristic in ('manhattan', 'euclidean'):
+                cost, path, expanded = grid.astar(start_id, target_id, heuristic)
+                self.assertEqual(cost, distance)
+                self.assertEqual((path[0], path[-1]), (start_id, target_id))
+                self.assertLess(expanded, dijkstra_expanded)
+        self.assertEqual(
+            grid.freeze().astar('2_15', '17_3', 'manhattan'), grid.astar('2_15', '17_3', 'manhattan')
+        )
+
+        cities = WeightedGraph(is_directed=False)
+        for city, coordinates in [('London', (51.5074, -0.1278)),
+                                  ('Paris', (48.8566, 2.3522)),
+                                  ('Berlin', (52.52, 13.405))]:
+            cities.add_vertex(city)
+            cities.set_vertex_attributes(city, coordinates=coordinates)
+        cities.add_edge('London', 'Paris', 460)
+        cities.add_edge('Paris', 'Berlin', 1050)
+        cities.add_edge('London', 'Berlin', 1100)
+        self.assertEqual(cities.astar('London', 'Berlin', 'haversine')[:2], (1100, ['London', 'Berlin']))
+        with self.assertRaises(ValueError):
+            cities.astar('London', 'Berlin', 'chebyshev')
+
+
+    def test_minimum_spanning_tree_kruskal(self):
+        graph = self.build_weighted_graph()
+
+        spanning_tree = graph.minimum_spanning_tree_kruskal()
+        self.assertListEqual(
+            spanning_tree,
+            [('A', 'C', 1), ('B', 'C', 2), ('D', 'E', 3), ('B', 'D', 5)]
+        )
+
+        # F is isolated, so add a second tree to the forest
+        graph.add_vertex('G')
+        graph.add_edge('F', 'G', 7)
+        spanning_tree = graph.minimum_spanning_tree_kruskal()
+        self.assertEqual(len(spanning_tree), 5)
+        self.assertEqual(sum(edge[2] for edge in spanning_tree), 18)
+
+    def test_minimum_spanning_tree_prim(self):
+        graph = self.build_weighted_graph()
+
+        for lazy in (True, False):
+            spanning_tree, total_weight = graph.minimum_spanning_tree_prim(lazy=lazy)
+            self.assertEqual(total_weight, 11)
+            self.assertEqual(
+                sorted(tuple(sorted(edge[:2])) for edge in spanning_tree),
+                [('A', 'C'), ('B', 'C'), ('B', 'D'), ('D', 'E')]
+            )
+
+        # F is isolated, so add a second tree to the forest
+        graph.add_vertex('G')
+        graph.add_edge('F', 'G', 7)
+        for lazy in (True, False):
+            spanning_tree, total_weight = graph.minimum_spanning_tree_prim(lazy=lazy)
+            self.assertEqual(total_weight, 18)
+            self.assertEqual(len(spanning_tree), 5)
+            self.assertIn(('F', 'G', 7), spanning_tree)
+
+    def test_floyd_warshall(self):
+        graph = self.build_weighted_graph(is_directed=True)
+
+        all_pairs = graph.floyd_warshall()
+        self.assertEqual(all_pairs.get_distance('A', 'E'), 11)
+        self.assertEqual(all_pairs.get_distance('A', 'B'), 3)
+        self.assertEqual(all_pairs.get_distance('D', 'D'), 0)
+        self.assertEqual(all_pairs.get_distance('E', 'A'), float('inf'))
+        with self.assertRaises(ValueError):
+            all_pairs.get_path('A', 'E')
+
+        distances = all_pairs.to_dict()
+        for start_id in graph.get_vertex_ids():
+            for target_id in graph.get_vertex_ids():
+                expected = graph.find_shortest_path(start_id, target_id)
+                if expected is None:
+                    expected = float('inf')
+                self.assertEqual(distances[start_id][target_id], expected)
+
+        all_pairs = graph.floyd_warshall(with_predecessors=True)
+        self.assertListEqual(all_pairs.get_path('A', 'E'), ['A', 'C', 'B', 'D', 'E'])
+        self.assertListEqual(all_pairs.get_path('C', 'C'), ['C'])
+        self.assertIsNone(all_pairs.get_path('E', 'A'))
+
+        graph = self.build_weighted_graph()
+        all_pairs = graph.floyd_warshall(with_predecessors=True)
+        self.assertListEqual(all_pairs.get_path('A', 'E'), ['A', 'C', 'B', 'D', 'E'])
+        self.assertEqual(all_pairs.get_distance('E', 'A'), 11)
+
+
+class TestDisjointSet(unittest.TestCase):
+
+    def test_disjoint_set(self):
+        components = DisjointSet(5)
+        self.assertEqual(components.count(), 5)
+        self.assertTrue(components.union(0, 1))
+        self.assertTrue(components.union(3, 4))
+        self.assertTrue(components.union(1, 4))
+        self.assertFalse(components.union(0, 3))
+        self.assertTrue(components.connected(0, 4))
+        self.assertFalse(components.connected(0, 2))
+        self.assertEqual(components.get_set_size(3), 4)
+        self.assertEqual(components.count(), 2)
+        self.assertEqual(components.groups(), [[0, 1, 3, 4], [2]])
+
+        self.assertEqual(components.add(), 5)
+        self.assertEqual(len(components), 6)
+        self.assertEqual(components.count(), 3)
+
+    def test_long_chain(self):
+        components = DisjointSet(5000)
+        for element in range(4999):
+            components.union(element, element + 1)
+        self.assertEqual(components.count(), 1)
+        self.assertTrue(components.connected(0, 4999))
+
+    def test_keyed_disjoint_set(self):
+        components = KeyedDisjointSet(['A', 'B', 'C'])
+        self.assertFalse(components.add('A'))
+        self.assertTrue(components.add('D'))
+        components.union('B', 'D')
+        self.assertIn(components.find('D'), ['B', 'D'])
+        self.assertTrue(components.connected('B', 'D'))
+        self.assertEqual(components.groups(), [['A'], ['B', 'D'], ['C']])
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def test_graph_query_cache(self):
+        filename = 'test_files/graph_medium_undirected.txt'
+        graph = read_graph_from_file(filename)
+        self.assertIsNone(graph.get_query_cache_stats())
+
+        graph.enable_query_cache(maxsize=8)
+        path = graph.find_shortest_path('A', 'F')
+        self.assertIs(graph.find_shortest_path('A', 'F'), path)
+        graph.get_connected_components()
+        graph.get_connected_components()
+        stats = graph.get_query_cache_stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+
+        # a change to the graph makes the cached path stale
+        graph.add_vertex('G')
+        graph.add_edge('A', 'G')
+        graph.add_edge('G', 'F')
+        self.assertListEqual(graph.find_shortest_path('A', 'F'), ['A', 'G', 'F'])
+        self.assertEqual(graph.get_query_cache_stats()['invalidations'], 1)
+
+        # results built from a cached query are the caller's to change
+        ring = graph.find_vertices_n_away('A', 2)
+        expected = list(ring)
+        ring.append('Z')
+        self.assertListEqual(graph.find_vertices_n_away('A', 2), expected)
+
+        graph.disable_query_cache()
+        self.assertIsNone(graph.get_query_cache())
+
+    def test_weighted_graph_query_cache(self):
+        graph = WeightedGraph(is_directed=False)
+        for vertex_id in ['A', 'B', 'C']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B', 5)
+        graph.enable_query_cache()
+
+        self.assertEqual(graph.find_shortest_path('A', 'B'), 5)
+        self.assertEqual(graph.find_shortest_path('A', 'B'), 5)
+        self.assertEqual(graph.get_query_cache_stats()['hits'], 1)
+
+        graph.add_edge('A', 'C', 1)
+        graph.add_edge('C', 'B', 1)
+        self.assertEqual(graph.find_shortest_path('A', 'B'), 2)
+
+    def test_eviction(self):
+        cache = QueryCache(maxsize=2)
+        cache.store('a', 0, 1)
+        cache.store('b', 0, 2)
+        self.assertEqual(cache.lookup('a', 0), (True, 1))
+        cache.store('c', 0, 3)  # evicts 'b', the least recently used
+        self.assertEqual(cache.lookup('b', 0), (False, None))
+        self.assertEqual(cache.lookup('a', 1), (False, None))  # stale
+        self.assertEqual(
+            cache.get_stats(),
+            {'hits': 1, 'misses': 2, 'evictions': 1, 'invalidations': 1,
+             'size': 1, 'maxsize': 2}
+        )
+
+
+class TestCentrality(unittest.TestCase):
+
+    def assertScoresAlmostEqual(self, scores, expected):
+        self.assertEqual(scores.keys(), expected.keys())
+        for vertex_id, score in expected.items():
+            self.assertAlmostEqual(scores[vertex_id], score, places=5)
+
+    def test_pagerank(self):
+        graph = Graph(is_directed=True)
+        graph.add_vertices(['A', 'B', 'C'])
+        graph.add_edges([('A', 'B'), ('B', 'C'), ('C', 'A')])
+        self.assertScoresAlmostEqual(graph.pagerank(), {'A': 1 / 3, 'B': 1 / 3, 'C': 1 / 3})
+
+        # D has no outgoing edges, so its rank is spread over every vertex
+        graph.add_vertex('D')
+        graph.add_edge('C', 'D')
+        ranks = graph.pagerank(tolerance=1e-10)
+        self.assertAlmostEqual(sum(ranks.values()), 1)
+        self.assertAlmostEqual(ranks['A'], ranks['D']) # C splits its rank between them
+        self.assertGreater(ranks['C'], ranks['A'])
+        self.assertAlmostEqual(ranks['B'], 0.15 / 4 + 0.85 * (ranks['A'] + ranks['D'] / 4))
+
+        # with no damping the walker always jumps to the personalization
+        self.assertScoresAlmostEqual(
+            graph.pagerank(damping=0, personalization={'B': 1}),
+            {'A': 0, 'B': 1, 'C': 0, 'D': 0}
+        )
+        with self.assertRaises(KeyError):
+            graph.pagerank(personalization={'Z': 1})
+        with self.assertRaises(ValueError):
+            graph.pagerank(damping=1.5)
+
+        # a warm start from the previous ranks converges to the same ranks
+        graph.add_edge('D', 'A')
+        self.assertScoresAlmostEqual(
+            graph.pagerank(start=ranks, tolerance=1e-10), graph.pagerank(tolerance=1e-10)
+        )
+
+        weighted = WeightedGraph(is_directed=True)
+        weighted.add_vertices(['A', 'B', 'C'])
+        weighted.add_edges([
+            ('A', 'B', 3), ('A', 'C', 1), ('B', 'A', 1), ('B', 'C', 1), ('C', 'A', 1)
+        ])
+        ranks = weighted.pagerank(tolerance=1e-10)
+        # B gets 3/4 of A's rank, and C the rest along with half of B's
+        self.assertAlmostEqual(ranks['B'], 0.15 / 3 + 0.85 * 0.75 * ranks['A'])
+        self.assertAlmostEqual(
+            ranks['C'], 0.15 / 3 + 0.85 * (0.25 * ranks['A'] + 0.5 * ranks['B'])
+        )
+        unweighted = weighted.pagerank(weighted=False, tolerance=1e-10)
+        self.assertAlmostEqual(unweighted['B'], 0.15 / 3 + 0.85 * 0.5 * unweighted['A'])
+        self.assertScoresAlmostEqual(weighted.freeze().pagerank(tolerance=1e-10), ranks)
+
+    def test_eigenvector_and_katz_centrality(self):
+        path = Graph(is_directed=False)
+        path.add_vertices(['A', 'B', 'C'])
+        path.add_edges([('A', 'B'), ('B', 'C')])
+        self.assertScoresAlmostEqual(
+            path.eigenvector_centrality(tolerance=1e-10),
+            {'A': 0.5, 'B': 2 ** -0.5, 'C': 0.5}
+        )
+
+        chain = Graph(is_directed=True)
+        chain.add_vertices(['A', 'B', 'C'])
+        chain.add_edges([('A', 'B'), ('B', 'C')])
+        self.assertScoresAlmostEqual(
+            chain.katz_centrality(alpha=0.1, normalized=False),
+            {'A': 1, 'B': 1.1, 'C': 1.11}
+        )
+        scores = chain.katz_centrality(alpha=0.1)
+        self.assertAlmostEqual(sum(score ** 2 for score in scores.values()), 1)
+        self.assertScoresAlmostEqual(
+            chain.katz_centrality(alpha=0.1, beta={'A': 1}, normalized=False),
+            {'A': 1, 'B': 0.1, 'C': 0.01}
+        )
+
+        # after a small change, a warm start converges to the cold result
+        graph = generators.barabasi_albert(200, 2, seed=3)
+        centrality = graph.eigenvector_centrality(tolerance=1e-10)
+        katz = graph.katz_centrality(alpha=0.05, tolerance=1e-10)
+        graph.add_edge('5', '150')
+        self.assertScoresAlmostEqual(
+            graph.eigenvector_centrality(start=centrality, tolerance=1e-10),
+            graph.eigenvector_centrality(tolerance=1e-10)
+        )
+        self.assertScoresAlmostEqual(
+            graph.katz_centrality(alpha=0.05, start=katz, tolerance=1e-10),
+            graph.katz_centrality(alpha=0.05, tolerance=1e-10)
+        )
+
+        # alpha above 1 / largest eigenvalue diverges
+        with self.assertRaises(ConvergenceError):
+            graph.katz_centrality(alpha=1.0, max_iterations=50)
+
+
+    def test_betweenness_centrality(self):
+        path = Graph(is_directed=False)
+        path.add_vertices(['A', 'B', 'C', 'D'])
+        path.add_edges([('A', 'B'), ('B', 'C'), ('C', 'D')])
+        self.assertScoresAlmostEqual(
+            path.betweenness_centrality(normalized=False, workers=1),
+            {'A': 0, 'B': 2, 'C': 2, 'D': 0}
+        )
+        self.assertScoresAlmostEqual(
+            path.betweenness_centrality(workers=1),
+            {'A': 0, 'B': 2 / 3, 'C': 2 / 3, 'D': 0}
+        )
+
+        # two equally short routes from A to D share the credit
+        diamond = Graph(is_directed=True)
+        diamond.add_vertices(['A', 'B', 'C', 'D'])
+        diamond.add_edges([('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D')])
+        self.assertScoresAlmostEqual(
+            diamond.betweenness_centrality(normalized=False, workers=1),
+            {'A': 0, 'B': 0.5, 'C': 0.5, 'D': 0}
+        )
+
+        triangle = WeightedGraph(is_directed=False)
+        triangle.add_vertices(['A', 'B', 'C'])
+        triangle.add_edges([('A', 'B', 1), ('B', 'C', 1), ('A', 'C', 5)])
+        self.assertScoresAlmostEqual(
+            triangle.betweenness_centrality(normalized=False, workers=1),
+            {'A': 0, 'B': 1, 'C': 0}
+        )
+        self.assertScoresAlmostEqual(
+            triangle.betweenness_centrality(normalized=False, workers=1, weighted=False),
+            {'A': 0, 'B': 0, 'C': 0}
+        )
+
+        # splitting the sources over worker processes gives the same scores
+        graph = generators.barabasi_albert(150, 2, seed=4)
+        exact = graph.betweenness_centrality(workers=1)
+        self.assertScoresAlmostEqual(graph.betweenness_centrality(workers=2, chunk_size=20), exact)
+        self.assertScoresAlmostEqual(graph.freeze().betweenness_centrality(workers=1), exact)
+
+        # sampling sources estimates the scores, and finds the same top vertex
+        estimate = graph.betweenness_centrality(sample_size=50, seed=1, workers=1)
+        self.assertEqual(estimate, graph.betweenness_centrality(sample_size=50, seed=1, workers=1))
+        self.assertEqual(max(estimate, key=estimate.get), max(exact, key=exact.get))
+        self.assertScoresAlmostEqual(
+            graph.betweenness_centrality(sample_size=150, workers=1), exact
+        )
+        with self.assertRaises(ValueError):
+            graph.betweenness_centrality(sample_size=0)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_graph_algorithms_report_stats(self):
+        graph = read_graph_from_file('test_files/graph_small_directed_2.txt')
+        recorder = StatsRecorder()
+        graph.set_instrumentation_sink(recorder)
+
+        reachable = graph.bfs_traversal('2')
+        graph.topological_sort()
+        records = recorder.get_records()
+        # topological_sort's call to topological_levels counts towards it
+        self.assertEqual(
+            [stats.algorithm for stats in records], ['bfs_traversal', 'topological_sort']
+        )
+        bfs_stats = records[0]
+        self.assertEqual(bfs_stats.vertices_visited, len(reachable))
+        self.assertEqual(
+            bfs_stats.edges_scanned,
+            sum(len(graph.get_neighbor_ids(vertex_id)) for vertex_id in reachable)
+        )
+        self.assertGreaterEqual(bfs_stats.queue_peak, 1)
+        self.assertGreaterEqual(bfs_stats.wall_time, 0)
+        self.assertIsNone(graph.get_active_stats())
+
+        graph.set_instrumentation_sink(None)
+        graph.find_shortest_path('1', '6')
+        self.assertEqual(len(recorder.get_records()), 2)
+        self.assertNotIn('iter_neighbor_ids', vars(graph))
+
+    def test_weighted_algorithms_report_stats(self):
+        graph = WeightedGraph(is_directed=False)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E', 'F']:
+            graph.add_vertex(vertex_id)
+        for vertex_id1, vertex_id2, weight in [
+            ('A', 'B', 4), ('A', 'C', 1), ('C', 'B', 2),
+            ('B', 'D', 5), ('C', 'D', 8), ('D', 'E', 3),
+        ]:
+            graph.add_edge(vertex_id1, vertex_id2, weight)
+        recorder = StatsRecorder()
+        graph.set_instrumentation_sink(recorder)
+
+        graph.find_shortest_path('A', 'E')
+        graph.minimum_spanning_tree_kruskal()
+        graph.minimum_spanning_tree_prim(lazy=False)
+        graph.floyd_warshall()
+        with self.assertRaises(KeyError):
+            graph.dijkstra('Z')
+
+        summary = recorder.summary()
+        self.assertEqual(
+            sorted(summary),
+            ['dijkstra', 'find_shortest_path', 'floyd_warshall',
+             'minimum_spanning_tree_kruskal', 'minimum_spanning_tree_prim']
+        )
+        # the undirected edges are stored from both ends
+        self.assertEqual(summary['floyd_warshall']['vertices_visited'], 6)
+        self.assertEqual(summary['floyd_warshall']['edges_scanned'], 12)
+        self.assertEqual(summary['floyd_warshall']['queue_peak'], 0)
+        self.assertGreater(summary['minimum_spanning_tree_prim']['queue_peak'], 0)
+        self.assertIsNone(graph.get_active_stats())
+
+        frozen = graph.freeze()
+        frozen.set_instrumentation_sink(recorder)
+        frozen.dijkstra('A')
+        self.assertEqual(recorder.get_records()[-1].edges_scanned, 12)
+
+    def test_concurrent_and_parallel_calls(self):
+        graph = generators.erdos_renyi(40, 0.1, seed=1)
+        recorder = StatsRecorder()
+        graph.set_instrumentation_sink(recorder)
+        start_id = graph.get_vertex_ids()[0]
+        expected = len(graph.bfs_traversal(start_id))
+
+        # the active stats are per thread, so concurrent calls don't mix
+        threads = [
+            threading.Thread(target=graph.bfs_traversal, args=(start_id,))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            [stats.vertices_visited for stats in recorder.get_records()], [expected] * 5
+        )
+
+        # work done in worker processes is counted too
+        recorder.clear()
+        graph.betweenness_centrality(workers=1)
+        graph.betweenness_centrality(workers=2, chunk_size=10)
+        serial, parallel = recorder.get_records()
+        self.assertGreater(serial.edges_scanned, 0)
+        self.assertEqual(parallel.vertices_visited, serial.vertices_visited)
+        self.assertEqual(parallel.edges_scanned, serial.edges_scanned)
+
+class TestCSRGraph(unittest.TestCase):
+
+    def build_weighted_graph(self):
+        graph = WeightedGraph(is_directed=False)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B', 4)
+        graph.add_edge('A', 'C', 1)
+        graph.add_edge('C', 'B', 2)
+        graph.add_edge('B', 'D', 5)
+        graph.add_edge('C', 'D', 8)
+        graph.add_edge('D', 'E', 3)
+        return graph
+
+    def test_freeze_graph(self):
+        filename = 'test_files/graph_medium_undirected.txt'
+        graph = read_graph_from_file(filename)
+        frozen = graph.freeze()
+
+        self.assertIsInstance(frozen, CSRGraph)
+        self.assertIs(frozen.freeze(), frozen)
+        self.assertEqual(frozen.get_vertex_ids(), graph.get_vertex_ids())
+        self.assertEqual(frozen.num_edges(), 18)
+        for vertex_id in graph.get_vertex_ids():
+            self.assertEqual(
+                frozen.get_neighbor_ids(vertex_id),
+                graph.get_neighbor_ids(vertex_id)
+            )
+        self.assertIsNone(frozen.get_vertex('Z'))
+
+        with self.assertRaises(TypeError):
+            frozen.add_vertex('Z')
+        with self.assertRaises(TypeError):
+            frozen.add_edge('A', 'F')
+
+    def test_frozen_graph_algorithms(self):
+        filename = 'test_files/graph_medium_undirected.txt'
+        graph = read_graph_from_file(filename)
+        frozen = graph.freeze()
+
+        self.assertEqual(
+            frozen.find_shortest_path('A', 'F'),
+            graph.find_shortest_path('A', 'F')
+        )
+        self.assertEqual(
+            sorted(frozen.find_vertices_n_away('A', 2)),
+            sorted(graph.find_vertices_n_away('A', 2))
+        )
+        self.assertEqual(
+            sorted(sorted(c) for c in frozen.get_connected_components()),
+            sorted(sorted(c) for c in graph.get_connected_components())
+        )
+
+        graph = Graph(is_directed=True)
+        for vertex_id in ['A', 'B', 'C', 'D', 'E', 'F']:
+            graph.add_vertex(vertex_id)
+        graph.add_edge('A', 'B')
+        graph.add_edge('B', 'C')
+        graph.add_edge('A', 'D')
+        graph.add_edge('D', 'C')
+        graph.add_edge('E', 'F')
+        self.assertListEqual(
+            graph.freeze().topological_sort(), graph.topological_sort()
+        )
+
+    def test_freeze_weighted_graph(self):
+        graph = self.build_weighted_graph()
+        frozen = graph.freeze()
+
+        self.assertIsInstance(frozen, WeightedCSRGraph)
+        self.assertEqual(
+            frozen.get_neighbor_ids_with_weights('B'),
+            graph.get_neighbor_ids_with_weights('B')
+        )
+        self.assertEqual(
+            frozen.minimum_spanning_tree_kruskal(),
+            graph.minimum_spanning_tree_kruskal()
+        )
+        self.assertEqual(
+            frozen.minimum_spanning_tree_prim(),
+            graph.minimum_spanning_tree_prim()
+        )
+        self.assertEqual(
+            frozen.floyd_warshall().to_dict(), graph.floyd_warshall().to_dict()
+        )
+        self.assertEqual(
+            frozen.find_shortest_path_with_distance('A', 'E'),
+            graph.find_shortest_path_with_distance('A', 'E')
+        )
+        self.assertEqual(frozen.floyd_warshall().get_distance('A', 'E'), 11)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.temp_dir.name, 'graph.snapshot')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assertSameGraph(self, loaded, graph):
+        self.assertEqual(loaded.is_directed(), graph.is_directed())
+        self.assertEqual(loaded.get_vertex_ids(), graph.get_vertex_ids())
+        for vertex_id in graph.get_vertex_ids():
+            if isinstance(graph, WeightedGraph):
+                self.assertEqual(
+                    loaded.get_neighbor_ids_with_weights(vertex_id),
+                    graph.get_neighbor_ids_with_weights(vertex_id)
+                )
+            else:
+                self.assertEqual(
+                    loaded.get_neighbor_ids(vertex_id),
+                    graph.get_neighbor_ids(vertex_id)
+                )
+
+    def test_round_trip_test_files(self):
+        for filename in sorted(glob.glob('test_files/*.txt')):
+            if filename.endswith('improper_graph_type.txt'):
+                continue
+            graph = read_graph_from_file(filename)
+            save_snapshot(graph, self.filename)
+            for use_mmap in (True, False):
+                loaded = load_snapshot(self.filename, use_mmap=use_mmap)
+                self.assertIsInstance(loaded, CSRGraph)
+                self.assertEqual(
+                    isinstance(loaded, WeightedGraph), isinstance(graph, WeightedGraph)
+                )
+                self.assertSameGraph(loaded, graph)
+
+    def test_round_trip_weighted_graph(self):
+        graph = WeightedGraph(is_directed=True)
+        for vertex_id in [1, 2, 3]:
+            graph.add_vertex(vertex_id)
+        graph.add_edge(1, 2, 0.5)
+        graph.add_edge(2, 3, 1.25)
+        save_snapshot(graph, self.filename)
+
+        loaded = load_snapshot(self.filename)
+        self.assertIsInstance(loaded, WeightedCSRGraph)
+        self.assertSameGraph(loaded, graph)
+        self.assertEqual(loaded.find_shortest_path(1, 3), 1.75)
+
+    def test_pickle_loaded_snapshot(self):
+        for filename in ('test_files/graph_small_directed.txt',
+                'test_files/graph_small_weighted.txt'):
+            graph = read_graph_from_file(filename)
+            save_snapshot(graph, self.filename)
+            loaded = load_snapshot(self.filename, use_mmap=True)
+            loaded.get_sources() # builds the reversed arrays too
+            unpickled = pickle.loads(pickle.dumps(loaded))
+            self.assertIs(type(unpickled), type(loaded))
+            self.assertSameGraph(unpickled, graph)
+            self.assertEqual(unpickled.get_sources(), loaded.get_sources())
+
+    def test_bad_snapshot(self):
+        with open(self.filename, 'wb') as snapshot_file:
+            snapshot_file.write(b'not a snapshot at all, just some text')
+        with self.assertRaises(ValueError):
+            load_snapshot(self.filename)
+
+        graph = Graph()
+        graph.add_vertex(('A', 'B'))
+        with self.assertRaises(TypeError):
+            save_snapshot(graph, self.filename)
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generators_are_seeded(self):
+        def edges(graph):
+            return [
+                (vertex_id, graph.get_neighbor_ids(vertex_id))
+                for vertex_id in graph.get_vertex_ids()
+            ]
+
+        for make_graph in [
+            lambda seed: generators.erdos_renyi(50, 0.1, seed=seed),
+            lambda seed: generators.barabasi_albert(50, 3, seed=seed),
+            lambda seed: generators.dag_layers(5, 10, 0.3, seed=seed),
+            lambda seed: generators.random_tree(50, seed=seed),
+        ]:
+            self.assertEqual(edges(make_graph(1)), edges(make_graph(1)))
+            self.assertNotEqual(edges(make_graph(1)), edges(make_graph(2)))
+
+    def test_generator_shapes(self):
+        graph = generators.erdos_renyi(20, 1.0, is_directed=True)
+        self.assertTrue(all(
+            len(graph.get_neighbor_ids(vertex_id)) == 19
+            for vertex_id in graph.get_vertex_ids()
+        ))
+
+        graph = generators.grid(3, 4, weighted=True, seed=0)
+        self.assertIsInstance(graph, WeightedGraph)
+        self.assertEqual(len(graph.get_vertices()), 12)
+        self.assertEqual(len(graph.get_neighbor_ids('1_1')), 4)
+
+        graph = generators.dag_layers(4, 5, 0.2, seed=0)
+        levels = graph.topological_levels()
+        self.assertEqual(len(levels), 4)
+        self.assertEqual(len(levels[0]), 5)
+
+        self.assertFalse(generators.random_tree(30, is_directed=False, seed=0).contains_cycle())
+
+    def test_write_graph_file_round_trip(self):
+        graph = generators.erdos_renyi(30, 0.2, weighted=True, seed=3)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'graph.txt')
+            generators.write_graph_file(graph, filename)
+            loaded = read_graph_from_file(filename)
+        for vertex_id in graph.get_vertex_ids():
+            self.assertEqual(
+                sorted(loaded.get_neighbor_ids_with_weights(vertex_id)),
+                sorted(graph.get_neighbor_ids_with_weights(vertex_id))
+            )
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(
+            sizes=[20], repeat=1, names=['find_shortest_path', 'read_graph_from_file']
+        )
+        names = {result['benchmark'] for result in results['results']}
+        self.assertIn('Graph.find_shortest_path', names)
+        self.assertIn('WeightedGraph.find_shortest_path', names)
+        self.assertIn('read_graph_from_file', names)
+        self.assertTrue(all(result['peak_memory_bytes'] >= 0 for result in results['results']))
+
+        comparisons = compare_results(results, results)
+        self.assertEqual(len(comparisons), len(results['results']))
+        self.assertFalse(any(comparison['regressed'] for comparison in comparisons))
+
+        slower = {
+            'format': results['format'],
+            'results': [dict(result, best_seconds=result['best_seconds'] / 2)
+                for result in results['results']],
+        }
+        self.assertTrue(all(
+            comparison['regressed'] for comparison in compare_results(results, slower)
+        ))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
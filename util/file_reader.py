@@ -1,55 +1,306 @@
+import mmap
+import operator
+import os
+from array import array
+from bisect import bisect_left
+from itertools import islice, repeat
+
 from graphs.graph import Graph
+from graphs.weighted_graph import WeightedGraph
+from graphs.csr_graph import CSRGraph, WeightedCSRGraph
+
+# Number of edges parsed before they are inserted into the graph together
+DEFAULT_BATCH_SIZE = 65536
+
+# Number of bytes read at a time; each block of whole lines is split in one go
+CHUNK_SIZE = 1 << 20
 
 
-def read_graph_from_file(filename):
+def read_graph_from_file(filename, weighted=None, use_mmap=False,
+    batch_size=DEFAULT_BATCH_SIZE, progress_callback=None, frozen=False):
     """
     Read in data from the specified filename, and create and return a graph
     object corresponding to that data.
 
+    The file is streamed in blocks rather than read into memory, so its
+    size is not limited by RAM. The first line is `G` (undirected) or `D`
+    (directed), the second line lists the vertex ids separated by commas,
+    and every following line holds one edge as `(A,B)` or, for a weighted
+    graph, `(A,B,weight)`.
+
     Arguments:
     filename (string): The relative path of the file to be processed
+    weighted (boolean): Whether to build a WeightedGraph. By default this is
+    decided by whether the first edge line has a weight column.
+    use_mmap (boolean): Memory-map the file instead of reading it through a
+    buffered file object.
+    batch_size (integer): How many edges to parse before inserting them.
+    progress_callback (function): If given, called as
+    `progress_callback(num_edges, bytes_read)` after every batch of edges,
+    where `num_edges` is the number of edges added so far. With `frozen`,
+    it is called after every block read instead, and duplicate edges are
+    only dropped at the end, so until the last call it counts edge lines.
+    frozen (boolean): Build the CSR arrays of a frozen graph directly,
+    which is much faster than building a mutable graph and freezing it.
 
     Returns:
-    Graph: A directed or undirected Graph object containing the specified
-    vertices and edges
+    Graph: A directed or undirected Graph (or WeightedGraph) object
+    containing the specified vertices and edges, or with `frozen`, a
+    CSRGraph (or WeightedCSRGraph)
+    """
+    with open(filename, 'rb') as graph_file:
+        if use_mmap and os.fstat(graph_file.fileno()).st_size > 0:
+            with mmap.mmap(graph_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _build_graph(
+                    mapped, weighted, batch_size, progress_callback, frozen
+                )
+        return _build_graph(graph_file, weighted, batch_size, progress_callback, frozen)
+
+
+def _parse_weight(raw_weight):
+    """Parse an edge weight, keeping whole numbers as ints."""
+    try:
+        return int(raw_weight)
+    except ValueError:
+        return float(raw_weight)
+
+
+def _parse_weights(raw_weights):
+    """Parse a list of edge weights, keeping whole numbers as ints."""
+    try:
+        return list(map(int, raw_weights))
+    except ValueError:
+        return list(map(_parse_weight, raw_weights))
+
+
+def _lookup_ids(vertex_index, raw_ids):
+    """Map raw (bytes) vertex ids through `vertex_index`, which must hold them all."""
+    try:
+        return list(map(vertex_index.__getitem__, raw_ids))
+    except KeyError:
+        raise KeyError("One or both vertices are not in the graph!") from None
+
+
+def _iter_blocks(graph_file):
     """
+    Yield the rest of a file in blocks of whole lines, reading CHUNK_SIZE
+    bytes at a time. Only the last block may lack a trailing newline.
+    """
+    tail = b''
+    while True:
+        chunk = graph_file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            tail += chunk # no line ends in this chunk
+            continue
+        yield tail + chunk[:end]
+        tail = chunk[end:]
+    if tail:
+        yield tail
 
-    # TODO: Use 'open' to open the file
 
-    # TODO: Use the first line (G or D) to determine whether graph is directed 
-    # and create a graph object
+def _split_edge_fields(block, edge_size):
+    """
+    Split a block of edge lines into one flat list holding `edge_size`
+    fields per edge, so `(A,B)\\n(C,D)\\n` becomes [A, B, C, D].
+    """
+    if not block.endswith(b'\n'):
+        block += b'\n'
+    num_lines = block.count(b'\n')
+    if (block.count(b'(') == num_lines and block.count(b')') == num_lines
+            and block.count(b',') == num_lines * (edge_size - 1)
+            and b' ' not in block and b'\t' not in block):
+        # the common case, one bare edge per line: split the whole block at once
+        fields = block.translate(None, b'()\r').replace(b'\n', b',').split(b',')
+        fields.pop() # after the last newline
+        return fields
 
-    # TODO: Use the second line to add the vertices to the graph
+    # blank lines, padding, or lines with extra fields
+    fields = []
+    for line in block.split(b'\n'):
+        line = line.strip()
+        if line == b'':
+            continue
+        line_fields = line[1:-1].split(b',')
+        if len(line_fields) < edge_size:
+            raise ValueError("Bad edge line: {!r}".format(line.decode()))
+        fields += line_fields[:edge_size]
+    return fields
 
-    # TODO: Use the 3rd+ line to add the edges to the graph
+
+def _build_graph(graph_file, weighted, batch_size, progress_callback, frozen):
+    """
+    Build a graph from a binary file object (or memory map) in the graph
+    file format.
+    """
+    header = graph_file.readline()
+    bytes_read = len(header)
+    header = header.strip()
+    if header == b'':
+        return None
+    if header not in (b'D', b'G'):
+        raise ValueError("Bad graph type")
+    is_directed = (header == b'D')
+
+    vertex_line = graph_file.readline()
+    bytes_read += len(vertex_line)
+    raw_ids = dict.fromkeys(
+        raw_id for raw_id in vertex_line.strip().split(b',') if raw_id != b''
+    )
+    vertex_ids = [raw_id.decode() for raw_id in raw_ids]
+    if frozen:
+        # raw bytes -> dense index
+        vertex_index = {raw_id: i for i, raw_id in enumerate(raw_ids)}
+    else:
+        # raw bytes -> decoded vertex id, so each distinct id is decoded once
+        # and every edge shares the same string object for it
+        vertex_index = dict(zip(raw_ids, vertex_ids))
 
     graph_obj = None
-    with open(filename) as graph_file:
-        for index, line in enumerate(graph_file.readlines()):
-            line = line.strip()
-            if index == 0:
-                if line not in ("D", "G"):
-                    raise(ValueError("Bad graph type"))
-                    return
-                graph_obj = Graph(
-                    is_directed=(line == "D")
-                )
-            elif index == 1:
-                for vertex_id in line.split(','):
-                    if vertex_id == "":
-                        continue
-                    else:
-                        graph_obj.add_vertex(vertex_id)
-            else:
-                if line == "":
-                    continue
-                vertices = line[1:-1].split(',')
-                graph_obj.add_edge(vertices[0], vertices[1])
+    edge_size = None
+    columns = None # the parsed sources, targets (and weights) not yet inserted
+    num_edges = 0
+    for block in _iter_blocks(graph_file):
+        bytes_read += len(block)
+        if edge_size is None:
+            first_line = block.lstrip().split(b'\n', 1)[0].strip()
+            if first_line == b'':
+                continue # no edges yet
+            # the first edge decides the graph type if it wasn't given
+            if weighted is None:
+                weighted = first_line.count(b',') > 1
+            edge_size = 3 if weighted else 2
+            columns = [[] for _ in range(edge_size)]
+            if not frozen:
+                graph_obj = _create_graph(vertex_ids, is_directed, weighted)
+
+        fields = _split_edge_fields(block, edge_size)
+        columns[0] += _lookup_ids(vertex_index, fields[0::edge_size])
+        columns[1] += _lookup_ids(vertex_index, fields[1::edge_size])
+        if weighted:
+            columns[2] += _parse_weights(fields[2::edge_size])
+
+        if frozen:
+            if progress_callback is not None:
+                progress_callback(len(columns[0]), bytes_read)
+            continue
+
+        # the ids came from the vertex line, so skip the checks of add_edges
+        start = 0
+        while len(columns[0]) - start >= batch_size:
+            end = start + batch_size
+            num_edges += graph_obj.__insert_edges__(
+                zip(*[column[start:end] for column in columns])
+            )
+            start = end
+            if progress_callback is not None:
+                progress_callback(num_edges, bytes_read)
+        for column in columns:
+            del column[:start]
+
+    weighted = bool(weighted)
+    if columns is None:
+        columns = [[], [], []]
+    if frozen:
+        graph_obj, num_edges = _build_csr(
+            vertex_ids, is_directed, columns[0], columns[1],
+            columns[2] if weighted else None
+        )
+    else:
+        if graph_obj is None:
+            graph_obj = _create_graph(vertex_ids, is_directed, weighted)
+        num_edges += graph_obj.__insert_edges__(zip(*columns))
+    if progress_callback is not None:
+        progress_callback(num_edges, bytes_read)
     return graph_obj
 
 
+def _create_graph(vertex_ids, is_directed, weighted):
+    """Create an empty graph of the right type and add the given vertices."""
+    graph_obj = (WeightedGraph if weighted else Graph)(is_directed=is_directed)
+    graph_obj.add_vertices(vertex_ids)
+    return graph_obj
+
+
+def _build_csr(vertex_ids, is_directed, sources, targets, weights):
+    """
+    Build a frozen graph straight from the dense indices of the edges'
+    endpoints (and their weights, or None), in file order. Like add_edges
+    followed by freeze, the first copy of each edge is kept and every
+    vertex's neighbors stay in file order.
+
+    Returns:
+    (CSRGraph, integer): The frozen graph and the number of distinct edges.
+    """
+    if not is_directed:
+        # every edge goes both ways, with the two directions in file order
+        num_edges = len(sources)
+        sources, targets = (
+            _interleave(sources, targets, num_edges),
+            _interleave(targets, sources, num_edges)
+        )
+        if weights is not None:
+            weights = _interleave(weights, weights, num_edges)
+
+    # drop repeated edges (and the second half of undirected self-loops);
+    # edges sorted by source and then target can't repeat, so skip the check
+    num_vertices = len(vertex_ids)
+    is_grouped = all(map(operator.le, sources, islice(sources, 1, None)))
+    is_sorted = is_grouped and all(map(
+        operator.or_,
+        map(operator.lt, sources, islice(sources, 1, None)),
+        map(operator.lt, targets, islice(targets, 1, None))
+    ))
+    if not is_sorted:
+        keys = list(map(operator.add, map(num_vertices.__mul__, sources), targets))
+        if len(set(keys)) < len(keys):
+            first_seen = dict(zip(reversed(keys), range(len(keys) - 1, -1, -1)))
+            kept = sorted(first_seen.values())
+            sources, targets, weights = _select(kept, sources, targets, weights)
+
+    # group the edges by source, keeping their order; usually they already are
+    if not is_grouped:
+        order = sorted(range(len(sources)), key=sources.__getitem__)
+        sources, targets, weights = _select(order, sources, targets, weights)
+
+    num_edges = len(sources)
+    if not is_directed:
+        num_self_loops = sum(map(operator.eq, sources, targets))
+        num_edges = (num_edges + num_self_loops) // 2
+
+    offsets = array('q', map(bisect_left, repeat(sources), range(num_vertices + 1)))
+    targets = array('q', targets)
+    if weights is None:
+        return CSRGraph(vertex_ids, offsets, targets, is_directed=is_directed), num_edges
+    try:
+        weights = array('q', weights)
+    except TypeError: # not all whole numbers
+        weights = array('d', weights)
+    graph_obj = WeightedCSRGraph(vertex_ids, offsets, targets, weights, is_directed=is_directed)
+    return graph_obj, num_edges
+
+
+def _select(positions, sources, targets, weights):
+    """Return the sources, targets and weights (or None) at `positions`, in that order."""
+    return (
+        list(map(sources.__getitem__, positions)),
+        list(map(targets.__getitem__, positions)),
+        None if weights is None else list(map(weights.__getitem__, positions))
+    )
+
+
+def _interleave(list1, list2, length):
+    """Return [list1[0], list2[0], list1[1], list2[1], ...]."""
+    result = [None] * (2 * length)
+    result[0::2] = list1
+    result[1::2] = list2
+    return result
+
+
 if __name__ == '__main__':
 
     graph = read_graph_from_file('test.txt')
 
-    print(graph)
\ No newline at end of file
+    print(graph)
@@ -0,0 +1,138 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from graphs.csr_graph import CSRGraph, WeightedCSRGraph, get_buffer_format
+from graphs.weighted_graph import WeightedGraph
+
+# Snapshot layout (all integers little-endian):
+#   header     magic, version, flags, vertex count, edge count, id table size
+#   id table   the vertex ids as a UTF-8 JSON list, in dense index order
+#   padding    zero bytes up to the next multiple of 8
+#   offsets    (V + 1) int64
+#   targets    E int64
+#   weights    E int64 or float64 (weighted graphs only)
+SNAPSHOT_MAGIC = b'GRAPHSNP'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<8sIIQQQ')
+
+FLAG_DIRECTED = 1
+FLAG_WEIGHTED = 2
+FLAG_FLOAT_WEIGHTS = 4
+
+ITEM_SIZE = 8
+
+
+def save_snapshot(graph, filename):
+    """
+    Save a graph to a binary snapshot file that `load_snapshot` can map back
+    into memory without parsing.
+
+    Arguments:
+    graph (Graph): The graph to save. Weighted graphs keep their weights.
+    Vertex ids must be strings or numbers.
+    filename (string): The path of the snapshot file to write.
+    """
+    frozen = graph.freeze()
+    vertex_ids = frozen.get_vertex_ids()
+    for vertex_id in vertex_ids:
+        if isinstance(vertex_id, bool) or not isinstance(vertex_id, (str, int, float)):
+            raise TypeError(
+                "Only string and number vertex ids can be saved, got {!r}".format(vertex_id)
+            )
+    id_table = json.dumps(vertex_ids, separators=(',', ':')).encode('utf-8')
+
+    buffers = [frozen.get_offsets(), frozen.get_targets()]
+    flags = FLAG_DIRECTED if frozen.is_directed() else 0
+    if isinstance(frozen, WeightedGraph):
+        weights = frozen.get_weights()
+        flags |= FLAG_WEIGHTED
+        if get_buffer_format(weights) == 'd':
+            flags |= FLAG_FLOAT_WEIGHTS
+        buffers.append(weights)
+
+    with open(filename, 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags,
+            len(vertex_ids), frozen.num_edges(), len(id_table)
+        ))
+        snapshot_file.write(id_table)
+        snapshot_file.write(b'\0' * _padding(HEADER.size + len(id_table)))
+        for buffer in buffers:
+            if sys.byteorder == 'big':
+                buffer = array(get_buffer_format(buffer), buffer)
+                buffer.byteswap()
+            snapshot_file.write(buffer)
+
+
+def load_snapshot(filename, use_mmap=True):
+    """
+    Load a graph saved with `save_snapshot`.
+
+    With `use_mmap`, the CSR arrays are memoryviews straight into a read-only
+    memory map of the file: loading costs one pass over the vertex ids, no
+    Python objects are created per edge, and processes that load the same
+    file share its pages through the OS page cache.
+
+    Arguments:
+    filename (string): The path of the snapshot file to read.
+    use_mmap (boolean): Map the file instead of copying it into memory.
+
+    Returns:
+    CSRGraph: A frozen graph (a WeightedCSRGraph if the graph was weighted).
+    """
+    with open(filename, 'rb') as snapshot_file:
+        if use_mmap and sys.byteorder == 'little':
+            data = memoryview(
+                mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+        else:
+            data = memoryview(snapshot_file.read())
+
+    if len(data) < HEADER.size:
+        raise ValueError("Not a graph snapshot file")
+    magic, version, flags, num_vertices, num_edges, id_table_size = \
+        HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a graph snapshot file")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError("Unsupported graph snapshot version {}".format(version))
+
+    position = HEADER.size
+    vertex_ids = json.loads(bytes(data[position:position + id_table_size]).decode('utf-8'))
+    position += id_table_size
+    position += _padding(position)
+
+    offsets, position = _read_buffer(data, position, num_vertices + 1, 'q')
+    targets, position = _read_buffer(data, position, num_edges, 'q')
+    is_directed = bool(flags & FLAG_DIRECTED)
+
+    if flags & FLAG_WEIGHTED:
+        weight_format = 'd' if flags & FLAG_FLOAT_WEIGHTS else 'q'
+        weights, position = _read_buffer(data, position, num_edges, weight_format)
+        return WeightedCSRGraph(
+            vertex_ids, offsets, targets, weights, is_directed=is_directed
+        )
+    return CSRGraph(vertex_ids, offsets, targets, is_directed=is_directed)
+
+
+def _padding(position):
+    """Return how many bytes are needed to align `position` to 8 bytes."""
+    return -position % ITEM_SIZE
+
+
+def _read_buffer(data, position, length, item_format):
+    """
+    Return a typed view of `length` items starting at `position`, and the
+    position just past them.
+    """
+    end = position + length * ITEM_SIZE
+    if end > len(data):
+        raise ValueError("Graph snapshot file is truncated")
+    buffer = data[position:end].cast(item_format)
+    if sys.byteorder == 'big':
+        buffer = array(item_format, buffer)
+        buffer.byteswap()
+    return buffer, end